@@ -7,15 +7,23 @@ class Config:
     SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
     SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
     SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN")
+    # Keys data encryption; there is deliberately no built-in default
+    SECRET_KEY = os.getenv("SECRET_KEY")
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./agora.db")
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # Cache connections shared by all workers; callers wait briefly for a free one
+    REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", 50))
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
+    # Raise instead of lazy-loading Poll relationships, to surface N+1 queries in development
+    STRICT_LOADING = os.getenv("STRICT_LOADING", "False").lower() == "true"
     PORT = int(os.getenv("PORT", 8000))
     NGROK_URL = os.getenv("NGROK_URL")
+    # Optional local file recording applied migrations so `status` can skip the DB
+    MIGRATION_CACHE_PATH = os.getenv("MIGRATION_CACHE_PATH")
     
     @classmethod
     def validate(cls):
-        required_vars = ["SLACK_BOT_TOKEN", "SLACK_SIGNING_SECRET"]
+        required_vars = ["SLACK_BOT_TOKEN", "SLACK_SIGNING_SECRET", "SECRET_KEY"]
         missing_vars = [var for var in required_vars if not getattr(cls, var)]
         
         if missing_vars:
@@ -3,18 +3,21 @@ Admin dashboard API endpoints for Agora Slack app.
 Provides REST API for the web-based admin dashboard.
 """
 
+import asyncio
+import functools
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, Query, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from models import SessionLocal, Poll, PollOption, UserVote, VotedUser, UserRole, TeamSettings
-from performance import OptimizedQueries
+from models import SessionLocal, Poll, PollOption, UserVote, VotedUser, UserRole, TeamSettings, list_polls_with_counts, is_code_label, PollStatusCode, VoteTypeCode
+from performance import OptimizedQueries, invalidate_poll_cache
 from search_utils import search_polls, get_poll_history, get_popular_polls, get_user_participation_stats
-from export_utils import export_poll_data, export_multiple_polls_data
+from export_utils import export_poll_data, export_multiple_polls_data, stream_multiple_polls_data, EXPORT_POOL
 from templates import get_template_by_id, get_templates_by_category, get_popular_templates
 from scheduler import get_scheduled_polls, schedule_poll_creation, cancel_scheduled_poll
 from poll_management import duplicate_poll, edit_poll_question, get_poll_edit_permissions
@@ -68,6 +71,8 @@ class ExportRequest(BaseModel):
     include_voter_ids: bool = False
     include_analytics: bool = True
     anonymize: bool = True
+    stream: bool = False  # JSON only: stream polls as JSON Lines
+    pretty_print: bool = False  # JSON only: indent output
 
 # Router
 router = APIRouter(prefix="/api/admin", tags=["admin"])
@@ -214,31 +219,34 @@ async def get_polls(
 ):
     """Get polls with filtering and pagination."""
     try:
-        # Build query
-        query = db.query(Poll)
+        # Labels are stored as codes, so unknown ones can't be bound into a filter
+        if status and not is_code_label(PollStatusCode, status):
+            raise HTTPException(status_code=400, detail=f"Invalid status filter: {status}")
+        if type and not is_code_label(VoteTypeCode, type):
+            raise HTTPException(status_code=400, detail=f"Invalid type filter: {type}")
         
-        # Apply filters
+        # Build filters
+        criteria = []
         if status:
-            query = query.filter(Poll.status == status)
+            criteria.append(Poll.status == status)
         if type:
-            query = query.filter(Poll.vote_type == type)
+            criteria.append(Poll.vote_type == type)
         if creator:
-            query = query.filter(Poll.creator_id.ilike(f"%{creator}%"))
+            criteria.append(Poll.creator_id.ilike(f"%{creator}%"))
         if date_from:
-            query = query.filter(Poll.created_at >= datetime.fromisoformat(date_from))
+            criteria.append(Poll.created_at >= datetime.fromisoformat(date_from))
         if date_to:
-            query = query.filter(Poll.created_at <= datetime.fromisoformat(date_to))
+            criteria.append(Poll.created_at <= datetime.fromisoformat(date_to))
         
         # Get total count
-        total_count = query.count()
+        total_count = db.query(Poll).filter(*criteria).count()
         
-        # Apply pagination
-        polls = query.order_by(Poll.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
+        # One aggregated query for the page and its vote totals
+        rows = list_polls_with_counts(db, *criteria, offset=(page - 1) * limit, limit=limit)
         
         # Format response
         poll_data = []
-        for poll in polls:
-            total_votes = sum(option.vote_count for option in poll.options)
+        for poll, total_votes, _, _ in rows:
             poll_data.append({
                 "id": poll.id,
                 "question": poll.question,
@@ -260,6 +268,8 @@ async def get_polls(
             "total_pages": (total_count + limit - 1) // limit
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting polls: {e}")
         raise HTTPException(status_code=500, detail="Failed to get polls")
@@ -332,6 +342,7 @@ async def update_poll(
                 poll.ended_at = datetime.now()
         
         db.commit()
+        invalidate_poll_cache(poll_id)
         
         return {"message": "Poll updated successfully"}
     
@@ -353,12 +364,10 @@ async def delete_poll(
         if not poll:
             raise HTTPException(status_code=404, detail="Poll not found")
         
-        # Delete related data
-        db.query(UserVote).filter(UserVote.poll_id == poll_id).delete()
-        db.query(VotedUser).filter(VotedUser.poll_id == poll_id).delete()
-        db.query(PollOption).filter(PollOption.poll_id == poll_id).delete()
-        db.delete(poll)
+        # Related data is removed by the database via ON DELETE CASCADE
+        db.execute(delete(Poll).where(Poll.id == poll_id))
         db.commit()
+        invalidate_poll_cache(poll_id)
         
         return {"message": "Poll deleted successfully"}
     
@@ -403,24 +412,44 @@ async def export_polls(
 ):
     """Export polls to file."""
     try:
+        if export_request.stream and export_request.format == "json":
+            # Stream JSON Lines as each poll is loaded instead of buffering the whole export
+            filename = f"polls_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+            return StreamingResponse(
+                stream_multiple_polls_data(
+                    poll_ids=export_request.poll_ids,
+                    include_analytics=export_request.include_analytics,
+                    anonymize=export_request.anonymize
+                ),
+                media_type="application/x-ndjson",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+        
         if len(export_request.poll_ids) == 1:
             # Single poll export
-            file_data = export_poll_data(
+            export_call = functools.partial(
+                export_poll_data,
                 poll_id=export_request.poll_ids[0],
                 format_type=export_request.format,
                 include_voter_ids=export_request.include_voter_ids,
                 include_analytics=export_request.include_analytics,
-                anonymize=export_request.anonymize
+                anonymize=export_request.anonymize,
+                pretty_print=export_request.pretty_print
             )
         else:
             # Multiple polls export
-            file_data = export_multiple_polls_data(
+            export_call = functools.partial(
+                export_multiple_polls_data,
                 poll_ids=export_request.poll_ids,
                 format_type=export_request.format,
                 include_analytics=export_request.include_analytics,
-                anonymize=export_request.anonymize
+                anonymize=export_request.anonymize,
+                pretty_print=export_request.pretty_print
             )
         
+        # Run the blocking export off the event loop
+        file_data = await asyncio.get_running_loop().run_in_executor(EXPORT_POOL, export_call)
+        
         if not file_data:
             raise HTTPException(status_code=400, detail="Failed to export polls")
         
@@ -518,7 +547,7 @@ async def get_templates(
 async def get_system_health(admin_user: dict = Depends(verify_admin_token)):
     """Get system health status."""
     try:
-        health_data = get_health()
+        health_data = await get_health()
         return health_data
     except Exception as e:
         logger.error(f"Error getting system health: {e}")
@@ -528,7 +557,7 @@ async def get_system_health(admin_user: dict = Depends(verify_admin_token)):
 async def get_system_metrics(admin_user: dict = Depends(verify_admin_token)):
     """Get system metrics."""
     try:
-        metrics_data = get_metrics()
+        metrics_data = get_metrics().decode('utf-8')
         return {"metrics": metrics_data}
     except Exception as e:
         logger.error(f"Error getting system metrics: {e}")
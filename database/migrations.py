@@ -4,9 +4,15 @@ Handles schema updates and data migrations safely.
 """
 
 import os
+import re
+import bisect
 import logging
 import json
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from inspect import getsource
 from typing import List, Dict, Any, Optional
 from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, DateTime, Text, inspect
 from sqlalchemy.orm import sessionmaker
@@ -15,14 +21,120 @@ from config import Config
 
 logger = logging.getLogger(__name__)
 
+RECORD_MIGRATION_SQL = text("""
+    INSERT INTO schema_migrations (version, description, applied_at, checksum)
+    VALUES (:version, :description, :applied_at, :checksum)
+""")
+
+DELETE_MIGRATION_SQL = text("DELETE FROM schema_migrations WHERE version = :version")
+
+PERFORMANCE_INDEXES = (
+    ('idx_polls_team_status', 'polls', 'team_id, status'),
+    ('idx_polls_channel_status', 'polls', 'channel_id, status'),
+    ('idx_polls_creator_created', 'polls', 'creator_id, created_at'),
+    ('idx_poll_options_poll_order', 'poll_options', 'poll_id, order_index'),
+    ('idx_voted_users_poll_user', 'voted_users', 'poll_id, user_id'),
+    ('idx_user_votes_poll_option', 'user_votes', 'poll_id, option_id'),
+    ('idx_user_roles_user_team', 'user_roles', 'user_id, team_id'),
+    ('idx_notifications_user_sent', 'notifications', 'user_id, sent_at'),
+    ('idx_poll_shares_poll_channel', 'poll_shares', 'poll_id, channel_id')
+)
+
+PERFORMANCE_INDEX_SQL = tuple(
+    f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns})"
+    for name, table, columns in PERFORMANCE_INDEXES
+)
+
+DROP_PERFORMANCE_INDEX_SQL = tuple(
+    f"DROP INDEX IF EXISTS {name}" for name, _, _ in PERFORMANCE_INDEXES
+)
+
+def _indexes_by_table() -> Dict[str, List[tuple]]:
+    """Group performance indexes by table."""
+    grouped = {}
+    for name, table, columns in PERFORMANCE_INDEXES:
+        grouped.setdefault(table, []).append((name, columns))
+    return grouped
+
+# PostgreSQL builds/drops these without blocking writes on live tables. Only one
+# concurrent build can run per table, so builds are grouped by table and the
+# groups run in parallel.
+CONCURRENT_INDEX_SQL_BY_TABLE = tuple(
+    tuple(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}({columns})"
+          for name, columns in indexes)
+    for table, indexes in _indexes_by_table().items()
+)
+CONCURRENT_DROP_INDEX_SQL = tuple(
+    sql.replace("DROP INDEX", "DROP INDEX CONCURRENTLY", 1) for sql in DROP_PERFORMANCE_INDEX_SQL
+)
+CONCURRENT_INDEX_WORKERS = 4
+
+# MySQL has no CREATE/DROP INDEX IF [NOT] EXISTS; one ALTER TABLE per table instead
+MYSQL_INDEX_SQL = tuple(
+    f"ALTER TABLE {table} " + ", ".join(f"ADD INDEX {name} ({columns})" for name, columns in indexes)
+    for table, indexes in _indexes_by_table().items()
+)
+MYSQL_DROP_INDEX_SQL = tuple(
+    f"ALTER TABLE {table} " + ", ".join(f"DROP INDEX {name}" for name, _ in indexes)
+    for table, indexes in _indexes_by_table().items()
+)
+
+# Single-column indexes (SQLAlchemy's ix_<table>_<column> names) that lead a
+# composite index on the same table, so the composite serves their lookups
+REDUNDANT_INDEXES = (
+    ('polls', 'team_id'),
+    ('polls', 'channel_id'),
+    ('polls', 'creator_id'),
+    ('poll_options', 'poll_id'),
+    ('voted_users', 'poll_id'),
+    ('voted_users', 'user_id'),
+    ('user_votes', 'poll_id'),
+    ('user_votes', 'user_id'),
+    ('user_votes', 'option_id'),
+    ('notifications', 'user_id'),
+    ('notifications', 'poll_id'),
+    ('poll_shares', 'poll_id'),
+    ('poll_shares', 'channel_id'),
+    ('notification_settings', 'user_id'),
+    ('user_roles', 'team_id'),
+    ('scheduled_polls', 'team_id'),
+)
+
+def execute_sqlite_script(engine, statements):
+    """Run statements in a single SQLite executescript() call."""
+    raw = engine.raw_connection()
+    try:
+        raw.driver_connection.executescript(";\n".join(statements) + ";")
+    finally:
+        raw.close()
+
+def create_tables(engine, statements):
+    """Run idempotent CREATE TABLE IF NOT EXISTS statements."""
+    if engine.dialect.name == 'sqlite':
+        execute_sqlite_script(engine, statements)
+        return
+    
+    with engine.begin() as conn:
+        for create_sql in statements:
+            conn.execute(text(create_sql))
+
 class Migration:
     """Base class for database migrations."""
     
     def __init__(self, version: str, description: str):
         self.version = version
+        self._version_int = int(version)
         self.description = description
         self.applied_at = None
     
+    @functools.cached_property
+    def checksum(self) -> Optional[str]:
+        """SHA-256 of the migration class source, computed once."""
+        try:
+            return hashlib.sha256(getsource(type(self)).encode()).hexdigest()
+        except (OSError, TypeError):
+            return None
+    
     def up(self, engine, metadata):
         """Apply the migration."""
         raise NotImplementedError("Subclasses must implement up() method")
@@ -40,11 +152,30 @@ class MigrationManager:
     def __init__(self, database_url: str = None):
         self.database_url = database_url or Config.DATABASE_URL
         self.engine = create_engine(self.database_url)
+        # Bookkeeping queries share one connection for the whole command,
+        # opened on first use so cached status never touches the database;
+        # migration bodies still take the engine and use the pool
+        self._connection = None
         self.metadata = MetaData()
         self.migrations = []
-        self._ensure_migration_table()
+        self._by_version: Dict[str, Migration] = {}
+        self._applied_cache: Optional[set] = None
+        self._checksum_mismatches: List[str] = []
+    
+    @property
+    def _conn(self):
+        """The shared bookkeeping connection, with schema_migrations in place."""
+        if self._connection is None:
+            connection = self.engine.connect()
+            try:
+                self._ensure_migration_table(connection)
+            except Exception:
+                connection.close()
+                raise
+            self._connection = connection
+        return self._connection
     
-    def _ensure_migration_table(self):
+    def _ensure_migration_table(self, connection):
         """Create migrations table if it doesn't exist."""
         try:
             # Create migration tracking table
@@ -59,123 +190,251 @@ class MigrationManager:
             )
             
             # Create table if it doesn't exist
-            if not inspect(self.engine).has_table('schema_migrations'):
-                migrations_table.create(self.engine)
-                logger.info("Created schema_migrations table")
+            with connection.begin():
+                if not inspect(connection).has_table('schema_migrations'):
+                    migrations_table.create(connection)
+                    logger.info("Created schema_migrations table")
         
         except Exception as e:
-            logger.error(f"Error creating migrations table: {e}")
+            logger.error("Error creating migrations table: %s", e)
             raise
     
+    def close(self):
+        """Release the manager's database connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self.engine.dispose()
+    
     def register_migration(self, migration: Migration):
         """Register a migration."""
-        self.migrations.append(migration)
-        self.migrations.sort(key=lambda m: m.version)
+        bisect.insort(self.migrations, migration, key=lambda m: m._version_int)
+        self._by_version[migration.version] = migration
     
-    def get_applied_migrations(self) -> List[str]:
-        """Get list of applied migration versions."""
+    def _migration_cache_path(self) -> Optional[str]:
+        """Get the local migration state file, if enabled."""
+        if os.getenv("AGORA_SKIP_MIGRATION_CACHE"):
+            return None
+        return getattr(Config, 'MIGRATION_CACHE_PATH', None)
+    
+    def _write_migration_cache(self):
+        """Record the applied migrations in the local state file."""
+        path = self._migration_cache_path()
+        # Drifted checksums must keep being reported from the database
+        if not path or self._applied_cache is None or self._checksum_mismatches:
+            return
+        
+        applied = self.get_applied_migrations()
+        state = {
+            'last': applied[-1] if applied else None,
+            'applied': applied,
+            'checksums': {v: self._by_version[v].checksum for v in applied if v in self._by_version}
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(state, f)
+        except OSError as e:
+            logger.warning("Could not write migration cache %s: %s", path, e)
+    
+    def _invalidate_migration_cache(self):
+        """Remove the local state file so the next status reads the database."""
+        path = self._migration_cache_path()
+        if not path:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove migration cache %s: %s", path, e)
+    
+    def _cached_migration_status(self) -> Optional[Dict[str, Any]]:
+        """Get status from the local state file when it matches every registered migration."""
+        path = self._migration_cache_path()
+        if not path:
+            return None
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        applied = cached.get('applied', [])
+        checksums = cached.get('checksums', {})
+        if set(applied) != self._by_version.keys():
+            return None
+        if any(checksums.get(m.version) != m.checksum for m in self.migrations):
+            return None
+        
+        return {
+            'applied_count': len(applied),
+            'pending_count': 0,
+            'applied_migrations': applied,
+            'pending_migrations': [],
+            'last_applied': cached.get('last'),
+            'checksum_mismatches': []
+        }
+    
+    def _load_applied_migrations(self) -> set:
+        """Load applied migration versions into the in-memory cache."""
         try:
-            with self.engine.connect() as conn:
-                result = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
-                return [row[0] for row in result.fetchall()]
+            with self._conn.begin():
+                result = self._conn.execute(
+                    text("SELECT version, checksum FROM schema_migrations"),
+                    execution_options={'stream_results': True}
+                )
+                applied = set()
+                mismatches = []
+                for version, checksum in result:
+                    applied.add(version)
+                    migration = self._by_version.get(version)
+                    # Rows recorded before checksums were stored have none to compare
+                    if checksum and migration and migration.checksum not in (None, checksum):
+                        mismatches.append(version)
+            
+            if mismatches:
+                logger.warning("Applied migrations changed since they ran: %s", ', '.join(sorted(mismatches)))
+            self._applied_cache = applied
+            self._checksum_mismatches = mismatches
+            return applied
         except Exception as e:
-            logger.error(f"Error getting applied migrations: {e}")
-            return []
+            logger.error("Error getting applied migrations: %s", e)
+            self._applied_cache = None
+            return set()
+    
+    def _applied_versions(self) -> set:
+        """Get applied migration versions, loading them on first use."""
+        if self._applied_cache is None:
+            return self._load_applied_migrations()
+        return self._applied_cache
+    
+    def get_applied_migrations(self) -> List[str]:
+        """Get list of applied migration versions."""
+        return sorted(self._applied_versions(), key=int)
     
     def get_pending_migrations(self) -> List[Migration]:
         """Get list of pending migrations."""
-        applied = set(self.get_applied_migrations())
+        applied = self._applied_versions()
         return [m for m in self.migrations if m.version not in applied]
     
-    def apply_migration(self, migration: Migration) -> bool:
-        """Apply a single migration."""
+    def _apply_migration_inner(self, migration: Migration, applied_at: datetime) -> Optional[Dict[str, Any]]:
+        """Run a migration's up() and return its schema_migrations record."""
         try:
-            logger.info(f"Applying migration: {migration}")
-            
-            with self.engine.begin() as conn:
-                # Apply the migration
-                migration.up(self.engine, self.metadata)
-                
-                # Record the migration
-                conn.execute(text("""
-                    INSERT INTO schema_migrations (version, description, applied_at)
-                    VALUES (:version, :description, :applied_at)
-                """), {
-                    'version': migration.version,
-                    'description': migration.description,
-                    'applied_at': datetime.now()
-                })
-                
-                logger.info(f"Successfully applied migration: {migration.version}")
-                return True
-                
+            logger.info("Applying migration: %s", migration)
+            migration.up(self.engine, self.metadata)
+            return {
+                'version': migration.version,
+                'description': migration.description,
+                'applied_at': applied_at,
+                'checksum': migration.checksum
+            }
+        except Exception as e:
+            logger.error("Error applying migration %s: %s", migration.version, e)
+            return None
+    
+    def _record_migrations(self, records: List[Dict[str, Any]]) -> bool:
+        """Insert schema_migrations records in a single transaction."""
+        try:
+            with self._conn.begin():
+                self._conn.execute(RECORD_MIGRATION_SQL, records)
         except Exception as e:
-            logger.error(f"Error applying migration {migration.version}: {e}")
+            logger.error("Error recording migrations: %s", e)
+            return False
+        
+        if self._applied_cache is not None:
+            self._applied_cache.update(record['version'] for record in records)
+        for record in records:
+            logger.info("Successfully applied migration: %s", record['version'])
+        return True
+    
+    def apply_migration(self, migration: Migration) -> bool:
+        """Apply a single migration."""
+        record = self._apply_migration_inner(migration, datetime.now())
+        if record is None:
             return False
+        return self._record_migrations([record])
     
     def rollback_migration(self, migration: Migration) -> bool:
         """Rollback a single migration."""
         try:
-            logger.info(f"Rolling back migration: {migration}")
+            logger.info("Rolling back migration: %s", migration)
             
-            with self.engine.begin() as conn:
+            with self._conn.begin():
                 # Rollback the migration
                 migration.down(self.engine, self.metadata)
                 
                 # Remove migration record
-                conn.execute(text("""
-                    DELETE FROM schema_migrations WHERE version = :version
-                """), {'version': migration.version})
-                
-                logger.info(f"Successfully rolled back migration: {migration.version}")
-                return True
-                
+                self._conn.execute(DELETE_MIGRATION_SQL, {'version': migration.version})
+            
+            if self._applied_cache is not None:
+                self._applied_cache.discard(migration.version)
+            self._invalidate_migration_cache()
+            logger.info("Successfully rolled back migration: %s", migration.version)
+            return True
+            
         except Exception as e:
-            logger.error(f"Error rolling back migration {migration.version}: {e}")
+            logger.error("Error rolling back migration %s: %s", migration.version, e)
             return False
     
     def migrate_up(self, target_version: str = None) -> bool:
         """Apply all pending migrations up to target version."""
+        self._load_applied_migrations()
         pending = self.get_pending_migrations()
         
         if target_version:
-            pending = [m for m in pending if m.version <= target_version]
+            target = int(target_version)
+            pending = [m for m in pending if m._version_int <= target]
         
         if not pending:
             logger.info("No pending migrations to apply")
+            self._write_migration_cache()
             return True
         
-        logger.info(f"Applying {len(pending)} migrations...")
+        logger.info("Applying %s migrations...", len(pending))
         
+        # Record everything that ran in one INSERT, even if a later migration
+        # fails, so schema_migrations stays in step with the schema
+        records = []
+        failed = None
+        applied_at = datetime.now()
         for migration in pending:
-            if not self.apply_migration(migration):
-                logger.error(f"Migration failed at version {migration.version}")
-                return False
+            record = self._apply_migration_inner(migration, applied_at)
+            if record is None:
+                failed = migration
+                break
+            records.append(record)
+        
+        if records and not self._record_migrations(records):
+            return False
+        
+        if failed:
+            logger.error("Migration failed at version %s", failed.version)
+            return False
         
         logger.info("All migrations applied successfully")
+        self._write_migration_cache()
         return True
     
     def migrate_down(self, target_version: str) -> bool:
         """Rollback migrations down to target version."""
-        applied = self.get_applied_migrations()
-        applied.reverse()  # Rollback in reverse order
-        
-        migrations_to_rollback = []
-        for version in applied:
-            if version > target_version:
-                migration = next((m for m in self.migrations if m.version == version), None)
-                if migration:
-                    migrations_to_rollback.append(migration)
+        self._load_applied_migrations()
+        target = int(target_version)
+        # Rollback in reverse order
+        migrations_to_rollback = [
+            self._by_version[version]
+            for version in reversed(self.get_applied_migrations())
+            if int(version) > target and version in self._by_version
+        ]
         
         if not migrations_to_rollback:
             logger.info("No migrations to rollback")
             return True
         
-        logger.info(f"Rolling back {len(migrations_to_rollback)} migrations...")
+        logger.info("Rolling back %s migrations...", len(migrations_to_rollback))
         
         for migration in migrations_to_rollback:
             if not self.rollback_migration(migration):
-                logger.error(f"Rollback failed at version {migration.version}")
+                logger.error("Rollback failed at version %s", migration.version)
                 return False
         
         logger.info("All rollbacks completed successfully")
@@ -183,6 +442,11 @@ class MigrationManager:
     
     def get_migration_status(self) -> Dict[str, Any]:
         """Get current migration status."""
+        cached = self._cached_migration_status()
+        if cached:
+            return cached
+        
+        self._load_applied_migrations()
         applied = self.get_applied_migrations()
         pending = self.get_pending_migrations()
         
@@ -191,7 +455,8 @@ class MigrationManager:
             'pending_count': len(pending),
             'applied_migrations': applied,
             'pending_migrations': [m.version for m in pending],
-            'last_applied': applied[-1] if applied else None
+            'last_applied': applied[-1] if applied else None,
+            'checksum_mismatches': sorted(v for v in self._checksum_mismatches if v in self._applied_versions())
         }
 
 # Define specific migrations
@@ -217,199 +482,836 @@ class AddIndexesMigration(Migration):
     def __init__(self):
         super().__init__("002", "Add performance indexes")
     
-    def up(self, engine, metadata):
-        """Add indexes for better performance."""
-        with engine.connect() as conn:
-            # Add indexes that might be missing
-            indexes = [
-                "CREATE INDEX IF NOT EXISTS idx_polls_team_status ON polls(team_id, status)",
-                "CREATE INDEX IF NOT EXISTS idx_polls_channel_status ON polls(channel_id, status)",
-                "CREATE INDEX IF NOT EXISTS idx_polls_creator_created ON polls(creator_id, created_at)",
-                "CREATE INDEX IF NOT EXISTS idx_poll_options_poll_order ON poll_options(poll_id, order_index)",
-                "CREATE INDEX IF NOT EXISTS idx_voted_users_poll_user ON voted_users(poll_id, user_id)",
-                "CREATE INDEX IF NOT EXISTS idx_user_votes_poll_option ON user_votes(poll_id, option_id)",
-                "CREATE INDEX IF NOT EXISTS idx_user_roles_user_team ON user_roles(user_id, team_id)",
-                "CREATE INDEX IF NOT EXISTS idx_notifications_user_sent ON notifications(user_id, sent_at)",
-                "CREATE INDEX IF NOT EXISTS idx_poll_shares_poll_channel ON poll_shares(poll_id, channel_id)"
-            ]
-            
-            for index_sql in indexes:
+    def _execute_autocommit(self, engine, statements, failure_message: str):
+        """Run statements outside a transaction block (CONCURRENTLY, MySQL DDL)."""
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for sql in statements:
                 try:
-                    conn.execute(text(index_sql))
-                    conn.commit()
+                    conn.execute(text(sql))
                 except Exception as e:
-                    logger.warning(f"Index creation failed (may already exist): {e}")
+                    logger.warning("%s: %s", failure_message, e)
     
-    def down(self, engine, metadata):
-        """Remove added indexes."""
-        with engine.connect() as conn:
-            # Drop indexes
-            indexes_to_drop = [
-                "DROP INDEX IF EXISTS idx_polls_team_status",
-                "DROP INDEX IF EXISTS idx_polls_channel_status",
-                "DROP INDEX IF EXISTS idx_polls_creator_created",
-                "DROP INDEX IF EXISTS idx_poll_options_poll_order",
-                "DROP INDEX IF EXISTS idx_voted_users_poll_user",
-                "DROP INDEX IF EXISTS idx_user_votes_poll_option",
-                "DROP INDEX IF EXISTS idx_user_roles_user_team",
-                "DROP INDEX IF EXISTS idx_notifications_user_sent",
-                "DROP INDEX IF EXISTS idx_poll_shares_poll_channel"
-            ]
-            
-            for drop_sql in indexes_to_drop:
+    def _execute_script(self, engine, statements) -> bool:
+        """Run statements in one executescript() call, reporting success."""
+        try:
+            execute_sqlite_script(engine, statements)
+            return True
+        except Exception as e:
+            logger.warning("Index script failed, retrying statement by statement: %s", e)
+            return False
+    
+    def _execute_each(self, engine, statements, failure_message: str):
+        """Run statements in one transaction, tolerating individual failures."""
+        with engine.begin() as conn:
+            for sql in statements:
                 try:
-                    conn.execute(text(drop_sql))
-                    conn.commit()
+                    # Savepoint so one failure doesn't abort the whole batch
+                    with conn.begin_nested():
+                        conn.execute(text(sql))
                 except Exception as e:
-                    logger.warning(f"Index drop failed: {e}")
+                    logger.warning("%s: %s", failure_message, e)
+    
+    def up(self, engine, metadata):
+        """Add indexes for better performance."""
+        dialect = engine.dialect.name
+        failure_message = "Index creation failed (may already exist)"
+        if dialect == 'postgresql':
+            with ThreadPoolExecutor(max_workers=CONCURRENT_INDEX_WORKERS) as pool:
+                futures = [
+                    pool.submit(self._execute_autocommit, engine, statements, failure_message)
+                    for statements in CONCURRENT_INDEX_SQL_BY_TABLE
+                ]
+                for future in as_completed(futures):
+                    future.result()
+        elif dialect == 'mysql':
+            self._execute_autocommit(engine, MYSQL_INDEX_SQL, failure_message)
+        elif not (dialect == 'sqlite' and self._execute_script(engine, PERFORMANCE_INDEX_SQL)):
+            self._execute_each(engine, PERFORMANCE_INDEX_SQL, failure_message)
+    
+    def down(self, engine, metadata):
+        """Remove added indexes."""
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            self._execute_autocommit(engine, CONCURRENT_DROP_INDEX_SQL, "Index drop failed")
+        elif dialect == 'mysql':
+            self._execute_autocommit(engine, MYSQL_DROP_INDEX_SQL, "Index drop failed")
+        elif not (dialect == 'sqlite' and self._execute_script(engine, DROP_PERFORMANCE_INDEX_SQL)):
+            self._execute_each(engine, DROP_PERFORMANCE_INDEX_SQL, "Index drop failed")
 
 class AddAnalyticsTablesMigration(Migration):
     """Add analytics tables for better reporting."""
     
+    TABLES = (
+        """
+            CREATE TABLE IF NOT EXISTS poll_analytics (
+                id INTEGER PRIMARY KEY,
+                poll_id INTEGER NOT NULL,
+                total_votes INTEGER DEFAULT 0,
+                unique_voters INTEGER DEFAULT 0,
+                participation_rate REAL DEFAULT 0.0,
+                avg_response_time REAL DEFAULT 0.0,
+                peak_voting_hour INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (poll_id) REFERENCES polls(id)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS vote_activity (
+                id INTEGER PRIMARY KEY,
+                poll_id INTEGER NOT NULL,
+                hour INTEGER NOT NULL,
+                vote_count INTEGER DEFAULT 0,
+                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (poll_id) REFERENCES polls(id)
+            )
+        """
+    )
+    
     def __init__(self):
         super().__init__("003", "Add analytics tables")
     
     def up(self, engine, metadata):
         """Add analytics tables."""
-        with engine.connect() as conn:
-            # Check if tables already exist
-            inspector = inspect(engine)
-            
-            if not inspector.has_table('poll_analytics'):
-                conn.execute(text("""
-                    CREATE TABLE poll_analytics (
-                        id INTEGER PRIMARY KEY,
-                        poll_id INTEGER NOT NULL,
-                        total_votes INTEGER DEFAULT 0,
-                        unique_voters INTEGER DEFAULT 0,
-                        participation_rate REAL DEFAULT 0.0,
-                        avg_response_time REAL DEFAULT 0.0,
-                        peak_voting_hour INTEGER,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (poll_id) REFERENCES polls(id)
-                    )
-                """))
-                conn.commit()
-            
-            if not inspector.has_table('vote_activity'):
-                conn.execute(text("""
-                    CREATE TABLE vote_activity (
-                        id INTEGER PRIMARY KEY,
-                        poll_id INTEGER NOT NULL,
-                        hour INTEGER NOT NULL,
-                        vote_count INTEGER DEFAULT 0,
-                        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (poll_id) REFERENCES polls(id)
-                    )
-                """))
-                conn.commit()
+        create_tables(engine, self.TABLES)
     
     def down(self, engine, metadata):
         """Remove analytics tables."""
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             conn.execute(text("DROP TABLE IF EXISTS vote_activity"))
             conn.execute(text("DROP TABLE IF EXISTS poll_analytics"))
-            conn.commit()
 
 class AddNotificationSystemMigration(Migration):
     """Add notification system tables."""
     
+    TABLES = (
+        """
+            CREATE TABLE IF NOT EXISTS notification_settings (
+                id INTEGER PRIMARY KEY,
+                user_id VARCHAR(255) NOT NULL,
+                team_id VARCHAR(255) NOT NULL,
+                poll_created BOOLEAN DEFAULT 1,
+                poll_ended BOOLEAN DEFAULT 1,
+                vote_milestone BOOLEAN DEFAULT 1,
+                close_race BOOLEAN DEFAULT 1,
+                role_changed BOOLEAN DEFAULT 1,
+                daily_summary BOOLEAN DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS notifications (
+                id INTEGER PRIMARY KEY,
+                user_id VARCHAR(255) NOT NULL,
+                team_id VARCHAR(255) NOT NULL,
+                poll_id INTEGER,
+                notification_type VARCHAR(50) NOT NULL,
+                title VARCHAR(255) NOT NULL,
+                message TEXT NOT NULL,
+                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                read_at TIMESTAMP,
+                FOREIGN KEY (poll_id) REFERENCES polls(id)
+            )
+        """
+    )
+    
     def __init__(self):
         super().__init__("004", "Add notification system")
     
     def up(self, engine, metadata):
         """Add notification tables."""
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            if not inspector.has_table('notification_settings'):
-                conn.execute(text("""
-                    CREATE TABLE notification_settings (
-                        id INTEGER PRIMARY KEY,
-                        user_id VARCHAR(255) NOT NULL,
-                        team_id VARCHAR(255) NOT NULL,
-                        poll_created BOOLEAN DEFAULT 1,
-                        poll_ended BOOLEAN DEFAULT 1,
-                        vote_milestone BOOLEAN DEFAULT 1,
-                        close_race BOOLEAN DEFAULT 1,
-                        role_changed BOOLEAN DEFAULT 1,
-                        daily_summary BOOLEAN DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """))
-                conn.commit()
-            
-            if not inspector.has_table('notifications'):
-                conn.execute(text("""
-                    CREATE TABLE notifications (
-                        id INTEGER PRIMARY KEY,
-                        user_id VARCHAR(255) NOT NULL,
-                        team_id VARCHAR(255) NOT NULL,
-                        poll_id INTEGER,
-                        notification_type VARCHAR(50) NOT NULL,
-                        title VARCHAR(255) NOT NULL,
-                        message TEXT NOT NULL,
-                        sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        read_at TIMESTAMP,
-                        FOREIGN KEY (poll_id) REFERENCES polls(id)
-                    )
-                """))
-                conn.commit()
+        create_tables(engine, self.TABLES)
     
     def down(self, engine, metadata):
         """Remove notification tables."""
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             conn.execute(text("DROP TABLE IF EXISTS notifications"))
             conn.execute(text("DROP TABLE IF EXISTS notification_settings"))
-            conn.commit()
 
 class AddCrossChannelSharingMigration(Migration):
     """Add cross-channel sharing support."""
     
+    TABLES = (
+        """
+            CREATE TABLE IF NOT EXISTS poll_shares (
+                id INTEGER PRIMARY KEY,
+                poll_id INTEGER NOT NULL,
+                channel_id VARCHAR(255) NOT NULL,
+                message_ts VARCHAR(255),
+                shared_by VARCHAR(255) NOT NULL,
+                shared_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                is_active BOOLEAN DEFAULT 1,
+                FOREIGN KEY (poll_id) REFERENCES polls(id)
+            )
+        """,
+        """
+            CREATE TABLE IF NOT EXISTS cross_channel_views (
+                id INTEGER PRIMARY KEY,
+                user_id VARCHAR(255) NOT NULL,
+                team_id VARCHAR(255) NOT NULL,
+                poll_id INTEGER NOT NULL,
+                viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (poll_id) REFERENCES polls(id)
+            )
+        """
+    )
+    
     def __init__(self):
         super().__init__("005", "Add cross-channel sharing")
     
     def up(self, engine, metadata):
         """Add cross-channel sharing tables."""
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            if not inspector.has_table('poll_shares'):
-                conn.execute(text("""
-                    CREATE TABLE poll_shares (
-                        id INTEGER PRIMARY KEY,
-                        poll_id INTEGER NOT NULL,
-                        channel_id VARCHAR(255) NOT NULL,
-                        message_ts VARCHAR(255),
-                        shared_by VARCHAR(255) NOT NULL,
-                        shared_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        is_active BOOLEAN DEFAULT 1,
-                        FOREIGN KEY (poll_id) REFERENCES polls(id)
-                    )
-                """))
-                conn.commit()
-            
-            if not inspector.has_table('cross_channel_views'):
-                conn.execute(text("""
-                    CREATE TABLE cross_channel_views (
-                        id INTEGER PRIMARY KEY,
-                        user_id VARCHAR(255) NOT NULL,
-                        team_id VARCHAR(255) NOT NULL,
-                        poll_id INTEGER NOT NULL,
-                        viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (poll_id) REFERENCES polls(id)
-                    )
-                """))
-                conn.commit()
+        create_tables(engine, self.TABLES)
     
     def down(self, engine, metadata):
         """Remove cross-channel sharing tables."""
-        with engine.connect() as conn:
+        with engine.begin() as conn:
             conn.execute(text("DROP TABLE IF EXISTS cross_channel_views"))
             conn.execute(text("DROP TABLE IF EXISTS poll_shares"))
-            conn.commit()
+
+class AddPollSummaryMigration(Migration):
+    """Add the denormalized poll summary table used by poll listings."""
+    
+    TABLES = (
+        """
+            CREATE TABLE IF NOT EXISTS poll_summary (
+                poll_id INTEGER PRIMARY KEY,
+                total_votes INTEGER DEFAULT 0,
+                unique_voters INTEGER DEFAULT 0,
+                option_count INTEGER DEFAULT 0,
+                top_option_id INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (poll_id) REFERENCES polls(id),
+                FOREIGN KEY (top_option_id) REFERENCES poll_options(id)
+            )
+        """,
+    )
+    
+    def __init__(self):
+        super().__init__("006", "Add poll summary table")
+    
+    def up(self, engine, metadata):
+        """Add poll summary table and backfill it from existing polls."""
+        from models import PollSummary
+        create_tables(engine, self.TABLES)
+        with engine.begin() as conn:
+            PollSummary.refresh_all(conn)
+    
+    def down(self, engine, metadata):
+        """Remove poll summary table."""
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS poll_summary"))
+
+class EnumCodeColumnsMigration(Migration):
+    """Convert label columns to the SMALLINT codes the models now store."""
+    
+    # Indexes whose predicate compares a converted column; rebuilt around the change
+    DEPENDENT_INDEXES = ('idx_poll_team_active',)
+    
+    def __init__(self):
+        super().__init__("007", "Store enum label columns as small integer codes")
+    
+    @staticmethod
+    def _columns():
+        from models import PollStatusCode, VoteTypeCode, RoleCode, ScheduleActionCode, ScheduleTypeCode
+        return (
+            ('polls', 'vote_type', VoteTypeCode),
+            ('polls', 'status', PollStatusCode),
+            ('user_roles', 'role', RoleCode),
+            ('scheduled_polls', 'action', ScheduleActionCode),
+            ('scheduled_polls', 'schedule_type', ScheduleTypeCode),
+        )
+    
+    def _convert(self, engine, to_codes: bool):
+        from models import Base
+        dialect = engine.dialect.name
+        
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            if dialect != 'mysql':
+                for name in self.DEPENDENT_INDEXES:
+                    conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            
+            for table, column, codes in self._columns():
+                if not inspector.has_table(table):
+                    continue
+                column_type = next(c['type'] for c in inspector.get_columns(table) if c['name'] == column)
+                is_string = isinstance(column_type, String)
+                if dialect != 'sqlite' and is_string != to_codes:
+                    continue  # Already converted
+                
+                if to_codes:
+                    whens = ' '.join(f"WHEN '{code.name.lower()}' THEN {code.value}" for code in codes)
+                    new_type = 'SMALLINT'
+                else:
+                    whens = ' '.join(f"WHEN {code.value} THEN '{code.name.lower()}'" for code in codes)
+                    new_type = 'VARCHAR(50)'
+                
+                if dialect == 'postgresql':
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {new_type} USING CASE {column} {whens} END"
+                    ))
+                elif dialect == 'mysql':
+                    # Rewrite values while the column is VARCHAR, changing the type on the other side
+                    if to_codes:
+                        conn.execute(text(f"UPDATE {table} SET {column} = CASE {column} {whens} END"))
+                        conn.execute(text(f"ALTER TABLE {table} MODIFY {column} {new_type}"))
+                    else:
+                        conn.execute(text(f"ALTER TABLE {table} MODIFY {column} {new_type}"))
+                        conn.execute(text(f"UPDATE {table} SET {column} = CASE {column} {whens} END"))
+                else:
+                    # SQLite can't change a column's declared type; rewrite the values in place
+                    conn.execute(text(f"UPDATE {table} SET {column} = CASE {column} {whens} ELSE {column} END"))
+            
+            if to_codes and dialect != 'mysql':
+                for index in Base.metadata.tables['polls'].indexes:
+                    if index.name in self.DEPENDENT_INDEXES:
+                        index.create(conn, checkfirst=True)
+    
+    def up(self, engine, metadata):
+        """Rewrite label values as SMALLINT codes."""
+        self._convert(engine, to_codes=True)
+    
+    def down(self, engine, metadata):
+        """Restore label values as VARCHAR strings."""
+        self._convert(engine, to_codes=False)
+
+class DropRedundantIndexesMigration(AddIndexesMigration):
+    """Drop single-column indexes covered by a composite index's leading column."""
+    
+    DROP_SQL = tuple(f"DROP INDEX IF EXISTS ix_{table}_{column}" for table, column in REDUNDANT_INDEXES)
+    CREATE_SQL = tuple(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table}({column})"
+        for table, column in REDUNDANT_INDEXES
+    )
+    MYSQL_DROP_SQL = tuple(f"ALTER TABLE {table} DROP INDEX ix_{table}_{column}" for table, column in REDUNDANT_INDEXES)
+    MYSQL_CREATE_SQL = tuple(
+        f"ALTER TABLE {table} ADD INDEX ix_{table}_{column} ({column})" for table, column in REDUNDANT_INDEXES
+    )
+    
+    def __init__(self):
+        Migration.__init__(self, "008", "Drop redundant single-column indexes")
+    
+    def up(self, engine, metadata):
+        """Drop the covered single-column indexes."""
+        dialect = engine.dialect.name
+        if dialect == 'postgresql':
+            self._execute_autocommit(
+                engine, [sql.replace("DROP INDEX", "DROP INDEX CONCURRENTLY", 1) for sql in self.DROP_SQL],
+                "Index drop failed"
+            )
+        elif dialect == 'mysql':
+            self._execute_autocommit(engine, self.MYSQL_DROP_SQL, "Index drop failed (may not exist)")
+        else:
+            self._execute_each(engine, self.DROP_SQL, "Index drop failed")
+    
+    def down(self, engine, metadata):
+        """Recreate the single-column indexes."""
+        dialect = engine.dialect.name
+        failure_message = "Index creation failed (may already exist)"
+        if dialect == 'mysql':
+            self._execute_autocommit(engine, self.MYSQL_CREATE_SQL, failure_message)
+        else:
+            self._execute_each(engine, self.CREATE_SQL, failure_message)
+
+class AddVoteUniqueConstraintsMigration(AddIndexesMigration):
+    """Enforce one voter row per poll and one vote per user and option."""
+    
+    UNIQUE_INDEXES = (
+        ('uq_poll_user', 'voted_users', 'poll_id, user_id'),
+        ('uq_poll_user_option', 'user_votes', 'poll_id, user_id, option_id'),
+    )
+    
+    def __init__(self):
+        Migration.__init__(self, "009", "Add unique constraints on votes")
+    
+    def _missing(self, engine) -> List[tuple]:
+        """Unique indexes not already present as a constraint or index."""
+        inspector = inspect(engine)
+        missing = []
+        for name, table, columns in self.UNIQUE_INDEXES:
+            existing = {c['name'] for c in inspector.get_unique_constraints(table)}
+            existing.update(i['name'] for i in inspector.get_indexes(table))
+            if name not in existing:
+                missing.append((name, table, columns))
+        return missing
+    
+    def up(self, engine, metadata):
+        """Add the unique indexes; fails per index if duplicate rows exist."""
+        dialect = engine.dialect.name
+        failure_message = "Unique index creation failed (duplicate rows?)"
+        missing = self._missing(engine)
+        if dialect == 'postgresql':
+            statements = [f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}({columns})"
+                          for name, table, columns in missing]
+            self._execute_autocommit(engine, statements + ["DROP INDEX CONCURRENTLY IF EXISTS idx_poll_user"],
+                                     failure_message)
+        elif dialect == 'mysql':
+            statements = [f"ALTER TABLE {table} ADD UNIQUE INDEX {name} ({columns})"
+                          for name, table, columns in missing]
+            self._execute_autocommit(engine, statements + ["ALTER TABLE voted_users DROP INDEX idx_poll_user"],
+                                     failure_message)
+        else:
+            statements = [f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table}({columns})"
+                          for name, table, columns in missing]
+            self._execute_each(engine, statements + ["DROP INDEX IF EXISTS idx_poll_user"], failure_message)
+    
+    def down(self, engine, metadata):
+        """Restore the non-unique voter index and drop the unique indexes."""
+        dialect = engine.dialect.name
+        failure_message = "Index change failed"
+        if dialect == 'mysql':
+            statements = ["ALTER TABLE voted_users ADD INDEX idx_poll_user (poll_id, user_id)"]
+            statements += [f"ALTER TABLE {table} DROP INDEX {name}" for name, table, _ in self.UNIQUE_INDEXES]
+            self._execute_autocommit(engine, statements, failure_message)
+        else:
+            statements = ["CREATE INDEX IF NOT EXISTS idx_poll_user ON voted_users(poll_id, user_id)"]
+            statements += [f"DROP INDEX IF EXISTS {name}" for name, _, _ in self.UNIQUE_INDEXES]
+            self._execute_each(engine, statements, failure_message)
+
+class CascadePollForeignKeysMigration(Migration):
+    """Recreate foreign keys with the ON DELETE actions declared in the models."""
+    
+    ONDELETE_CLAUSE = r'\s+ON DELETE\s+(?:SET NULL|SET DEFAULT|NO ACTION|CASCADE|RESTRICT)'
+    
+    def __init__(self):
+        super().__init__("010", "Cascade poll deletes in the database")
+    
+    def _stale_foreign_keys(self, conn, apply_ondelete: bool) -> Dict[str, list]:
+        """Reflected FKs whose ON DELETE differs from the target, grouped by table."""
+        from models import Base
+        inspector = inspect(conn)
+        stale = {}
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            reflected = inspector.get_foreign_keys(table.name)
+            for fk in table.foreign_keys:
+                if not fk.ondelete:
+                    continue
+                wanted = fk.ondelete.upper() if apply_ondelete else None
+                for existing in reflected:
+                    if (existing['constrained_columns'] != [fk.parent.name]
+                            or existing['referred_table'] != fk.column.table.name):
+                        continue
+                    current = (existing.get('options') or {}).get('ondelete')
+                    if (current.upper() if current else None) != wanted:
+                        stale.setdefault(table.name, []).append(
+                            (existing['name'], fk.parent.name, fk.column.table.name, fk.column.name, wanted)
+                        )
+        return stale
+    
+    def _rebuild_sqlite_table(self, conn, table: str, foreign_keys: list):
+        """SQLite can't alter constraints: copy the table under edited DDL and swap it in."""
+        create_sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).scalar()
+        index_sql = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+        ).scalars().all()
+        
+        for _, column, referred_table, referred_column, ondelete in foreign_keys:
+            reference = (rf'(FOREIGN KEY\s*\(\s*"?{column}"?\s*\)\s*REFERENCES\s+"?{referred_table}"?'
+                         rf'\s*\(\s*"?{referred_column}"?\s*\))(?:{self.ONDELETE_CLAUSE})?')
+            suffix = f" ON DELETE {ondelete}" if ondelete else ""
+            create_sql = re.sub(reference, lambda match: match.group(1) + suffix, create_sql)
+        create_sql = re.sub(rf'^(CREATE TABLE\s+(?:IF NOT EXISTS\s+)?)"?{table}"?', rf'\1"{table}_new"', create_sql)
+        
+        conn.exec_driver_sql(create_sql)
+        conn.exec_driver_sql(f'INSERT INTO "{table}_new" SELECT * FROM "{table}"')
+        conn.exec_driver_sql(f'DROP TABLE "{table}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{table}_new" RENAME TO "{table}"')
+        for sql in index_sql:
+            conn.exec_driver_sql(sql)
+    
+    def _sync(self, engine, apply_ondelete: bool):
+        dialect = engine.dialect.name
+        with engine.connect() as conn:
+            if dialect == 'sqlite':
+                # Rebuilding tables with enforcement on would cascade the DROPs
+                foreign_keys_enabled = conn.exec_driver_sql("PRAGMA foreign_keys").scalar()
+                conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+                conn.commit()
+            try:
+                with conn.begin():
+                    for table, foreign_keys in self._stale_foreign_keys(conn, apply_ondelete).items():
+                        if dialect == 'sqlite':
+                            self._rebuild_sqlite_table(conn, table, foreign_keys)
+                            continue
+                        for name, column, referred_table, referred_column, ondelete in foreign_keys:
+                            drop = "DROP FOREIGN KEY" if dialect == 'mysql' else "DROP CONSTRAINT"
+                            conn.execute(text(f"ALTER TABLE {table} {drop} {name}"))
+                            conn.execute(text(
+                                f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) "
+                                f"REFERENCES {referred_table}({referred_column})"
+                                + (f" ON DELETE {ondelete}" if ondelete else "")
+                            ))
+            finally:
+                if dialect == 'sqlite' and foreign_keys_enabled:
+                    conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+                    conn.commit()
+    
+    def up(self, engine, metadata):
+        """Add ON DELETE CASCADE / SET NULL to the poll foreign keys."""
+        self._sync(engine, apply_ondelete=True)
+    
+    def down(self, engine, metadata):
+        """Restore the poll foreign keys without ON DELETE actions."""
+        self._sync(engine, apply_ondelete=False)
+
+class PartitionByMonthMigration(Migration):
+    """Range-partition the append-only notification and activity tables by month."""
+    
+    def __init__(self):
+        super().__init__("011", "Partition notifications and vote activity by month")
+    
+    def _rebuild(self, conn, table: str, column: str, partitioned: bool):
+        """Copy table into a (non-)partitioned twin and swap it in under the same name."""
+        from models import (Base, _month_start, create_monthly_partition,
+                            PARTITION_MONTHS_AHEAD)
+        model_table = Base.metadata.tables[table]
+        staging = f"{table}__rebuild"
+        sequence = conn.execute(text(f"SELECT pg_get_serial_sequence('{table}', 'id')")).scalar()
+    
+        if partitioned:
+            # The primary key of a partitioned table must include the partition key
+            conn.execute(text(
+                f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})"
+            ))
+            conn.execute(text(f"ALTER TABLE {staging} ADD PRIMARY KEY (id, {column})"))
+            conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {staging} DEFAULT"))
+            # Cover every month that already has rows so the copy lands outside DEFAULT
+            oldest = conn.execute(text(f"SELECT MIN({column}) FROM {table}")).scalar()
+            month = _month_start(oldest or datetime.now())
+            last = _month_start(datetime.now(), PARTITION_MONTHS_AHEAD)
+            while month <= last:
+                create_monthly_partition(conn, table, month, parent=staging)
+                month = _month_start(month, 1)
+        else:
+            conn.execute(text(f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)"))
+            conn.execute(text(f"ALTER TABLE {staging} ADD PRIMARY KEY (id)"))
+    
+        conn.execute(text(f"INSERT INTO {staging} SELECT * FROM {table}"))
+        for fk in model_table.foreign_keys:
+            conn.execute(text(
+                f"ALTER TABLE {staging} ADD FOREIGN KEY ({fk.parent.name}) "
+                f"REFERENCES {fk.column.table.name}({fk.column.name})"
+                + (f" ON DELETE {fk.ondelete}" if fk.ondelete else "")
+            ))
+    
+        # Keep the id sequence alive past the DROP and hand it to the new table
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+        conn.execute(text(f"DROP TABLE {table} CASCADE"))
+        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+        conn.execute(text(f"ALTER TABLE {table} RENAME CONSTRAINT {staging}_pkey TO {table}_pkey"))
+        if sequence:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    
+        # Indexes on a partitioned parent are created on each partition as well
+        for index in model_table.indexes:
+            index.create(conn, checkfirst=True)
+    
+    def _convert(self, engine, partitioned: bool):
+        from models import TIME_PARTITIONED_TABLES, partitioned_tables
+        if engine.dialect.name != 'postgresql':
+            logger.info("Declarative partitioning is PostgreSQL-only; skipping")
+            return
+        with engine.begin() as conn:
+            existing = partitioned_tables(conn)
+            inspector = inspect(conn)
+            for table, column in TIME_PARTITIONED_TABLES.items():
+                if not inspector.has_table(table) or (table in existing) == partitioned:
+                    continue
+                self._rebuild(conn, table, column, partitioned)
+    
+    def up(self, engine, metadata):
+        """Partition notifications by sent_at and vote_activity by date."""
+        self._convert(engine, partitioned=True)
+    
+    def down(self, engine, metadata):
+        """Merge the partitions back into plain tables."""
+        self._convert(engine, partitioned=False)
+
+class NaturalPrimaryKeysMigration(Migration):
+    """Key voter and cross-channel view rows by their natural key instead of a surrogate id."""
+    
+    NATURAL_KEYS = {
+        'voted_users': ('poll_id', 'user_id'),
+        'cross_channel_views': ('user_id', 'poll_id'),
+    }
+    # Unique constraints the new primary keys make redundant
+    SUPERSEDED_UNIQUE = {'voted_users': 'uq_poll_user'}
+    
+    def __init__(self):
+        super().__init__("012", "Use natural primary keys for voters and channel views")
+    
+    def _dedupe(self, conn, table: str, key: tuple):
+        """Keep only the newest row per natural key."""
+        dialect = conn.dialect.name
+        match = " AND ".join(f"a.{column} = b.{column}" for column in key)
+        if dialect == 'postgresql':
+            conn.execute(text(f"DELETE FROM {table} a USING {table} b WHERE {match} AND a.id < b.id"))
+        elif dialect == 'mysql':
+            conn.execute(text(f"DELETE a FROM {table} a JOIN {table} b ON {match} AND a.id < b.id"))
+        else:
+            conn.execute(text(
+                f"DELETE FROM {table} WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY {', '.join(key)})"
+            ))
+    
+    def _legacy_table(self, name: str) -> Table:
+        """The pre-012 shape of a model table: surrogate id plus the superseded unique constraint."""
+        from sqlalchemy import Index, UniqueConstraint
+        from models import Base
+        model_table = Base.metadata.tables[name]
+        legacy_metadata = MetaData()
+        # Foreign keys resolve against the referenced tables in the same MetaData
+        for fk in model_table.foreign_keys:
+            fk.column.table.to_metadata(legacy_metadata)
+        columns = []
+        for column in model_table.columns:
+            copy = column._copy()
+            copy.primary_key = False
+            copy.index = None
+            columns.append(copy)
+        args = [Column('id', Integer, primary_key=True, index=True), *columns]
+        args += [Index(index.name, *[c.name for c in index.columns], unique=index.unique)
+                 for index in model_table.indexes]
+        if name in self.SUPERSEDED_UNIQUE:
+            args.append(UniqueConstraint(*self.NATURAL_KEYS[name], name=self.SUPERSEDED_UNIQUE[name]))
+        return Table(name, legacy_metadata, *args)
+    
+    def _rebuild_sqlite_table(self, conn, target: Table):
+        """SQLite can't change a primary key: move the rows into a freshly created table."""
+        name = target.name
+        old_columns = {column['name'] for column in inspect(conn).get_columns(name)}
+        for index in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (name,)
+        ).scalars().all():
+            conn.exec_driver_sql(f'DROP INDEX "{index}"')
+        conn.exec_driver_sql(f'ALTER TABLE "{name}" RENAME TO "{name}__old"')
+        target.create(conn)
+        # A new surrogate id is filled in by SQLite's rowid
+        columns = ", ".join(column.name for column in target.columns if column.name in old_columns)
+        conn.exec_driver_sql(f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM "{name}__old"')
+        conn.exec_driver_sql(f'DROP TABLE "{name}__old"')
+    
+    def _drop_unique(self, conn, table: str, name: str):
+        inspector = inspect(conn)
+        if name in {c['name'] for c in inspector.get_unique_constraints(table)}:
+            conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {name}"))
+        elif name in {i['name'] for i in inspector.get_indexes(table)}:
+            conn.execute(text(f"DROP INDEX {name}"))
+    
+    def up(self, engine, metadata):
+        """Replace the surrogate id primary keys with the natural keys."""
+        from models import Base
+        dialect = engine.dialect.name
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            for table, key in self.NATURAL_KEYS.items():
+                if not inspector.has_table(table):
+                    continue
+                if 'id' not in {column['name'] for column in inspector.get_columns(table)}:
+                    continue
+                self._dedupe(conn, table, key)
+                if dialect == 'sqlite':
+                    self._rebuild_sqlite_table(conn, Base.metadata.tables[table])
+                elif dialect == 'mysql':
+                    unique = self.SUPERSEDED_UNIQUE.get(table)
+                    conn.execute(text(
+                        f"ALTER TABLE {table} DROP COLUMN id, ADD PRIMARY KEY ({', '.join(key)})"
+                        + (f", DROP INDEX {unique}" if unique else "")
+                    ))
+                else:
+                    conn.execute(text(f"ALTER TABLE {table} DROP COLUMN id"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY ({', '.join(key)})"))
+                    if table in self.SUPERSEDED_UNIQUE:
+                        self._drop_unique(conn, table, self.SUPERSEDED_UNIQUE[table])
+    
+    def down(self, engine, metadata):
+        """Restore the surrogate id primary keys."""
+        dialect = engine.dialect.name
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            for table, key in self.NATURAL_KEYS.items():
+                if not inspector.has_table(table):
+                    continue
+                if 'id' in {column['name'] for column in inspector.get_columns(table)}:
+                    continue
+                unique = self.SUPERSEDED_UNIQUE.get(table)
+                if dialect == 'sqlite':
+                    self._rebuild_sqlite_table(conn, self._legacy_table(table))
+                elif dialect == 'mysql':
+                    conn.execute(text(
+                        f"ALTER TABLE {table} DROP PRIMARY KEY, "
+                        f"ADD COLUMN id INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST, "
+                        f"ADD INDEX ix_{table}_id (id)"
+                        + (f", ADD UNIQUE INDEX {unique} ({', '.join(key)})" if unique else "")
+                    ))
+                else:
+                    pk_name = inspector.get_pk_constraint(table)['name']
+                    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {pk_name}"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN id SERIAL PRIMARY KEY"))
+                    conn.execute(text(f"CREATE INDEX ix_{table}_id ON {table}(id)"))
+                    if unique:
+                        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {unique} UNIQUE ({', '.join(key)})"))
+
+class ModelIndexesMigration(Migration):
+    """Build indexes declared on the models that no earlier migration creates."""
+    
+    # (table, index name) pairs looked up in the model metadata
+    INDEXES: tuple = ()
+    # (name, table, columns) of older indexes the model indexes replace
+    SUPERSEDED: tuple = ()
+    
+    def _model_indexes(self):
+        from models import Base
+        for table, name in self.INDEXES:
+            yield next(index for index in Base.metadata.tables[table].indexes if index.name == name)
+    
+    def _index_names(self, conn, table: str) -> set:
+        return {index['name'] for index in inspect(conn).get_indexes(table)}
+    
+    def _prepare(self, conn):
+        """Fix up existing rows before the indexes are built."""
+    
+    def up(self, engine, metadata):
+        """Create the model indexes and drop the ones they replace."""
+        with engine.begin() as conn:
+            self._prepare(conn)
+            # Renders each dialect's partial/INCLUDE/unique options from the model
+            for index in self._model_indexes():
+                index.create(conn, checkfirst=True)
+            for name, table, _ in self.SUPERSEDED:
+                if name in self._index_names(conn, table):
+                    conn.execute(text(f"DROP INDEX {name} ON {table}" if engine.dialect.name == 'mysql'
+                                      else f"DROP INDEX {name}"))
+    
+    def down(self, engine, metadata):
+        """Restore the replaced indexes and drop the model indexes."""
+        with engine.begin() as conn:
+            for name, table, columns in self.SUPERSEDED:
+                if name not in self._index_names(conn, table):
+                    conn.execute(text(f"CREATE INDEX {name} ON {table}({columns})"))
+            for index in self._model_indexes():
+                index.drop(conn, checkfirst=True)
+
+class VoteActivityUniqueBucketMigration(ModelIndexesMigration):
+    """One vote_activity row per poll, hour and day, as the vote hooks' upsert expects."""
+    
+    INDEXES = (('vote_activity', 'idx_vote_activity_poll_hour'),)
+    
+    def __init__(self):
+        super().__init__("013", "Add unique hourly vote activity index")
+    
+    def _prepare(self, conn):
+        """Merge duplicate buckets into their oldest row so the unique index can be built."""
+        duplicates = [dict(row) for row in conn.execute(text(
+            "SELECT MIN(id) AS id, poll_id, hour, date, SUM(vote_count) AS vote_count "
+            "FROM vote_activity GROUP BY poll_id, hour, date HAVING COUNT(*) > 1"
+        )).mappings()]
+        if not duplicates:
+            return
+        conn.execute(text("UPDATE vote_activity SET vote_count = :vote_count WHERE id = :id"), duplicates)
+        conn.execute(text(
+            "DELETE FROM vote_activity "
+            "WHERE poll_id = :poll_id AND hour = :hour AND date = :date AND id <> :id"
+        ), duplicates)
+        logger.info("Merged %d duplicate vote_activity buckets", len(duplicates))
+
+class CoveringVoteIndexMigration(ModelIndexesMigration):
+    """Replace the user_votes (poll_id, option_id) index with the covering one."""
+    
+    INDEXES = (('user_votes', 'idx_poll_option_user'),)
+    SUPERSEDED = (('idx_poll_option', 'user_votes', 'poll_id, option_id'),)
+    
+    def __init__(self):
+        super().__init__("014", "Make the user_votes poll/option index covering")
+
+class ActivePartialIndexesMigration(ModelIndexesMigration):
+    """Partial indexes over active polls and active shares."""
+    
+    INDEXES = (
+        ('polls', 'idx_poll_team_active'),
+        ('poll_shares', 'idx_share_poll_channel_active'),
+    )
+    
+    def __init__(self):
+        super().__init__("015", "Add partial indexes over active polls and shares")
+
+class JsonbPermissionsMigration(ModelIndexesMigration):
+    """Store user_roles.permissions as JSONB with a GIN index on PostgreSQL."""
+    
+    INDEXES = (('user_roles', 'idx_user_role_perms'),)
+    
+    def __init__(self):
+        super().__init__("016", "Store role permissions as JSONB")
+    
+    def _permissions_type(self, conn) -> str:
+        column = next(c for c in inspect(conn).get_columns('user_roles') if c['name'] == 'permissions')
+        return str(column['type']).upper()
+    
+    def _prepare(self, conn):
+        """Convert the TEXT column in place; other backends keep JSON in the same storage."""
+        if conn.dialect.name == 'postgresql' and self._permissions_type(conn) != 'JSONB':
+            conn.execute(text(
+                "ALTER TABLE user_roles ALTER COLUMN permissions TYPE JSONB "
+                "USING NULLIF(permissions, '')::jsonb"
+            ))
+    
+    def down(self, engine, metadata):
+        """Drop the GIN index and return the column to TEXT."""
+        super().down(engine, metadata)
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql' and self._permissions_type(conn) == 'JSONB':
+                conn.execute(text(
+                    "ALTER TABLE user_roles ALTER COLUMN permissions TYPE TEXT USING permissions::text"
+                ))
+
+class NotificationFanoutIndexMigration(ModelIndexesMigration):
+    """Index notification_settings for the poll_created fan-out SELECT."""
+    
+    INDEXES = (('notification_settings', 'idx_notif_team_type_enabled'),)
+    # Its leading team_id column serves the old single-column lookups
+    SUPERSEDED = (('ix_notification_settings_team_id', 'notification_settings', 'team_id'),)
+    
+    def __init__(self):
+        super().__init__("017", "Add notification fan-out index")
+
+class ScheduledPollEpochMigration(ModelIndexesMigration):
+    """Add scheduled_polls.next_run_epoch and index active schedules by it."""
+    
+    INDEXES = (('scheduled_polls', 'idx_sched_next_active'),)
+    SUPERSEDED = (('idx_scheduled_active_time', 'scheduled_polls', 'is_active, scheduled_time'),)
+    
+    def __init__(self):
+        super().__init__("018", "Add integer next-run time to scheduled polls")
+    
+    def _has_epoch(self, conn) -> bool:
+        return 'next_run_epoch' in {c['name'] for c in inspect(conn).get_columns('scheduled_polls')}
+    
+    def _prepare(self, conn):
+        """Add the column and backfill it from next_run."""
+        if not self._has_epoch(conn):
+            conn.execute(text("ALTER TABLE scheduled_polls ADD COLUMN next_run_epoch BIGINT"))
+        # Converted in Python so the values match the model's flush hook
+        # (naive local times), which SQL epoch functions would read as UTC
+        due = text("SELECT id, next_run FROM scheduled_polls WHERE next_run IS NOT NULL")
+        rows = [
+            {'id': row.id, 'epoch': int(row.next_run.timestamp())}
+            for row in conn.execute(due.columns(next_run=DateTime))
+        ]
+        if rows:
+            conn.execute(text("UPDATE scheduled_polls SET next_run_epoch = :epoch WHERE id = :id"), rows)
+    
+    def down(self, engine, metadata):
+        """Restore the old schedule index and drop the epoch column."""
+        super().down(engine, metadata)
+        with engine.begin() as conn:
+            if self._has_epoch(conn):
+                conn.execute(text("ALTER TABLE scheduled_polls DROP COLUMN next_run_epoch"))
 
 # Migration registry
 def get_migration_manager() -> MigrationManager:
@@ -422,6 +1324,19 @@ def get_migration_manager() -> MigrationManager:
     manager.register_migration(AddAnalyticsTablesMigration())
     manager.register_migration(AddNotificationSystemMigration())
     manager.register_migration(AddCrossChannelSharingMigration())
+    manager.register_migration(AddPollSummaryMigration())
+    manager.register_migration(EnumCodeColumnsMigration())
+    manager.register_migration(DropRedundantIndexesMigration())
+    manager.register_migration(AddVoteUniqueConstraintsMigration())
+    manager.register_migration(CascadePollForeignKeysMigration())
+    manager.register_migration(PartitionByMonthMigration())
+    manager.register_migration(NaturalPrimaryKeysMigration())
+    manager.register_migration(VoteActivityUniqueBucketMigration())
+    manager.register_migration(CoveringVoteIndexMigration())
+    manager.register_migration(ActivePartialIndexesMigration())
+    manager.register_migration(JsonbPermissionsMigration())
+    manager.register_migration(NotificationFanoutIndexMigration())
+    manager.register_migration(ScheduledPollEpochMigration())
     
     return manager
 
@@ -455,7 +1370,13 @@ def main():
         return
     
     manager = get_migration_manager()
-    
+    try:
+        run_command(manager, args)
+    finally:
+        manager.close()
+
+def run_command(manager: MigrationManager, args):
+    """Run a parsed CLI command against the migration manager."""
     if args.command == 'status':
         status = manager.get_migration_status()
         print(f"Applied migrations: {status['applied_count']}")
@@ -466,6 +1387,11 @@ def main():
             print("\nPending migrations:")
             for version in status['pending_migrations']:
                 print(f"  {version}")
+        
+        if status['checksum_mismatches']:
+            print("\nChanged since applied:")
+            for version in status['checksum_mismatches']:
+                print(f"  {version}")
     
     elif args.command == 'migrate':
         success = manager.migrate_up(args.target)
@@ -487,7 +1413,7 @@ def main():
         # Generate next version number
         applied = manager.get_applied_migrations()
         if applied:
-            last_version = max(applied)
+            last_version = max(applied, key=int)
             next_version = f"{int(last_version) + 1:03d}"
         else:
             next_version = "001"
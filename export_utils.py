@@ -4,18 +4,99 @@ Handles exporting poll results to various formats (CSV, JSON, Excel).
 """
 
 import csv
+import functools
 import json
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional, IO
-from io import StringIO, BytesIO
+from typing import Dict, List, Any, Optional, IO, Iterable, Iterator, Mapping
+from io import BytesIO, TextIOWrapper
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
-from models import Poll, PollOption, UserVote, VotedUser, SessionLocal
-from performance import OptimizedQueries
+from models import Poll, PollOption, UserVote, VotedUser, SessionLocal, PollStatusCode, VoteTypeCode
+from performance import OptimizedQueries, register_poll_invalidation_hook
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the stdlib encoder
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Export formats in display order
+EXPORT_FORMATS = ('csv', 'json', 'excel')
+
+# Exports are blocking (DB + CPU); async handlers run them here instead of on the event loop
+EXPORT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix='export')
+
+def _code_label_sql(column: str, codes) -> str:
+    """SQL CASE mapping a SMALLINT enum code column back to its label."""
+    whens = ' '.join(f"WHEN {code.value} THEN '{code.name.lower()}'" for code in codes)
+    return f"CASE {column} {whens} END"
+
+@functools.lru_cache(maxsize=None)
+def _bold_font(size: Optional[int] = None):
+    """Shared bold Font per size, so header cells reuse one style object."""
+    from openpyxl.styles import Font
+    return Font(bold=True, size=size)
+
+class RawJSON(Mapping):
+    """A JSON object kept in its encoded form.
+    
+    JSON exports splice the bytes into the output unchanged; other writers
+    read it as a mapping, which decodes it on first access.
+    """
+    
+    __slots__ = ('encoded', '_decoded')
+    
+    def __init__(self, encoded: bytes):
+        self.encoded = encoded
+        self._decoded = None
+    
+    def _data(self) -> Dict[str, Any]:
+        if self._decoded is None:
+            self._decoded = json.loads(self.encoded)
+        return self._decoded
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._data()[key]
+    
+    def __iter__(self):
+        return iter(self._data())
+    
+    def __len__(self) -> int:
+        return len(self._data())
+    
+    def __bool__(self) -> bool:
+        return self.encoded != b'{}'
+
+def _isoformat(value: Any) -> Any:
+    """ISO-format datetimes at write time; pass other values through."""
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _json_default(value: Any) -> Any:
+    """Fallback for types the JSON encoder does not handle natively."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, RawJSON):
+        return orjson.Fragment(value.encoded) if orjson is not None else value._data()
+    return str(value)
+
+def _json_bytes(data: Any, indent: bool = False) -> bytes:
+    """Encode data as UTF-8 JSON, using orjson's SIMD string scanner when available.
+    
+    Datetimes are left in the data and encoded by orjson in C (or by
+    _json_default with the stdlib encoder) instead of being pre-converted.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False, default=_json_default).encode('utf-8')
+
 @dataclass
 class ExportOptions:
     """Export configuration options."""
@@ -25,12 +106,20 @@ class ExportOptions:
     include_metadata: bool = True
     group_by_option: bool = False
     anonymize_data: bool = True
+    stream: bool = False  # Multi-poll JSON as JSON Lines, one poll per line
+    pretty_print: bool = False  # Indent JSON output for human reading
 
 class PollExporter:
     """Handles poll data export to various formats."""
     
+    # Export data for ended polls is immutable, so repeat exports are served from memory
+    EXPORT_CACHE_SIZE = 512
+    EXPORT_CACHE_TTL = 1800  # seconds
+    
     def __init__(self):
-        self.supported_formats = ['csv', 'json', 'excel']
+        self.supported_formats = frozenset(EXPORT_FORMATS)
+        self._export_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._export_cache_lock = threading.Lock()
     
     def export_poll(self, poll_id: int, format_type: str, options: ExportOptions = None) -> Optional[bytes]:
         """Export a single poll to specified format."""
@@ -42,7 +131,8 @@ class PollExporter:
         
         try:
             # Get poll data
-            poll_data = self._get_poll_export_data(poll_id, options)
+            with SessionLocal() as db:
+                poll_data = self._get_poll_export_data(db, poll_id, options)
             if not poll_data:
                 logger.error(f"No data found for poll {poll_id}")
                 return None
@@ -68,12 +158,17 @@ class PollExporter:
         options = options or ExportOptions()
         
         try:
-            # Get data for all polls
+            # Get data for all polls using one session
             all_poll_data = []
-            for poll_id in poll_ids:
-                poll_data = self._get_poll_export_data(poll_id, options)
-                if poll_data:
-                    all_poll_data.append(poll_data)
+            with SessionLocal() as db:
+                if format_type == 'csv' and db.get_bind().dialect.name == 'postgresql':
+                    # PostgreSQL renders the CSV server-side; no per-row Python work
+                    return self._export_multiple_to_csv_copy(db, poll_ids, options)
+                
+                for poll_id in poll_ids:
+                    poll_data = self._get_poll_export_data(db, poll_id, options)
+                    if poll_data:
+                        all_poll_data.append(poll_data)
             
             if not all_poll_data:
                 logger.error("No data found for any of the specified polls")
@@ -83,6 +178,8 @@ class PollExporter:
             if format_type == 'csv':
                 return self._export_multiple_to_csv(all_poll_data, options)
             elif format_type == 'json':
+                if options.stream:
+                    return b''.join(self._export_multiple_to_json_stream(all_poll_data, options))
                 return self._export_multiple_to_json(all_poll_data, options)
             elif format_type == 'excel':
                 return self._export_multiple_to_excel(all_poll_data, options)
@@ -91,42 +188,64 @@ class PollExporter:
             logger.error(f"Error exporting multiple polls: {e}")
             return None
     
-    def _get_poll_export_data(self, poll_id: int, options: ExportOptions) -> Optional[Dict[str, Any]]:
-        """Get poll data for export."""
+    def export_multiple_polls_stream(self, poll_ids: List[int], options: ExportOptions = None) -> Iterator[bytes]:
+        """Stream multiple polls as JSON Lines, loading one poll at a time."""
+        options = options or ExportOptions(stream=True)
+        
+        with SessionLocal() as db:
+            polls = (self._get_poll_export_data(db, poll_id, options) for poll_id in poll_ids)
+            yield from self._export_multiple_to_json_stream(
+                (poll_data for poll_data in polls if poll_data), options
+            )
+    
+    def _get_poll_export_data(self, db: Session, poll_id: int, options: ExportOptions) -> Optional[Dict[str, Any]]:
+        """Get poll data for export using the caller's session."""
+        cache_key = (
+            poll_id,
+            options.include_voter_ids,
+            options.include_timestamps,
+            options.include_analytics,
+            options.include_metadata,
+            options.anonymize_data
+        )
+        cached = self._get_cached_export(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            db = SessionLocal()
-            
             # Get poll with details
             poll = OptimizedQueries.get_poll_with_details(db, poll_id)
             if not poll:
                 return None
             
+            # Read option flags once rather than per row
+            anonymize = options.anonymize_data
+            include_timestamps = options.include_timestamps
+            
             # Get analytics if requested
             analytics = None
             if options.include_analytics:
-                analytics = OptimizedQueries.get_poll_analytics(db, poll_id)
+                # Cached analytics come back as JSON text; keep it encoded for JSON output
+                analytics = OptimizedQueries.get_poll_analytics(db, poll_id, raw=True)
+                if isinstance(analytics, str):
+                    analytics = RawJSON(analytics.encode('utf-8'))
             
-            # Get votes data
+            # Individual votes are only exported for admins, never when anonymizing;
+            # otherwise 'votes' holds per-option counts (built below from 'options')
             votes_data = []
-            if options.include_voter_ids and not options.anonymize_data:
+            export_votes = options.include_voter_ids and not anonymize
+            if export_votes:
                 # Include voter information (admin only)
                 votes = db.query(UserVote).filter(UserVote.poll_id == poll_id).all()
+                option_text_by_id = {option.id: option.text for option in poll.options}
                 for vote in votes:
                     vote_data = {
                         'option_id': vote.option_id,
-                        'user_id': vote.user_id if not options.anonymize_data else f"User_{hash(vote.user_id) % 10000}",
-                        'voted_at': vote.voted_at.isoformat() if options.include_timestamps and vote.voted_at else None
+                        'option_text': option_text_by_id.get(vote.option_id, ''),
+                        'user_id': vote.user_id,
+                        'voted_at': vote.voted_at if include_timestamps else None
                     }
                     votes_data.append(vote_data)
-            else:
-                # Anonymous vote counts only
-                for option in poll.options:
-                    votes_data.append({
-                        'option_id': option.id,
-                        'option_text': option.text,
-                        'vote_count': option.vote_count,
-                        'order_index': option.order_index
-                    })
             
             # Build export data
             export_data = {
@@ -145,15 +264,26 @@ class PollExporter:
                 ],
                 'votes': votes_data
             }
+            if not export_votes:
+                # Anonymous vote counts
+                votes_data.extend(
+                    {
+                        'option_id': option['id'],
+                        'option_text': option['text'],
+                        'vote_count': option['vote_count'],
+                        'order_index': option['order_index']
+                    }
+                    for option in export_data['options']
+                )
             
             # Add metadata if requested
             if options.include_metadata:
                 export_data['metadata'] = {
                     'team_id': poll.team_id,
                     'channel_id': poll.channel_id,
-                    'creator_id': poll.creator_id if not options.anonymize_data else "Anonymous",
-                    'created_at': poll.created_at.isoformat() if options.include_timestamps else None,
-                    'ended_at': poll.ended_at.isoformat() if poll.ended_at and options.include_timestamps else None,
+                    'creator_id': poll.creator_id if not anonymize else "Anonymous",
+                    'created_at': poll.created_at if include_timestamps else None,
+                    'ended_at': poll.ended_at if include_timestamps else None,
                     'message_ts': poll.message_ts
                 }
             
@@ -161,93 +291,124 @@ class PollExporter:
             if options.include_analytics and analytics:
                 export_data['analytics'] = analytics
             
+            if poll.status == 'ended':
+                self._cache_export(cache_key, export_data)
+            
             return export_data
         
         except Exception as e:
             logger.error(f"Error getting poll export data: {e}")
             return None
-        
-        finally:
-            db.close()
+    
+    def _get_cached_export(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        """Return cached export data if present and not expired."""
+        with self._export_cache_lock:
+            entry = self._export_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            expires_at, export_data = entry
+            if expires_at < time.monotonic():
+                del self._export_cache[cache_key]
+                return None
+            
+            self._export_cache.move_to_end(cache_key)
+            return export_data
+    
+    def _cache_export(self, cache_key: tuple, export_data: Dict[str, Any]) -> None:
+        """Cache export data, evicting the least recently used entry when full."""
+        with self._export_cache_lock:
+            self._export_cache[cache_key] = (time.monotonic() + self.EXPORT_CACHE_TTL, export_data)
+            self._export_cache.move_to_end(cache_key)
+            if len(self._export_cache) > self.EXPORT_CACHE_SIZE:
+                self._export_cache.popitem(last=False)
+    
+    def evict_poll(self, poll_id: int) -> None:
+        """Drop every cached export of a poll (after it is deleted or edited)."""
+        with self._export_cache_lock:
+            for cache_key in [key for key in self._export_cache if key[0] == poll_id]:
+                del self._export_cache[cache_key]
     
     def _export_to_csv(self, poll_data: Dict[str, Any], options: ExportOptions) -> bytes:
         """Export poll data to CSV format."""
-        output = StringIO()
+        # Write straight into a UTF-8 byte buffer (no str copy + encode pass)
+        output = BytesIO()
+        stream = TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+        
+        # Read option flags and per-poll columns once rather than per row
+        include_metadata = options.include_metadata
+        include_timestamps = options.include_timestamps
+        include_voter_ids = options.include_voter_ids and not options.anonymize_data
+        poll_id = poll_data['poll_id']
+        question = poll_data['question']
         
         if options.group_by_option:
             # Group votes by option
-            writer = csv.writer(output)
+            writer = csv.writer(stream)
             
             # Header
             headers = ['Poll ID', 'Question', 'Option', 'Vote Count']
-            if options.include_metadata:
+            if include_metadata:
                 headers.extend(['Team ID', 'Channel ID', 'Creator', 'Created At'])
             writer.writerow(headers)
             
             # Data rows
-            for option in poll_data['options']:
-                row = [
-                    poll_data['poll_id'],
-                    poll_data['question'],
-                    option['text'],
-                    option['vote_count']
-                ]
-                
-                if options.include_metadata:
-                    metadata = poll_data.get('metadata', {})
-                    row.extend([
-                        metadata.get('team_id', ''),
-                        metadata.get('channel_id', ''),
-                        metadata.get('creator_id', ''),
-                        metadata.get('created_at', '')
-                    ])
-                
-                writer.writerow(row)
+            tail = ()
+            if include_metadata:
+                metadata = poll_data.get('metadata', {})
+                tail = (
+                    metadata.get('team_id', ''),
+                    metadata.get('channel_id', ''),
+                    metadata.get('creator_id', ''),
+                    _isoformat(metadata.get('created_at', ''))
+                )
+            writer.writerows(
+                (poll_id, question, option['text'], option['vote_count'], *tail)
+                for option in poll_data['options']
+            )
         
         else:
             # Individual votes (if available)
-            writer = csv.writer(output)
+            writer = csv.writer(stream)
             
             # Header
             headers = ['Poll ID', 'Question', 'Option ID', 'Option Text']
-            if options.include_voter_ids and not options.anonymize_data:
+            if include_voter_ids:
                 headers.append('User ID')
-            if options.include_timestamps:
+            if include_timestamps:
                 headers.append('Voted At')
             writer.writerow(headers)
             
             # Data rows
-            for vote in poll_data['votes']:
-                if 'option_text' in vote:  # Anonymous vote counts
+            if not include_voter_ids:  # Anonymous vote counts
+                writer.writerows(
+                    (poll_id, question, option['id'], option['text'])
+                    for option in poll_data['options']
+                )
+            else:  # Individual votes
+                for vote in poll_data['votes']:
                     row = [
-                        poll_data['poll_id'],
-                        poll_data['question'],
+                        poll_id,
+                        question,
                         vote['option_id'],
                         vote['option_text']
                     ]
-                else:  # Individual votes
-                    option = next((opt for opt in poll_data['options'] if opt['id'] == vote['option_id']), {})
-                    row = [
-                        poll_data['poll_id'],
-                        poll_data['question'],
-                        vote['option_id'],
-                        option.get('text', '')
-                    ]
                     
-                    if options.include_voter_ids and not options.anonymize_data:
+                    if include_voter_ids:
                         row.append(vote.get('user_id', ''))
-                    if options.include_timestamps:
-                        row.append(vote.get('voted_at', ''))
-                
-                writer.writerow(row)
+                    if include_timestamps:
+                        row.append(_isoformat(vote.get('voted_at', '')))
+                    
+                    writer.writerow(row)
         
-        return output.getvalue().encode('utf-8')
+        stream.flush()
+        return output.getvalue()
     
     def _export_to_json(self, poll_data: Dict[str, Any], options: ExportOptions) -> bytes:
         """Export poll data to JSON format."""
         # Add export metadata
         export_data = {
-            'exported_at': datetime.now().isoformat(),
+            'exported_at': datetime.now(),
             'export_options': {
                 'include_voter_ids': options.include_voter_ids,
                 'include_timestamps': options.include_timestamps,
@@ -258,13 +419,12 @@ class PollExporter:
             'poll_data': poll_data
         }
         
-        return json.dumps(export_data, indent=2, ensure_ascii=False).encode('utf-8')
+        return _json_bytes(export_data, indent=options.pretty_print)
     
     def _export_to_excel(self, poll_data: Dict[str, Any], options: ExportOptions) -> bytes:
         """Export poll data to Excel format."""
         try:
             import openpyxl
-            from openpyxl.styles import Font, PatternFill
             
             workbook = openpyxl.Workbook()
             
@@ -274,7 +434,7 @@ class PollExporter:
             
             # Headers
             summary_sheet['A1'] = "Poll Summary"
-            summary_sheet['A1'].font = Font(bold=True, size=14)
+            summary_sheet['A1'].font = _bold_font(14)
             
             # Poll info
             row = 3
@@ -297,8 +457,8 @@ class PollExporter:
             # Options and results
             summary_sheet[f'A{row}'] = "Option"
             summary_sheet[f'B{row}'] = "Vote Count"
-            summary_sheet[f'A{row}'].font = Font(bold=True)
-            summary_sheet[f'B{row}'].font = Font(bold=True)
+            summary_sheet[f'A{row}'].font = _bold_font()
+            summary_sheet[f'B{row}'].font = _bold_font()
             row += 1
             
             for option in poll_data['options']:
@@ -312,12 +472,12 @@ class PollExporter:
                 metadata = poll_data['metadata']
                 
                 metadata_sheet['A1'] = "Metadata"
-                metadata_sheet['A1'].font = Font(bold=True, size=14)
+                metadata_sheet['A1'].font = _bold_font(14)
                 
                 row = 3
                 for key, value in metadata.items():
                     metadata_sheet[f'A{row}'] = key.replace('_', ' ').title()
-                    metadata_sheet[f'B{row}'] = str(value) if value else ''
+                    metadata_sheet[f'B{row}'] = str(_isoformat(value)) if value else ''
                     row += 1
             
             # Add analytics sheet if requested
@@ -326,7 +486,7 @@ class PollExporter:
                 analytics = poll_data['analytics']
                 
                 analytics_sheet['A1'] = "Analytics"
-                analytics_sheet['A1'].font = Font(bold=True, size=14)
+                analytics_sheet['A1'].font = _bold_font(14)
                 
                 row = 3
                 for key, value in analytics.items():
@@ -349,44 +509,80 @@ class PollExporter:
     
     def _export_multiple_to_csv(self, all_poll_data: List[Dict[str, Any]], options: ExportOptions) -> bytes:
         """Export multiple polls to CSV format."""
-        output = StringIO()
-        writer = csv.writer(output)
+        output = BytesIO()
+        stream = TextIOWrapper(output, encoding='utf-8', newline='', write_through=True)
+        writer = csv.writer(stream)
+        include_metadata = options.include_metadata
         
         # Header
         headers = ['Poll ID', 'Question', 'Option', 'Vote Count', 'Vote Type', 'Status']
-        if options.include_metadata:
+        if include_metadata:
             headers.extend(['Team ID', 'Channel ID', 'Creator', 'Created At'])
         writer.writerow(headers)
         
-        # Data rows for all polls
-        for poll_data in all_poll_data:
-            for option in poll_data['options']:
-                row = [
-                    poll_data['poll_id'],
-                    poll_data['question'],
-                    option['text'],
-                    option['vote_count'],
-                    poll_data['vote_type'],
-                    poll_data['status']
-                ]
-                
-                if options.include_metadata:
+        # Data rows for all polls, fed to the writer in one writerows() call
+        def rows():
+            for poll_data in all_poll_data:
+                head = (poll_data['poll_id'], poll_data['question'])
+                tail = (poll_data['vote_type'], poll_data['status'])
+                if include_metadata:
                     metadata = poll_data.get('metadata', {})
-                    row.extend([
+                    tail += (
                         metadata.get('team_id', ''),
                         metadata.get('channel_id', ''),
                         metadata.get('creator_id', ''),
-                        metadata.get('created_at', '')
-                    ])
-                
-                writer.writerow(row)
+                        _isoformat(metadata.get('created_at', ''))
+                    )
+                for option in poll_data['options']:
+                    yield (*head, option['text'], option['vote_count'], *tail)
+        
+        writer.writerows(rows())
         
-        return output.getvalue().encode('utf-8')
+        stream.flush()
+        return output.getvalue()
+    
+    def _export_multiple_to_csv_copy(self, db: Session, poll_ids: List[int], options: ExportOptions) -> Optional[bytes]:
+        """Export multiple polls to CSV with PostgreSQL COPY (same columns as _export_multiple_to_csv)."""
+        columns = [
+            'p.id AS "Poll ID"',
+            'p.question AS "Question"',
+            'o.text AS "Option"',
+            'o.vote_count AS "Vote Count"',
+            _code_label_sql('p.vote_type', VoteTypeCode) + ' AS "Vote Type"',
+            _code_label_sql('p.status', PollStatusCode) + ' AS "Status"'
+        ]
+        if options.include_metadata:
+            columns.extend([
+                'p.team_id AS "Team ID"',
+                'p.channel_id AS "Channel ID"',
+                ("'Anonymous'" if options.anonymize_data else 'p.creator_id') + ' AS "Creator"',
+                ("""to_char(p.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US')""" if options.include_timestamps else 'NULL') + ' AS "Created At"'
+            ])
+        
+        cursor = db.connection().connection.cursor()
+        try:
+            query = cursor.mogrify(
+                f"SELECT {', '.join(columns)} FROM polls p JOIN poll_options o ON o.poll_id = p.id "
+                "WHERE p.id = ANY(%s) ORDER BY p.id, o.order_index",
+                (list(poll_ids),)
+            ).decode('utf-8')
+            
+            output = BytesIO()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", output)
+        finally:
+            cursor.close()
+        
+        csv_bytes = output.getvalue()
+        if csv_bytes.count(b'\n') <= 1:  # Header only
+            logger.error("No data found for any of the specified polls")
+            return None
+        
+        return csv_bytes
     
     def _export_multiple_to_json(self, all_poll_data: List[Dict[str, Any]], options: ExportOptions) -> bytes:
         """Export multiple polls to JSON format."""
         export_data = {
-            'exported_at': datetime.now().isoformat(),
+            'exported_at': datetime.now(),
             'export_options': {
                 'include_voter_ids': options.include_voter_ids,
                 'include_timestamps': options.include_timestamps,
@@ -398,62 +594,71 @@ class PollExporter:
             'polls_data': all_poll_data
         }
         
-        return json.dumps(export_data, indent=2, ensure_ascii=False).encode('utf-8')
+        return _json_bytes(export_data, indent=options.pretty_print)
+    
+    def _export_multiple_to_json_stream(self, all_poll_data: Iterable[Dict[str, Any]], options: ExportOptions) -> Iterator[bytes]:
+        """Export multiple polls as JSON Lines: a header line, then one line per poll."""
+        header = {
+            'exported_at': datetime.now(),
+            'export_options': {
+                'include_voter_ids': options.include_voter_ids,
+                'include_timestamps': options.include_timestamps,
+                'include_analytics': options.include_analytics,
+                'include_metadata': options.include_metadata,
+                'anonymize_data': options.anonymize_data
+            }
+        }
+        yield _json_bytes(header) + b'\n'
+        
+        for poll_data in all_poll_data:
+            yield _json_bytes(poll_data) + b'\n'
     
     def _export_multiple_to_excel(self, all_poll_data: List[Dict[str, Any]], options: ExportOptions) -> bytes:
         """Export multiple polls to Excel format."""
         try:
             import openpyxl
-            from openpyxl.styles import Font
+            from openpyxl.cell import WriteOnlyCell
             
-            workbook = openpyxl.Workbook()
+            # Write-only workbooks stream rows to the file instead of keeping a cell grid per sheet
+            workbook = openpyxl.Workbook(write_only=True)
+            
+            def bold(sheet, value, font):
+                cell = WriteOnlyCell(sheet, value=value)
+                cell.font = font
+                return cell
             
             # Summary sheet with all polls
-            summary_sheet = workbook.active
-            summary_sheet.title = "All Polls Summary"
+            summary_sheet = workbook.create_sheet("All Polls Summary")
             
             # Headers
-            summary_sheet['A1'] = "All Polls Summary"
-            summary_sheet['A1'].font = Font(bold=True, size=14)
+            summary_sheet.append([bold(summary_sheet, "All Polls Summary", _bold_font(14))])
+            summary_sheet.append([])
             
             # Column headers
-            row = 3
             headers = ['Poll ID', 'Question', 'Option', 'Vote Count', 'Vote Type', 'Status']
-            for col, header in enumerate(headers, 1):
-                summary_sheet.cell(row=row, column=col, value=header).font = Font(bold=True)
-            row += 1
+            summary_sheet.append([bold(summary_sheet, header, _bold_font()) for header in headers])
             
             # Data for all polls
             for poll_data in all_poll_data:
+                poll_id = poll_data['poll_id']
+                question = poll_data['question']
+                vote_type = poll_data['vote_type']
+                status = poll_data['status']
                 for option in poll_data['options']:
-                    summary_sheet.cell(row=row, column=1, value=poll_data['poll_id'])
-                    summary_sheet.cell(row=row, column=2, value=poll_data['question'])
-                    summary_sheet.cell(row=row, column=3, value=option['text'])
-                    summary_sheet.cell(row=row, column=4, value=option['vote_count'])
-                    summary_sheet.cell(row=row, column=5, value=poll_data['vote_type'])
-                    summary_sheet.cell(row=row, column=6, value=poll_data['status'])
-                    row += 1
+                    summary_sheet.append((poll_id, question, option['text'], option['vote_count'], vote_type, status))
             
             # Create individual sheets for each poll
             for poll_data in all_poll_data:
                 sheet_name = f"Poll_{poll_data['poll_id']}"
                 poll_sheet = workbook.create_sheet(sheet_name)
                 
-                poll_sheet['A1'] = f"Poll {poll_data['poll_id']}: {poll_data['question']}"
-                poll_sheet['A1'].font = Font(bold=True, size=12)
+                poll_sheet.append([bold(poll_sheet, f"Poll {poll_data['poll_id']}: {poll_data['question']}", _bold_font(12))])
+                poll_sheet.append([])
                 
                 # Options
-                row = 3
-                poll_sheet['A3'] = "Option"
-                poll_sheet['B3'] = "Vote Count"
-                poll_sheet['A3'].font = Font(bold=True)
-                poll_sheet['B3'].font = Font(bold=True)
-                row += 1
-                
+                poll_sheet.append([bold(poll_sheet, "Option", _bold_font()), bold(poll_sheet, "Vote Count", _bold_font())])
                 for option in poll_data['options']:
-                    poll_sheet.cell(row=row, column=1, value=option['text'])
-                    poll_sheet.cell(row=row, column=2, value=option['vote_count'])
-                    row += 1
+                    poll_sheet.append((option['text'], option['vote_count']))
             
             # Save to bytes
             output = BytesIO()
@@ -469,27 +674,47 @@ class PollExporter:
 
 # Global exporter instance
 poll_exporter = PollExporter()
+# Deleted or edited polls drop their cached exports along with the other poll caches
+register_poll_invalidation_hook(poll_exporter.evict_poll)
 
 # Utility functions
 def export_poll_data(poll_id: int, format_type: str, include_voter_ids: bool = False, 
-                    include_analytics: bool = True, anonymize: bool = True) -> Optional[bytes]:
+                    include_analytics: bool = True, anonymize: bool = True,
+                    pretty_print: bool = False) -> Optional[bytes]:
     """Export a single poll."""
     options = ExportOptions(
         include_voter_ids=include_voter_ids,
         include_analytics=include_analytics,
-        anonymize_data=anonymize
+        anonymize_data=anonymize,
+        pretty_print=pretty_print
     )
     return poll_exporter.export_poll(poll_id, format_type, options)
 
 def export_multiple_polls_data(poll_ids: List[int], format_type: str, include_analytics: bool = True, 
-                              anonymize: bool = True) -> Optional[bytes]:
+                              anonymize: bool = True, pretty_print: bool = False) -> Optional[bytes]:
     """Export multiple polls."""
     options = ExportOptions(
         include_analytics=include_analytics,
-        anonymize_data=anonymize
+        anonymize_data=anonymize,
+        pretty_print=pretty_print
     )
     return poll_exporter.export_multiple_polls(poll_ids, format_type, options)
 
+def stream_multiple_polls_data(poll_ids: List[int], include_analytics: bool = True,
+                               anonymize: bool = True) -> Iterator[bytes]:
+    """Stream multiple polls as JSON Lines."""
+    options = ExportOptions(
+        include_analytics=include_analytics,
+        anonymize_data=anonymize,
+        stream=True
+    )
+    return poll_exporter.export_multiple_polls_stream(poll_ids, options)
+
+@functools.lru_cache(maxsize=1)
+def _supported_formats() -> tuple:
+    """Supported formats in display order, computed once."""
+    return tuple(fmt for fmt in EXPORT_FORMATS if fmt in poll_exporter.supported_formats)
+
 def get_supported_export_formats() -> List[str]:
     """Get list of supported export formats."""
-    return poll_exporter.supported_formats
\ No newline at end of file
+    return list(_supported_formats())
\ No newline at end of file
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from fastapi.staticfiles import StaticFiles
 from slack_bolt import App
 from slack_bolt.adapter.fastapi import SlackRequestHandler
@@ -11,8 +11,10 @@ spec.loader.exec_module(database_module)
 init_database = database_module.init_database
 from slack_handlers import register_handlers
 from api_middleware import APIMiddleware, handle_api_errors
-from monitoring import initialize_monitoring, get_metrics, get_health, monitor_requests
+from monitoring import initialize_monitoring, get_metrics, get_health, monitor_requests, CONTENT_TYPE_LATEST
 from dashboard_api import router as dashboard_router
+from export_utils import EXPORT_POOL
+from performance import redis_pool
 import logging
 import os
 
@@ -66,7 +68,7 @@ handler = SlackRequestHandler(slack_app)
 @handle_api_errors
 async def health_check():
     """Enhanced health check with detailed system status."""
-    health_status = get_health()
+    health_status = await get_health()
     
     if health_status['status'] == 'healthy':
         return health_status
@@ -78,13 +80,13 @@ async def health_check():
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint."""
-    return PlainTextResponse(get_metrics(), media_type="text/plain")
+    return Response(get_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 @app.get("/status")
 @handle_api_errors
 async def system_status():
     """Detailed system status for monitoring."""
-    health_status = get_health()
+    health_status = await get_health()
     
     return {
         "application": "Agora",
@@ -117,14 +119,17 @@ async def slack_events(request: Request):
 @app.on_event("startup")
 async def startup_event():
     """Application startup event."""
+    system_monitor.start()
     logger.info("Agora application started successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Agora application shutting down")
-    if system_monitor:
-        system_monitor.stop()
+    system_monitor.stop()
+    EXPORT_POOL.shutdown(wait=False)
+    if redis_pool is not None:
+        redis_pool.disconnect()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, Index, JSON
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy import create_engine, Column, Integer, BigInteger, SmallInteger, String, DateTime, Boolean, ForeignKey, Text, Float, Index, UniqueConstraint, PrimaryKeyConstraint, JSON
+from sqlalchemy import event, inspect, select, update, insert, delete, case, func, literal, bindparam, true, text
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, deferred, object_session, Session
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.pool import StaticPool
 from datetime import datetime
+from enum import IntEnum
 from config import Config
 import logging
 
@@ -9,16 +14,82 @@ logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
+# Slack team/user/channel IDs are short (T/U/C + ~10 chars); a tight bound keeps
+# composite index keys and sort buffers small on backends that size by declared width
+SLACK_ID_LENGTH = 32
+
+# Low-cardinality label columns are stored as SMALLINT codes so their
+# composite index keys stay narrow; Python code keeps using the labels
+
+class PollStatusCode(IntEnum):
+    ACTIVE = 1
+    ENDED = 2
+
+class VoteTypeCode(IntEnum):
+    SINGLE = 1
+    MULTIPLE = 2
+
+class RoleCode(IntEnum):
+    ADMIN = 1
+    USER = 2
+    VIEWER = 3
+
+class ScheduleActionCode(IntEnum):
+    CREATE = 1
+    END = 2
+    REMIND = 3
+    NOTIFY = 4
+
+class ScheduleTypeCode(IntEnum):
+    ONCE = 1
+    DAILY = 2
+    WEEKLY = 3
+    MONTHLY = 4
+    CUSTOM_CRON = 5
+
+class EnumCode(TypeDecorator):
+    """SMALLINT column holding an IntEnum code, read back as its lowercase label."""
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, codes):
+        super().__init__()
+        self.codes = codes
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        try:
+            return self.codes[value.upper()].value
+        except KeyError:
+            raise ValueError(f"{value!r} is not a valid {self.codes.__name__} label")
+    
+    def process_literal_param(self, value, dialect):
+        return self.process_bind_param(value, dialect)
+    
+    def process_result_value(self, value, dialect):
+        # int() also accepts codes SQLite kept as text in pre-migration VARCHAR columns
+        return None if value is None else self.codes(int(value)).name.lower()
+
+def is_code_label(codes, value) -> bool:
+    """Whether value is a label an EnumCode(codes) column accepts."""
+    return isinstance(value, str) and value.upper() in codes.__members__
+
+# With STRICT_LOADING, touching an unloaded Poll collection raises instead of
+# issuing a per-poll SELECT; callers load them with selectinload()
+RELATIONSHIP_LAZY = "raise_on_sql" if Config.STRICT_LOADING else "select"
+
 class Poll(Base):
     __tablename__ = "polls"
     
     id = Column(Integer, primary_key=True, index=True)
     question = Column(Text, nullable=False)
-    team_id = Column(String(255), nullable=False, index=True)
-    channel_id = Column(String(255), nullable=False, index=True)
-    creator_id = Column(String(255), nullable=False, index=True)
-    vote_type = Column(String(50), nullable=False)  # 'single' or 'multiple'
-    status = Column(String(50), default="active", index=True)  # 'active' or 'ended'
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    channel_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    creator_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    vote_type = Column(EnumCode(VoteTypeCode), nullable=False)  # 'single' or 'multiple'
+    status = Column(EnumCode(PollStatusCode), default="active", index=True)  # 'active' or 'ended'
     created_at = Column(DateTime, default=datetime.now, index=True)
     ended_at = Column(DateTime, nullable=True)
     message_ts = Column(String(255), nullable=True, index=True)  # Slack message timestamp
@@ -29,19 +100,22 @@ class Poll(Base):
         Index('idx_channel_status', 'channel_id', 'status'),
         Index('idx_creator_created', 'creator_id', 'created_at'),
         Index('idx_team_created', 'team_id', 'created_at'),
+        # Partial index over only the active polls, for per-team active listings
+        Index('idx_poll_team_active', 'team_id', 'created_at',
+              postgresql_where=(status == 'active'), sqlite_where=(status == 'active')),
     )
     
-    options = relationship("PollOption", back_populates="poll", cascade="all, delete-orphan")
-    voted_users = relationship("VotedUser", back_populates="poll", cascade="all, delete-orphan")
-    user_votes = relationship("UserVote", back_populates="poll", cascade="all, delete-orphan")
-    analytics = relationship("PollAnalytics", back_populates="poll", cascade="all, delete-orphan")
-    shares = relationship("PollShare", back_populates="poll", cascade="all, delete-orphan")
+    options = relationship("PollOption", back_populates="poll", cascade="all, delete-orphan", passive_deletes=True, lazy=RELATIONSHIP_LAZY)
+    voted_users = relationship("VotedUser", back_populates="poll", cascade="all, delete-orphan", passive_deletes=True, lazy=RELATIONSHIP_LAZY)
+    user_votes = relationship("UserVote", back_populates="poll", cascade="all, delete-orphan", passive_deletes=True, lazy=RELATIONSHIP_LAZY)
+    analytics = relationship("PollAnalytics", back_populates="poll", cascade="all, delete-orphan", passive_deletes=True, lazy=RELATIONSHIP_LAZY)
+    shares = relationship("PollShare", back_populates="poll", cascade="all, delete-orphan", passive_deletes=True, lazy=RELATIONSHIP_LAZY)
 
 class PollOption(Base):
     __tablename__ = "poll_options"
     
     id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
     vote_count = Column(Integer, default=0, index=True)
     order_index = Column(Integer, nullable=False)
@@ -56,14 +130,15 @@ class PollOption(Base):
 class VotedUser(Base):
     __tablename__ = "voted_users"
     
-    id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
-    user_id = Column(String(255), nullable=False, index=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False)
     voted_at = Column(DateTime, default=datetime.now, index=True)
     
     # Composite indexes for duplicate prevention and analytics
     __table_args__ = (
-        Index('idx_poll_user', 'poll_id', 'user_id'),
+        # One row per voter per poll: the natural key is the primary key, so
+        # no surrogate id index to maintain on the vote path
+        PrimaryKeyConstraint('poll_id', 'user_id'),
         Index('idx_user_voted', 'user_id', 'voted_at'),
     )
     
@@ -73,14 +148,17 @@ class UserVote(Base):
     __tablename__ = "user_votes"
     
     id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
-    user_id = Column(String(255), nullable=False, index=True)
-    option_id = Column(Integer, ForeignKey("poll_options.id"), nullable=False, index=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    option_id = Column(Integer, ForeignKey("poll_options.id", ondelete="CASCADE"), nullable=False)
     voted_at = Column(DateTime, default=datetime.now, index=True)
     
     # Composite indexes for vote tracking and analytics
     __table_args__ = (
-        Index('idx_poll_option', 'poll_id', 'option_id'),
+        # Covers per-option tallies and COUNT(DISTINCT user_id) without heap lookups
+        Index('idx_poll_option_user', 'poll_id', 'option_id', 'user_id', postgresql_include=['voted_at']),
+        # A user can pick each option at most once, even on multiple-choice polls
+        UniqueConstraint('poll_id', 'user_id', 'option_id', name='uq_poll_user_option'),
         Index('idx_user_poll', 'user_id', 'poll_id'),
         Index('idx_option_voted', 'option_id', 'voted_at'),
     )
@@ -92,7 +170,7 @@ class PollAnalytics(Base):
     __tablename__ = "poll_analytics"
     
     id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
     total_votes = Column(Integer, default=0)
     unique_voters = Column(Integer, default=0)
     participation_rate = Column(Float, default=0.0)  # percentage
@@ -107,22 +185,62 @@ class VoteActivity(Base):
     __tablename__ = "vote_activity"
     
     id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
     hour = Column(Integer, nullable=False)  # 0-23
     vote_count = Column(Integer, default=0)
     date = Column(DateTime, default=datetime.now)
     
+    # One row per poll, hour and day; maintained incrementally on each vote
+    __table_args__ = (
+        Index('idx_vote_activity_poll_hour', 'poll_id', 'hour', 'date', unique=True),
+    )
+    
+    poll = relationship("Poll")
+
+class PollSummary(Base):
+    __tablename__ = "poll_summary"
+    
+    # Denormalized per-poll aggregates for listings; maintained by the vote and
+    # option hooks below, backfilled with refresh_all()
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), primary_key=True)
+    total_votes = Column(Integer, default=0)
+    unique_voters = Column(Integer, default=0)
+    option_count = Column(Integer, default=0)
+    top_option_id = Column(Integer, ForeignKey("poll_options.id", ondelete="SET NULL"), nullable=True)  # Null until a vote lands
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
     poll = relationship("Poll")
+    
+    @classmethod
+    def refresh_all(cls, connection):
+        """Backfill every poll's summary with one INSERT ... SELECT upsert."""
+        summary = cls.__table__
+        polls = Poll.__table__
+        aggregates = _summary_columns(polls.c.id)
+        rows = select(polls.c.id, *aggregates.values(), literal(datetime.now()))
+        columns = ['poll_id', *aggregates, 'updated_at']
+        
+        stmt = _upsert_insert(connection, summary)
+        if stmt is None:
+            connection.execute(delete(summary))
+            connection.execute(insert(summary).from_select(columns, rows))
+            return
+        if connection.dialect.name == 'sqlite':
+            # SQLite needs a WHERE clause to parse INSERT ... SELECT ... ON CONFLICT
+            rows = rows.where(true())
+        stmt = stmt.from_select(columns, rows)
+        incoming = _upsert_incoming(stmt)
+        connection.execute(_on_conflict_update(stmt, [summary.c.poll_id], {c: incoming[c] for c in columns[1:]}))
 
 class UserRole(Base):
     __tablename__ = "user_roles"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(255), nullable=False, unique=True, index=True)
-    team_id = Column(String(255), nullable=False, index=True)
-    role = Column(String(50), default="user", index=True)  # 'admin', 'user', 'viewer'
-    permissions = Column(Text, nullable=True)  # JSON string of specific permissions
-    assigned_by = Column(String(255), nullable=True)  # User ID who assigned this role
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False, unique=True, index=True)
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    role = Column(EnumCode(RoleCode), default="user", index=True)  # 'admin', 'user', 'viewer'
+    permissions = Column(JSON().with_variant(JSONB(), 'postgresql'), nullable=True)  # Specific permissions
+    assigned_by = Column(String(SLACK_ID_LENGTH), nullable=True)  # User ID who assigned this role
     assigned_at = Column(DateTime, default=datetime.now)
     is_active = Column(Boolean, default=True, index=True)
     
@@ -130,13 +248,15 @@ class UserRole(Base):
     __table_args__ = (
         Index('idx_team_role', 'team_id', 'role'),
         Index('idx_user_team', 'user_id', 'team_id'),
+        # GIN index for permission-key lookups; only JSONB supports it
+        Index('idx_user_role_perms', 'permissions', postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
 
 class TeamSettings(Base):
     __tablename__ = "team_settings"
     
     id = Column(Integer, primary_key=True, index=True)
-    team_id = Column(String(255), nullable=False, unique=True)
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False, unique=True)
     allow_public_polls = Column(Boolean, default=True)
     require_approval = Column(Boolean, default=False)
     max_options_per_poll = Column(Integer, default=10)
@@ -149,8 +269,8 @@ class NotificationSettings(Base):
     __tablename__ = "notification_settings"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(255), nullable=False, index=True)
-    team_id = Column(String(255), nullable=False, index=True)
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False)
     poll_created = Column(Boolean, default=True)
     poll_ended = Column(Boolean, default=True)
     vote_milestone = Column(Boolean, default=True)  # Every 5 votes
@@ -163,15 +283,17 @@ class NotificationSettings(Base):
     # Composite index for user settings lookup
     __table_args__ = (
         Index('idx_user_team_settings', 'user_id', 'team_id'),
+        # Covers the poll_created fan-out SELECT (user_id included for index-only scans)
+        Index('idx_notif_team_type_enabled', 'team_id', 'poll_created', 'user_id'),
     )
 
 class Notification(Base):
     __tablename__ = "notifications"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(255), nullable=False, index=True)
-    team_id = Column(String(255), nullable=False, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=True, index=True)
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False, index=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=True)
     notification_type = Column(String(50), nullable=False, index=True)  # 'poll_created', 'vote_milestone', etc.
     title = Column(String(255), nullable=False)
     message = Column(Text, nullable=False)
@@ -191,10 +313,10 @@ class PollShare(Base):
     __tablename__ = "poll_shares"
     
     id = Column(Integer, primary_key=True, index=True)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
-    channel_id = Column(String(255), nullable=False, index=True)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
+    channel_id = Column(String(SLACK_ID_LENGTH), nullable=False)
     message_ts = Column(String(255), nullable=True, index=True)  # Slack message timestamp
-    shared_by = Column(String(255), nullable=False, index=True)  # User who shared it
+    shared_by = Column(String(SLACK_ID_LENGTH), nullable=False, index=True)  # User who shared it
     shared_at = Column(DateTime, default=datetime.now, index=True)
     is_active = Column(Boolean, default=True, index=True)
     
@@ -202,6 +324,9 @@ class PollShare(Base):
     __table_args__ = (
         Index('idx_poll_channel', 'poll_id', 'channel_id'),
         Index('idx_channel_active', 'channel_id', 'is_active'),
+        # Active shares are looked up by poll (and channel) when refreshing messages
+        Index('idx_share_poll_channel_active', 'poll_id', 'channel_id',
+              postgresql_where=(is_active == True), sqlite_where=(is_active == True)),
     )
     
     poll = relationship("Poll", back_populates="shares")
@@ -209,42 +334,489 @@ class PollShare(Base):
 class CrossChannelView(Base):
     __tablename__ = "cross_channel_views"
     
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(String(255), nullable=False)
-    team_id = Column(String(255), nullable=False)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False)
+    user_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=False)
     viewed_at = Column(DateTime, default=datetime.now)
     
+    # Latest view per user and poll
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'poll_id'),
+    )
+    
     poll = relationship("Poll")
 
 class ScheduledPoll(Base):
     __tablename__ = "scheduled_polls"
     
     id = Column(String(255), primary_key=True)  # UUID or custom ID
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=True)  # Null for create actions
-    team_id = Column(String(255), nullable=False, index=True)
-    channel_id = Column(String(255), nullable=False)
-    creator_id = Column(String(255), nullable=False)
-    action = Column(String(50), nullable=False)  # 'create', 'end', 'remind', 'notify'
-    schedule_type = Column(String(50), nullable=False)  # 'once', 'daily', 'weekly', 'monthly', 'custom_cron'
+    poll_id = Column(Integer, ForeignKey("polls.id", ondelete="CASCADE"), nullable=True)  # Null for create actions
+    team_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    channel_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    creator_id = Column(String(SLACK_ID_LENGTH), nullable=False)
+    action = Column(EnumCode(ScheduleActionCode), nullable=False)  # 'create', 'end', 'remind', 'notify'
+    schedule_type = Column(EnumCode(ScheduleTypeCode), nullable=False)  # 'once', 'daily', 'weekly', 'monthly', 'custom_cron'
     scheduled_time = Column(DateTime, nullable=False, index=True)
     cron_expression = Column(String(255), nullable=True)
-    poll_data = Column(JSON, nullable=True)  # Poll creation data for create actions
+    # Poll creation data for create actions; deferred so status/stat updates
+    # don't pull the JSON payload, undefer_group('payload') to load it
+    poll_data = deferred(Column(JSON, nullable=True), group='payload')
     is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=datetime.now)
     last_run = Column(DateTime, nullable=True)
     next_run = Column(DateTime, nullable=True, index=True)
+    next_run_epoch = Column(BigInteger, nullable=True)  # next_run as epoch seconds, kept in sync on flush
     run_count = Column(Integer, default=0)
     
     # Composite indexes for scheduling queries
     __table_args__ = (
-        Index('idx_scheduled_active_time', 'is_active', 'scheduled_time'),
+        # The scheduler only ever scans active schedules, by integer due time
+        Index('idx_sched_next_active', 'next_run_epoch',
+              postgresql_where=(is_active == True), sqlite_where=(is_active == True)),
         Index('idx_team_active', 'team_id', 'is_active'),
         Index('idx_action_active', 'action', 'is_active'),
     )
     
     poll = relationship("Poll")
 
+@event.listens_for(ScheduledPoll, "before_insert")
+@event.listens_for(ScheduledPoll, "before_update")
+def _sync_next_run_epoch(mapper, connection, target):
+    target.next_run_epoch = int(target.next_run.timestamp()) if target.next_run else None
+
+# Dialect upserts: INSERT ... ON CONFLICT on PostgreSQL/SQLite, ON DUPLICATE
+# KEY UPDATE on MySQL
+
+def _upsert_insert(connection, table):
+    """The dialect's INSERT construct if it supports upserts, else None."""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table)
+
+def _upsert_incoming(stmt):
+    """Column collection naming the values the upsert tried to insert."""
+    return stmt.inserted if hasattr(stmt, 'on_duplicate_key_update') else stmt.excluded
+
+def _on_conflict_update(stmt, index_elements, set_):
+    if hasattr(stmt, 'on_duplicate_key_update'):
+        return stmt.on_duplicate_key_update(set_)
+    return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_)
+
+# Vote counters are bumped with atomic UPDATEs rather than read-modify-write,
+# so concurrent voters can't lose each other's increments
+
+def bump_option(session, option_id: int, delta: int = 1, poll_id: int = None):
+    """Queue delta for one option's vote_count; written by the session's next flush."""
+    bump_options(session, {option_id: delta}, poll_id)
+
+def bump_options(session, deltas: dict, poll_id: int = None):
+    """Queue {option_id: delta} increments; the next flush applies them in one executemany.
+    
+    Because they land after that flush's inserts, a rejected vote never bumps
+    a count. poll_id names the options' poll and saves a lookup when known.
+    """
+    if not deltas:
+        return
+    options = PollOption.__table__
+    if poll_id is not None:
+        poll_ids = [poll_id]
+    else:
+        poll_ids = session.execute(
+            select(options.c.poll_id).where(options.c.id.in_(list(deltas))).distinct()
+        ).scalars().all()
+    queued = session.info.setdefault(_OPTION_DELTAS, {})
+    for option_id, delta in deltas.items():
+        queued[option_id] = queued.get(option_id, 0) + delta
+    for queued_poll_id in poll_ids:
+        _queued_counters(session, queued_poll_id)['options'] = True
+
+# Incremental analytics maintenance: each vote adjusts PollAnalytics and
+# VoteActivity in place instead of rescanning the poll's votes.
+
+def _activity_day(voted_at: datetime) -> datetime:
+    return datetime.combine(voted_at.date(), datetime.min.time())
+
+def rebuild_poll_analytics(connection, poll_id: int):
+    """Recompute a poll's analytics and hourly activity from its votes."""
+    analytics = PollAnalytics.__table__
+    activity = VoteActivity.__table__
+    
+    created_at = connection.execute(select(Poll.created_at).where(Poll.id == poll_id)).scalar()
+    voted_at = connection.execute(
+        select(UserVote.voted_at).where(UserVote.poll_id == poll_id)
+    ).scalars().all()
+    unique_voters = connection.execute(
+        select(func.count()).select_from(VotedUser).where(VotedUser.poll_id == poll_id)
+    ).scalar()
+    
+    total_votes = len(voted_at)
+    participation_rate = min(100.0, (unique_voters / max(1, total_votes)) * 100)
+    avg_response_time = 0.0
+    if voted_at and created_at:
+        avg_response_time = sum((v - created_at).total_seconds() / 60 for v in voted_at) / total_votes
+    
+    hour_counts = {}
+    day_counts = {}
+    for v in voted_at:
+        hour_counts[v.hour] = hour_counts.get(v.hour, 0) + 1
+        key = (v.hour, _activity_day(v))
+        day_counts[key] = day_counts.get(key, 0) + 1
+    # Ties go to the earliest hour, matching _peak_hour
+    peak_voting_hour = min(hour_counts, key=lambda h: (-hour_counts[h], h)) if hour_counts else None
+    
+    connection.execute(delete(analytics).where(analytics.c.poll_id == poll_id))
+    connection.execute(insert(analytics).values(
+        poll_id=poll_id,
+        total_votes=total_votes,
+        unique_voters=unique_voters,
+        participation_rate=participation_rate,
+        avg_response_time=avg_response_time,
+        peak_voting_hour=peak_voting_hour,
+        created_at=datetime.now(),
+        updated_at=datetime.now()
+    ))
+    
+    connection.execute(delete(activity).where(activity.c.poll_id == poll_id))
+    if day_counts:
+        connection.execute(insert(activity), [
+            {'poll_id': poll_id, 'hour': hour, 'date': day, 'vote_count': count}
+            for (hour, day), count in day_counts.items()
+        ])
+
+def _peak_hour(poll_id: int):
+    """Scalar subquery for the poll's busiest hour, ties going to the earliest."""
+    activity = VoteActivity.__table__
+    return (
+        select(activity.c.hour)
+        .where(activity.c.poll_id == poll_id)
+        .group_by(activity.c.hour)
+        .having(func.sum(activity.c.vote_count) > 0)
+        .order_by(func.sum(activity.c.vote_count).desc(), activity.c.hour)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+# Whether each database has idx_vote_activity_poll_hour yet (added by migration
+# 013); keyed by engine URL and checked once per process
+_activity_bucket_index = {}
+
+def _has_activity_bucket_index(connection) -> bool:
+    key = str(connection.engine.url)
+    if key not in _activity_bucket_index:
+        _activity_bucket_index[key] = any(
+            index['name'] == 'idx_vote_activity_poll_hour' and index['unique']
+            for index in inspect(connection).get_indexes(VoteActivity.__tablename__)
+        )
+    return _activity_bucket_index[key]
+
+def record_vote_activity(connection, poll_id: int, voted_at: datetime, delta: int = 1):
+    """Add delta to the poll's hourly VoteActivity bucket for voted_at."""
+    activity = VoteActivity.__table__
+    day = _activity_day(voted_at)
+    
+    stmt = None
+    # ON CONFLICT needs the unique index; databases not yet migrated use UPDATE-then-INSERT
+    if delta > 0 and _has_activity_bucket_index(connection):
+        stmt = _upsert_insert(connection, activity)
+    if stmt is not None:
+        # One atomic statement per vote, arbitrated by idx_vote_activity_poll_hour
+        stmt = stmt.values(poll_id=poll_id, hour=voted_at.hour, date=day, vote_count=delta)
+        connection.execute(_on_conflict_update(
+            stmt,
+            [activity.c.poll_id, activity.c.hour, activity.c.date],
+            {'vote_count': activity.c.vote_count + delta}
+        ))
+        return
+    
+    result = connection.execute(
+        update(activity)
+        .where(activity.c.poll_id == poll_id,
+               activity.c.hour == voted_at.hour,
+               activity.c.date == day)
+        .values(vote_count=activity.c.vote_count + delta)
+    )
+    if result.rowcount == 0 and delta > 0:
+        connection.execute(insert(activity).values(
+            poll_id=poll_id, hour=voted_at.hour, date=day, vote_count=delta
+        ))
+    elif delta < 0:
+        connection.execute(
+            delete(activity).where(activity.c.poll_id == poll_id, activity.c.vote_count <= 0)
+        )
+
+def _apply_analytics_counters(connection, poll_id: int, counters: dict, created_at) -> bool:
+    """Apply one flush's vote and voter deltas in a single UPDATE; False if the poll has no analytics row yet."""
+    analytics = PollAnalytics.__table__
+    votes, voters = counters['votes'], counters['voters']
+    
+    for (hour, day), delta in _activity_deltas(counters['vote_times']).items():
+        record_vote_activity(connection, poll_id, day.replace(hour=hour), delta)
+    
+    response_minutes = sum(
+        delta * (voted_at - created_at).total_seconds() / 60 for voted_at, delta in counters['vote_times']
+    ) if created_at else 0.0
+    new_total = analytics.c.total_votes + votes
+    new_voters = analytics.c.unique_voters + voters
+    
+    # Every expression reading the counters is listed before the counters
+    # themselves, since MySQL evaluates SET assignments left to right
+    result = connection.execute(
+        update(analytics)
+        .where(analytics.c.poll_id == poll_id)
+        .ordered_values(
+            (analytics.c.avg_response_time, case(
+                (new_total > 0,
+                 (analytics.c.avg_response_time * analytics.c.total_votes + response_minutes) / new_total),
+                else_=literal(0.0)
+            )),
+            (analytics.c.participation_rate, case(
+                (new_voters >= new_total,
+                 case((new_voters > 0, literal(100.0)), else_=literal(0.0))),
+                else_=new_voters * 100.0 / new_total
+            )),
+            (analytics.c.peak_voting_hour, _peak_hour(poll_id)),
+            (analytics.c.total_votes, new_total),
+            (analytics.c.unique_voters, new_voters),
+            (analytics.c.updated_at, datetime.now())
+        )
+    )
+    return result.rowcount > 0
+
+def _activity_deltas(vote_times) -> dict:
+    """Net {(hour, day): delta} per hourly bucket, dropping buckets that cancel out."""
+    buckets = {}
+    for voted_at, delta in vote_times:
+        key = (voted_at.hour, _activity_day(voted_at))
+        buckets[key] = buckets.get(key, 0) + delta
+    return {key: delta for key, delta in buckets.items() if delta}
+
+# PollSummary maintenance: vote and voter counts move by deltas, option
+# count and leader are recomputed from poll_options when options change
+
+def _summary_columns(poll_id) -> dict:
+    """Correlated aggregate expressions for the poll identified by poll_id."""
+    return {
+        'total_votes': select(func.count()).where(UserVote.__table__.c.poll_id == poll_id).scalar_subquery(),
+        'unique_voters': select(func.count()).where(VotedUser.__table__.c.poll_id == poll_id).scalar_subquery(),
+        **_summary_option_columns(poll_id),
+    }
+
+def _summary_option_columns(poll_id) -> dict:
+    options = PollOption.__table__
+    return {
+        'option_count': select(func.count()).where(options.c.poll_id == poll_id).scalar_subquery(),
+        'top_option_id': (
+            select(options.c.id)
+            .where(options.c.poll_id == poll_id, options.c.vote_count > 0)
+            .order_by(options.c.vote_count.desc(), options.c.id)
+            .limit(1)
+            .scalar_subquery()
+        ),
+    }
+
+def refresh_poll_summary(connection, poll_id: int):
+    """Recompute one poll's summary row from its votes and options."""
+    summary = PollSummary.__table__
+    connection.execute(delete(summary).where(summary.c.poll_id == poll_id))
+    connection.execute(insert(summary).values(
+        poll_id=poll_id, updated_at=datetime.now(), **_summary_columns(literal(poll_id))
+    ))
+
+def _apply_summary_counters(connection, poll_id: int, counters: dict) -> bool:
+    """Apply one flush's summary changes in a single UPDATE; False if the poll has no summary row yet."""
+    summary = PollSummary.__table__
+    values = {'updated_at': datetime.now()}
+    if counters['votes']:
+        values['total_votes'] = summary.c.total_votes + counters['votes']
+    if counters['voters']:
+        values['unique_voters'] = summary.c.unique_voters + counters['voters']
+    if counters['options']:
+        values.update(_summary_option_columns(summary.c.poll_id))
+    result = connection.execute(update(summary).where(summary.c.poll_id == poll_id).values(values))
+    return result.rowcount > 0
+
+# The vote, voter and option hooks only queue deltas in session.info; the
+# after_flush handler then writes each touched poll's analytics and summary
+# once, however many rows the flush changed
+
+_POLL_COUNTERS = 'agora_poll_counters'
+_OPTION_DELTAS = 'agora_option_deltas'
+
+def _queued_counters(session, poll_id: int) -> dict:
+    polls = session.info.setdefault(_POLL_COUNTERS, {})
+    if poll_id not in polls:
+        polls[poll_id] = {'votes': 0, 'voters': 0, 'vote_times': [], 'options': False, 'inserted': False}
+    return polls[poll_id]
+
+def _queue_vote(target, delta: int):
+    counters = _queued_counters(object_session(target), target.poll_id)
+    counters['votes'] += delta
+    counters['vote_times'].append((target.voted_at, delta))
+    counters['inserted'] |= delta > 0
+
+def _queue_voter(target, delta: int):
+    counters = _queued_counters(object_session(target), target.poll_id)
+    counters['voters'] += delta
+    counters['inserted'] |= delta > 0
+
+def _poll_created_at(session, poll_id: int):
+    # The voting handler has usually loaded the poll already; avoid a SELECT then
+    poll = session.identity_map.get(identity_key(Poll, poll_id))
+    if poll is not None and 'created_at' in poll.__dict__:
+        return poll.created_at
+    return session.connection().execute(select(Poll.created_at).where(Poll.id == poll_id)).scalar()
+
+def _apply_queued_counters(session):
+    """Write every queued option, analytics and summary delta."""
+    polls = session.info.pop(_POLL_COUNTERS, {})
+    option_deltas = session.info.pop(_OPTION_DELTAS, {})
+    connection = session.connection()
+    
+    option_deltas = {option_id: delta for option_id, delta in option_deltas.items() if delta}
+    if option_deltas:
+        options = PollOption.__table__
+        connection.execute(
+            update(options)
+            .where(options.c.id == bindparam('option_id'))
+            .values(vote_count=options.c.vote_count + bindparam('delta')),
+            [{'option_id': option_id, 'delta': delta} for option_id, delta in option_deltas.items()]
+        )
+    
+    for poll_id, counters in polls.items():
+        if counters['vote_times'] or counters['voters']:
+            created_at = _poll_created_at(session, poll_id) if counters['vote_times'] else None
+            if not _apply_analytics_counters(connection, poll_id, counters, created_at) and counters['inserted']:
+                # First vote seen for this poll (or a poll from before incremental
+                # tracking): build its aggregates once, including this flush's votes
+                rebuild_poll_analytics(connection, poll_id)
+        if not _apply_summary_counters(connection, poll_id, counters) and counters['inserted']:
+            refresh_poll_summary(connection, poll_id)
+
+@event.listens_for(UserVote, "after_insert")
+def _user_vote_inserted(mapper, connection, target):
+    _queue_vote(target, 1)
+
+@event.listens_for(UserVote, "before_delete")
+def _user_vote_deleted(mapper, connection, target):
+    _queue_vote(target, -1)
+
+@event.listens_for(VotedUser, "after_insert")
+def _voted_user_inserted(mapper, connection, target):
+    _queue_voter(target, 1)
+
+@event.listens_for(VotedUser, "before_delete")
+def _voted_user_deleted(mapper, connection, target):
+    _queue_voter(target, -1)
+
+@event.listens_for(PollOption, "after_insert")
+@event.listens_for(PollOption, "after_delete")
+def _poll_option_changed(mapper, connection, target):
+    _queued_counters(object_session(target), target.poll_id)['options'] = True
+
+@event.listens_for(PollOption, "after_update")
+def _poll_option_updated(mapper, connection, target):
+    if inspect(target).attrs.vote_count.history.has_changes():
+        _queued_counters(object_session(target), target.poll_id)['options'] = True
+
+@event.listens_for(Session, "after_flush")
+def _flush_queued_counters(session, flush_context):
+    if session.info.get(_POLL_COUNTERS) or session.info.get(_OPTION_DELTAS):
+        _apply_queued_counters(session)
+
+@event.listens_for(Session, "before_commit")
+def _commit_queued_counters(session):
+    if session.info.get(_POLL_COUNTERS) or session.info.get(_OPTION_DELTAS):
+        # A bump queued with nothing else pending has no flush to ride on
+        session.flush()
+        if session.info.get(_POLL_COUNTERS) or session.info.get(_OPTION_DELTAS):
+            _apply_queued_counters(session)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_queued_counters(session, previous_transaction):
+    # A rejected flush's votes never landed, so neither do their deltas
+    session.info.pop(_POLL_COUNTERS, None)
+    session.info.pop(_OPTION_DELTAS, None)
+
+# Listing views fetch each poll's vote totals in the same aggregated query
+# instead of lazy-loading options/votes per poll
+
+def list_polls_with_counts(session, *criteria, user_id=None, offset=None, limit=None):
+    """(poll, total_votes, voter_count, has_voted) rows, newest first."""
+    has_voted = literal(False)
+    if user_id:
+        has_voted = select(VotedUser.poll_id).where(
+            VotedUser.poll_id == Poll.id, VotedUser.user_id == user_id
+        ).exists()
+    stmt = (
+        select(
+            Poll,
+            func.count(UserVote.id).label('total_votes'),
+            func.count(UserVote.user_id.distinct()).label('voter_count'),
+            has_voted.label('has_voted'),
+        )
+        .outerjoin(UserVote, UserVote.poll_id == Poll.id)
+        .where(*criteria)
+        .group_by(Poll.id)
+        .order_by(Poll.created_at.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return session.execute(stmt).all()
+
+# Append-only tables are range-partitioned by month on PostgreSQL (migration
+# 011) so recent-window queries prune to one small partition and old months
+# can be detached; other backends keep a single table
+
+TIME_PARTITIONED_TABLES = {
+    'notifications': 'sent_at',
+    'vote_activity': 'date',
+}
+
+PARTITION_MONTHS_AHEAD = 3
+
+def _month_start(day: datetime, offset: int = 0) -> datetime:
+    month = day.year * 12 + day.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1)
+
+def monthly_partition_name(table: str, month: datetime) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+def create_monthly_partition(connection, table: str, month: datetime, parent: str = None):
+    """Create the partition of table covering month if it doesn't exist."""
+    start = _month_start(month)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {monthly_partition_name(table, start)} "
+        f"PARTITION OF {parent or table} FOR VALUES FROM ('{start:%Y-%m-%d}') "
+        f"TO ('{_month_start(start, 1):%Y-%m-%d}')"
+    ))
+
+def partitioned_tables(connection) -> set:
+    """Names of the partitioned parent tables in the current schema."""
+    if connection.dialect.name != 'postgresql':
+        return set()
+    return set(connection.execute(text(
+        "SELECT c.relname FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relnamespace = current_schema()::regnamespace"
+    )).scalars())
+
+def ensure_time_partitions(connection, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Pre-create the current and upcoming monthly partitions."""
+    existing = partitioned_tables(connection)
+    this_month = _month_start(datetime.now())
+    for table in TIME_PARTITIONED_TABLES:
+        if table not in existing:
+            continue
+        for offset in range(months_ahead + 1):
+            create_monthly_partition(connection, table, _month_start(this_month, offset))
+
 # Database configuration moved to database/config.py for better separation of concerns
 # Import database utilities from the dedicated database module
 from database import get_db_config, get_db
@@ -258,6 +830,16 @@ def get_session_local():
     """Get session factory (legacy compatibility).""" 
     return get_db_config().session_factory
 
-# For backward compatibility
-engine = property(get_engine)
-SessionLocal = property(get_session_local)
\ No newline at end of file
+# For backward compatibility: `models.engine` / `models.SessionLocal` resolve
+# lazily on first access and are then cached as real module attributes
+_LAZY_ATTRIBUTES = {
+    'engine': get_engine,
+    'SessionLocal': get_session_local,
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = _LAZY_ATTRIBUTES[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -3,31 +3,74 @@ Comprehensive logging and monitoring system for Agora Slack app.
 Includes structured logging, metrics collection, health checks, and alerting.
 """
 
+import asyncio
+import atexit
+import copy
+import inspect
 import logging
 import logging.handlers
+import queue
 import time
 import json
 import threading
 import psutil
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from functools import wraps
 from contextlib import contextmanager
-from dataclasses import dataclass, asdict
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict, field
+from array import array
+from bisect import bisect_left
 from collections import defaultdict, deque
 import prometheus_client
-from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest
+from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
 import redis
 from config import Config
 
+try:
+    import orjson
+except ImportError:  # Optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import zstandard as zstd
+except ImportError:  # Optional; rotated logs are then kept uncompressed
+    zstd = None
+
+# Optional context attributes copied into each JSON log line, in output order
+_EXTRA_KEYS = ('user_id', 'team_id', 'poll_id', 'duration', 'error_type')
+
+# Fields bound by log_context() for the current thread or task; replaced, never mutated
+_log_ctx: ContextVar[Dict[str, Any]] = ContextVar("_log_ctx", default={})
+
+_ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z if orjson is not None else 0
+
+def _log_json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat() + 'Z'
+    return str(value)
+
 # Configure structured logging
 class JSONFormatter(logging.Formatter):
     """JSON formatter for structured logging."""
     
+    # (whole second, rendered 'YYYY-MM-DDTHH:MM:SS') of the last record formatted
+    _second = (None, '')
+    
+    def _timestamp(self, created: float) -> str:
+        """ISO 8601 UTC timestamp; the date/time part is rendered once per second."""
+        second = int(created)
+        cached, prefix = self._second
+        if cached != second:
+            prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+            self._second = (second, prefix)
+        return '%s.%06dZ' % (prefix, (created - second) * 1e6)
+    
     def format(self, record):
         log_data = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': self._timestamp(record.created),
             'level': record.levelname,
             'logger': record.name,
             'message': record.getMessage(),
@@ -37,25 +80,114 @@ class JSONFormatter(logging.Formatter):
         }
         
         # Add extra fields if present
-        if hasattr(record, 'user_id'):
-            log_data['user_id'] = record.user_id
-        if hasattr(record, 'team_id'):
-            log_data['team_id'] = record.team_id
-        if hasattr(record, 'poll_id'):
-            log_data['poll_id'] = record.poll_id
-        if hasattr(record, 'duration'):
-            log_data['duration'] = record.duration
-        if hasattr(record, 'error_type'):
-            log_data['error_type'] = record.error_type
+        attributes = record.__dict__
+        for key in _EXTRA_KEYS:
+            value = attributes.get(key)
+            if value is not None:
+                log_data[key] = value
+        
+        # Queued records carry the context captured on the logging thread
+        context = attributes.get('log_context')
+        if context is None:
+            context = _log_ctx.get()
+        for key, value in context.items():
+            log_data.setdefault(key, value)
         
         # Add exception info if present
         if record.exc_info:
             log_data['exception'] = self.formatException(record.exc_info)
         
-        return json.dumps(log_data)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str, option=_ORJSON_OPTIONS).decode()
+        return json.dumps(log_data, default=_log_json_default)
+
+# Log records are handed to a bounded queue on the calling thread; a single
+# listener thread does the JSON encoding and the (batched) file writes
+
+LOG_QUEUE_SIZE = 10000
+LOG_FLUSH_INTERVAL = 0.05  # seconds
+LOG_BUFFER_SIZE = 64 * 1024  # bytes
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Non-blocking QueueHandler for an in-process listener."""
+    
+    def prepare(self, record):
+        # Merge args now, while mutable arguments still hold their call-time
+        # values; exc_info is kept for JSONFormatter since the queue never
+        # leaves the process
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        record.log_context = _log_ctx.get()
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Never stall a request on logging; count what was dropped instead
+            metrics_buffer.inc(ERROR_COUNT, ('log_queue_full', 'warning'))
+
+def _zstd_log_name(name: str) -> str:
+    return name + ".zst"
+
+def _zstd_rotate_log(source: str, dest: str):
+    """Compress a just-rotated log file into its .zst backup."""
+    with open(source, 'rb') as src, open(dest, 'wb') as dst:
+        zstd.ZstdCompressor(level=3).copy_stream(src, dst)
+    os.remove(source)
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rotating file handler that flushes at most every 50 ms or 64 KiB."""
+    
+    def __init__(self, *args, **kwargs):
+        self._last_flush = time.monotonic()
+        super().__init__(*args, **kwargs)
+        if zstd is not None:
+            self.namer = _zstd_log_name
+            self.rotator = _zstd_rotate_log
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, encoding=self.encoding,
+                    errors=self.errors, buffering=LOG_BUFFER_SIZE)
+    
+    def flush(self):
+        # emit() calls this after every record; the file buffer writes itself
+        # out when full, so only flush here once the interval has passed
+        if time.monotonic() - self._last_flush >= LOG_FLUSH_INTERVAL:
+            self.force_flush()
+    
+    def force_flush(self):
+        super().flush()
+        self._last_flush = time.monotonic()
+
+class LogQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes buffered handlers whenever the queue goes idle."""
+    
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=LOG_FLUSH_INTERVAL)
+            except queue.Empty:
+                if not block:
+                    raise
+                for handler in self.handlers:
+                    getattr(handler, 'force_flush', handler.flush)()
+    
+    def enqueue_sentinel(self):
+        # The queue is bounded; wait for room rather than losing the stop signal
+        self.queue.put(self._sentinel)
+    
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            handler.close()
+
+_log_listener: Optional[LogQueueListener] = None
 
 def setup_logging(log_level: str = "INFO", log_file: str = "agora.log"):
     """Setup comprehensive logging configuration."""
+    global _log_listener
     
     # Create logger
     logger = logging.getLogger()
@@ -64,33 +196,49 @@ def setup_logging(log_level: str = "INFO", log_file: str = "agora.log"):
     # Remove existing handlers
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    if _log_listener is not None:
+        _log_listener.stop()
     
     # Console handler with JSON formatting
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(JSONFormatter())
-    logger.addHandler(console_handler)
     
     # File handler with rotation
-    file_handler = logging.handlers.RotatingFileHandler(
+    file_handler = BufferedRotatingFileHandler(
         log_file,
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=5
     )
     file_handler.setFormatter(JSONFormatter())
-    logger.addHandler(file_handler)
     
     # Error file handler for errors only
-    error_handler = logging.handlers.RotatingFileHandler(
+    error_handler = BufferedRotatingFileHandler(
         "agora_errors.log",
         maxBytes=10 * 1024 * 1024,  # 10MB
         backupCount=10
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(JSONFormatter())
-    logger.addHandler(error_handler)
+    
+    # Only the queue hand-off runs on the logging thread
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    logger.addHandler(LogQueueHandler(log_queue))
+    _log_listener = LogQueueListener(
+        log_queue, console_handler, file_handler, error_handler, respect_handler_level=True
+    )
+    _log_listener.start()
     
     return logger
 
+def stop_logging():
+    """Drain the log queue and close the handlers."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+atexit.register(stop_logging)
+
 # Metrics registry
 registry = CollectorRegistry()
 
@@ -165,6 +313,154 @@ CACHE_OPERATIONS = Counter(
     registry=registry
 )
 
+# Counter increments and histogram observations are buffered per thread and
+# applied to the collectors in batches, so the request path only bumps a dict
+# entry instead of resolving labels() and taking the metric's lock per event
+
+METRICS_FLUSH_INTERVAL = 0.1  # seconds
+METRICS_FLUSH_THRESHOLD = 1000  # buffered events per thread before an inline flush
+
+# Bound children per (metric, label values); prometheus_client keeps every
+# child alive anyway, so this adds references, not metric state
+_metric_children: Dict[tuple, Any] = {}
+
+def _metric_child(metric, labels: tuple):
+    """Labelled child of a metric, cached to skip the labels() lookup."""
+    key = (metric, labels)
+    child = _metric_children.get(key)
+    if child is None:
+        child = _metric_children.setdefault(key, metric.labels(*labels))
+    return child
+
+def _metric_total(metric, sample_name: str) -> float:
+    """Sum one sample series across all of a metric's label children."""
+    return sum(
+        sample.value
+        for family in metric.collect()
+        for sample in family.samples
+        if sample.name == sample_name
+    )
+
+def _observe_batch(child, micros: List[int]):
+    """Apply many histogram observations with one update per touched bucket and one to _sum."""
+    # Same bucketing as Histogram.observe (first bound >= value); relies on the
+    # _upper_bounds/_buckets/_sum internals of the pinned prometheus-client
+    bounds = [bound * 1_000_000 for bound in child._upper_bounds]
+    counts = defaultdict(int)
+    for value in micros:
+        counts[bisect_left(bounds, value)] += 1
+    for index, count in counts.items():
+        child._buckets[index].inc(count)
+    # Integer microsecond total: exact, and a single add to the shared accumulator
+    child._sum.inc(sum(micros) / 1_000_000)
+
+@dataclass
+class _PendingMetrics:
+    """One thread's buffered metric updates, keyed by (metric, label values)."""
+    owner: threading.Thread
+    counters: Dict[tuple, float] = field(default_factory=lambda: defaultdict(int))
+    observations: Dict[tuple, List[int]] = field(default_factory=lambda: defaultdict(list))  # microseconds
+    events: int = 0
+    # Only contended while the flusher swaps the dicts out
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    
+    def take(self):
+        """Swap out the buffered updates, returning (counters, observations)."""
+        with self.lock:
+            counters, observations = self.counters, self.observations
+            self.counters, self.observations, self.events = defaultdict(int), defaultdict(list), 0
+        return counters, observations
+
+class MetricsBuffer:
+    """Thread-local accumulator for Prometheus counter and histogram updates."""
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._buffers: List[_PendingMetrics] = []
+        self._lock = threading.Lock()
+    
+    def _pending(self) -> _PendingMetrics:
+        pending = getattr(self._local, 'pending', None)
+        if pending is None:
+            pending = self._local.pending = _PendingMetrics(owner=threading.current_thread())
+            with self._lock:
+                self._buffers.append(pending)
+        return pending
+    
+    def inc(self, metric, labels: tuple, amount: float = 1):
+        """Buffer a counter increment."""
+        pending = self._pending()
+        with pending.lock:
+            pending.counters[(metric, labels)] += amount
+            pending.events += 1
+            full = pending.events >= METRICS_FLUSH_THRESHOLD
+        if full:
+            self._apply(pending)
+    
+    def observe(self, metric, labels: tuple, value: float):
+        """Buffer a histogram observation, in seconds, at microsecond precision."""
+        pending = self._pending()
+        with pending.lock:
+            pending.observations[(metric, labels)].append(round(value * 1_000_000))
+            pending.events += 1
+            full = pending.events >= METRICS_FLUSH_THRESHOLD
+        if full:
+            self._apply(pending)
+    
+    def flush(self):
+        """Apply every thread's buffered updates to the collectors."""
+        with self._lock:
+            buffers = list(self._buffers)
+        for pending in buffers:
+            self._apply(pending)
+        # Buffers of finished threads are empty now and won't be written again
+        with self._lock:
+            self._buffers = [pending for pending in self._buffers if pending.owner.is_alive()]
+    
+    @staticmethod
+    def _apply(pending: _PendingMetrics):
+        counters, observations = pending.take()
+        for (metric, labels), amount in counters.items():
+            _metric_child(metric, labels).inc(amount)
+        for (metric, labels), values in observations.items():
+            _observe_batch(_metric_child(metric, labels), values)
+
+metrics_buffer = MetricsBuffer()
+
+SYSTEM_SNAPSHOT_MAX_AGE = 120  # seconds; two SystemMonitor ticks
+
+@dataclass
+class _SystemSnapshot:
+    """One sample of host resource usage, shared by the metrics and health paths."""
+    cpu: float
+    vm: Any
+    disk: Any
+    net: Any
+    taken_at: float = field(default_factory=time.monotonic)
+
+_system_snapshot: Optional[_SystemSnapshot] = None
+
+# Prime the non-blocking CPU sampler; the first interval=None call always reports 0.0
+psutil.cpu_percent(interval=None)
+
+def take_system_snapshot() -> _SystemSnapshot:
+    """Sample host resources without blocking and publish the result."""
+    global _system_snapshot
+    _system_snapshot = _SystemSnapshot(
+        cpu=psutil.cpu_percent(interval=None),
+        vm=psutil.virtual_memory(),
+        disk=psutil.disk_usage('/'),
+        net=psutil.net_io_counters()
+    )
+    return _system_snapshot
+
+def system_snapshot() -> _SystemSnapshot:
+    """Latest snapshot from the monitor thread, re-sampled if missing or stale."""
+    snapshot = _system_snapshot
+    if snapshot is None or time.monotonic() - snapshot.taken_at > SYSTEM_SNAPSHOT_MAX_AGE:
+        snapshot = take_system_snapshot()
+    return snapshot
+
 @dataclass
 class HealthStatus:
     """Health check status data class."""
@@ -179,73 +475,100 @@ class MetricsCollector:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.start_time = time.time()
+        self.start_time = time.perf_counter_ns()
+        # (monotonic time, exposition bytes) of the last registry render
+        self._metrics_cache: Tuple[float, bytes] = (0.0, b"")
+        self._metrics_ttl = 10.0
     
     def record_request(self, method: str, endpoint: str, status_code: int, duration: float):
         """Record HTTP request metrics."""
-        REQUEST_COUNT.labels(method=method, endpoint=endpoint, status_code=status_code).inc()
-        REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
+        metrics_buffer.inc(REQUEST_COUNT, (method, endpoint, status_code))
+        metrics_buffer.observe(REQUEST_DURATION, (method, endpoint), duration)
     
     def record_poll_operation(self, operation: str, team_id: str):
         """Record poll operation metrics."""
-        POLL_OPERATIONS.labels(operation=operation, team_id=team_id).inc()
+        metrics_buffer.inc(POLL_OPERATIONS, (operation, team_id))
     
     def record_vote(self, team_id: str, poll_type: str):
         """Record vote metrics."""
-        VOTE_COUNT.labels(team_id=team_id, poll_type=poll_type).inc()
+        metrics_buffer.inc(VOTE_COUNT, (team_id, poll_type))
     
     def update_active_polls(self, team_id: str, count: int):
         """Update active polls gauge."""
-        ACTIVE_POLLS.labels(team_id=team_id).set(count)
+        _metric_child(ACTIVE_POLLS, (team_id,)).set(count)
     
     def record_error(self, error_type: str, severity: str = "error"):
         """Record error metrics."""
-        ERROR_COUNT.labels(error_type=error_type, severity=severity).inc()
+        metrics_buffer.inc(ERROR_COUNT, (error_type, severity))
     
     def record_slack_api_call(self, method: str, status: str):
         """Record Slack API call metrics."""
-        SLACK_API_CALLS.labels(method=method, status=status).inc()
+        metrics_buffer.inc(SLACK_API_CALLS, (method, status))
     
     def record_database_operation(self, operation: str, table: str):
         """Record database operation metrics."""
-        DATABASE_OPERATIONS.labels(operation=operation, table=table).inc()
+        metrics_buffer.inc(DATABASE_OPERATIONS, (operation, table))
     
     def record_cache_operation(self, operation: str, result: str):
         """Record cache operation metrics."""
-        CACHE_OPERATIONS.labels(operation=operation, result=result).inc()
+        metrics_buffer.inc(CACHE_OPERATIONS, (operation, result))
     
-    def update_system_metrics(self):
+    def update_system_metrics(self, snapshot: Optional[_SystemSnapshot] = None):
         """Update system resource metrics."""
         try:
+            snapshot = snapshot or system_snapshot()
+            
             # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            SYSTEM_METRICS.labels(metric_type='cpu_percent').set(cpu_percent)
+            _metric_child(SYSTEM_METRICS, ('cpu_percent',)).set(snapshot.cpu)
             
             # Memory usage
-            memory = psutil.virtual_memory()
-            SYSTEM_METRICS.labels(metric_type='memory_percent').set(memory.percent)
-            SYSTEM_METRICS.labels(metric_type='memory_used_mb').set(memory.used / 1024 / 1024)
+            _metric_child(SYSTEM_METRICS, ('memory_percent',)).set(snapshot.vm.percent)
+            _metric_child(SYSTEM_METRICS, ('memory_used_mb',)).set(snapshot.vm.used / 1024 / 1024)
             
             # Disk usage
-            disk = psutil.disk_usage('/')
-            SYSTEM_METRICS.labels(metric_type='disk_percent').set(disk.percent)
-            SYSTEM_METRICS.labels(metric_type='disk_used_gb').set(disk.used / 1024 / 1024 / 1024)
+            _metric_child(SYSTEM_METRICS, ('disk_percent',)).set(snapshot.disk.percent)
+            _metric_child(SYSTEM_METRICS, ('disk_used_gb',)).set(snapshot.disk.used / 1024 / 1024 / 1024)
             
             # Network I/O
-            network = psutil.net_io_counters()
-            SYSTEM_METRICS.labels(metric_type='network_bytes_sent').set(network.bytes_sent)
-            SYSTEM_METRICS.labels(metric_type='network_bytes_recv').set(network.bytes_recv)
+            _metric_child(SYSTEM_METRICS, ('network_bytes_sent',)).set(snapshot.net.bytes_sent)
+            _metric_child(SYSTEM_METRICS, ('network_bytes_recv',)).set(snapshot.net.bytes_recv)
             
             # Application uptime
-            uptime = time.time() - self.start_time
-            SYSTEM_METRICS.labels(metric_type='uptime_seconds').set(uptime)
+            uptime = (time.perf_counter_ns() - self.start_time) * 1e-9
+            _metric_child(SYSTEM_METRICS, ('uptime_seconds',)).set(uptime)
             
         except Exception as e:
             self.logger.error(f"Error updating system metrics: {e}")
     
-    def get_metrics(self) -> str:
-        """Get Prometheus metrics in text format."""
-        return generate_latest(registry).decode('utf-8')
+    def get_metrics(self) -> bytes:
+        """Get Prometheus metrics in text format, re-rendered at most once per TTL."""
+        now = time.monotonic()
+        rendered_at, body = self._metrics_cache
+        if now - rendered_at < self._metrics_ttl:
+            return body
+        metrics_buffer.flush()
+        body = generate_latest(registry)
+        self._metrics_cache = (now, body)
+        return body
+
+def _slack_api_status() -> Dict[str, Any]:
+    """Whether the Slack credentials are configured."""
+    if not getattr(Config, 'SLACK_BOT_TOKEN', None):
+        return {
+            'status': 'unhealthy',
+            'message': 'Slack bot token not configured'
+        }
+    if not getattr(Config, 'SLACK_SIGNING_SECRET', None):
+        return {
+            'status': 'unhealthy',
+            'message': 'Slack signing secret not configured'
+        }
+    return {
+        'status': 'healthy',
+        'message': 'Slack API credentials configured'
+    }
+
+_SLACK_API_STATUS = _slack_api_status()
 
 class HealthChecker:
     """Perform health checks on various system components."""
@@ -268,7 +591,7 @@ class HealthChecker:
         try:
             from models import engine
             
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
             # Test connection
             with engine.connect() as conn:
@@ -276,7 +599,7 @@ class HealthChecker:
                 if result[0] != 1:
                     raise Exception("Database query returned unexpected result")
             
-            duration = time.time() - start_time
+            duration = (time.perf_counter_ns() - start_time) * 1e-9
             
             return {
                 'status': 'healthy',
@@ -301,21 +624,21 @@ class HealthChecker:
             }
         
         try:
-            start_time = time.time()
+            start_time = time.perf_counter_ns()
             
-            # Test connection
-            self.redis_client.ping()
-            
-            # Test set/get
+            # Test connection and set/get in one round-trip
             test_key = "health_check"
             test_value = "ok"
-            self.redis_client.set(test_key, test_value, ex=60)
-            retrieved_value = self.redis_client.get(test_key)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.ping()
+            pipe.set(test_key, test_value, ex=60)
+            pipe.get(test_key)
+            _, _, retrieved_value = pipe.execute()
             
             if retrieved_value.decode('utf-8') != test_value:
                 raise Exception("Redis set/get test failed")
             
-            duration = time.time() - start_time
+            duration = (time.perf_counter_ns() - start_time) * 1e-9
             
             return {
                 'status': 'healthy',
@@ -333,46 +656,17 @@ class HealthChecker:
     
     def check_slack_api(self) -> Dict[str, Any]:
         """Check Slack API connectivity."""
-        try:
-            # This would test actual Slack API connectivity
-            # For now, we'll check if credentials are configured
-            
-            if not hasattr(Config, 'SLACK_BOT_TOKEN') or not Config.SLACK_BOT_TOKEN:
-                return {
-                    'status': 'unhealthy',
-                    'message': 'Slack bot token not configured'
-                }
-            
-            if not hasattr(Config, 'SLACK_SIGNING_SECRET') or not Config.SLACK_SIGNING_SECRET:
-                return {
-                    'status': 'unhealthy',
-                    'message': 'Slack signing secret not configured'
-                }
-            
-            return {
-                'status': 'healthy',
-                'message': 'Slack API credentials configured'
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Slack API health check failed: {e}")
-            return {
-                'status': 'unhealthy',
-                'error': str(e),
-                'message': 'Slack API check failed'
-            }
+        # This would test actual Slack API connectivity; for now the
+        # credentials check, which Config fixes at import, is precomputed
+        return dict(_SLACK_API_STATUS)
     
     def check_system_resources(self) -> Dict[str, Any]:
         """Check system resource usage."""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
-            
-            # Memory usage
-            memory = psutil.virtual_memory()
-            
-            # Disk usage
-            disk = psutil.disk_usage('/')
+            snapshot = system_snapshot()
+            cpu_percent = snapshot.cpu
+            memory = snapshot.vm
+            disk = snapshot.disk
             
             # Determine overall status
             status = 'healthy'
@@ -407,14 +701,17 @@ class HealthChecker:
                 'message': 'System resources check failed'
             }
     
-    def get_health_status(self) -> HealthStatus:
+    async def get_health_status(self) -> HealthStatus:
         """Get comprehensive health status."""
-        checks = {
-            'database': self.check_database(),
-            'redis': self.check_redis(),
-            'slack_api': self.check_slack_api(),
-            'system_resources': self.check_system_resources()
+        # The checks block on network I/O; run them side by side off the event loop
+        probes = {
+            'database': self.check_database,
+            'redis': self.check_redis,
+            'slack_api': self.check_slack_api,
+            'system_resources': self.check_system_resources
         }
+        results = await asyncio.gather(*(asyncio.to_thread(probe) for probe in probes.values()))
+        checks = dict(zip(probes, results))
         
         # Determine overall status
         overall_status = 'healthy'
@@ -435,6 +732,62 @@ class HealthChecker:
             uptime=uptime
         )
 
+class AlertRing:
+    """Fixed-size alert history stored column-wise, oldest entries overwritten first."""
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._ts = array('d', bytes(8 * capacity))  # epoch seconds
+        self._type: List[Optional[str]] = [None] * capacity
+        self._severity: List[Optional[str]] = [None] * capacity
+        self._message: List[Optional[str]] = [None] * capacity
+        self._details: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self._count = 0  # total alerts ever appended
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._entry(self._slot(i))
+    
+    def _slot(self, i: int) -> int:
+        """Map a logical index (0 = oldest retained) to its storage slot."""
+        return (self._count - len(self) + i) % self.capacity
+    
+    def _entry(self, slot: int) -> Dict[str, Any]:
+        return {
+            'type': self._type[slot],
+            'severity': self._severity[slot],
+            'message': self._message[slot],
+            'details': self._details[slot],
+            'timestamp': datetime.utcfromtimestamp(self._ts[slot]).isoformat()
+        }
+    
+    def append(self, alert_type: str, severity: str, message: str, details: Dict[str, Any], ts: float):
+        """Store one alert, overwriting the oldest once full."""
+        with self._lock:
+            slot = self._count % self.capacity
+            self._ts[slot] = ts
+            self._type[slot] = alert_type
+            self._severity[slot] = severity
+            self._message[slot] = message
+            self._details[slot] = details
+            self._count += 1
+    
+    def since(self, cutoff: float) -> List[Dict[str, Any]]:
+        """Alerts raised at or after the given epoch time, oldest first."""
+        # Timestamps are appended in order, so bisect over logical positions
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._ts[self._slot(mid)] < cutoff:
+                lo = mid + 1
+            else:
+                hi = mid
+        return [self._entry(self._slot(i)) for i in range(lo, len(self))]
+
 class AlertManager:
     """Manage alerts and notifications."""
     
@@ -446,31 +799,61 @@ class AlertManager:
             'memory_usage': 80,  # percentage
             'disk_usage': 80,  # percentage
         }
-        self.alert_history = deque(maxlen=1000)
+        self.alert_history = AlertRing(1000)
+        # (monotonic time, errors, requests, request seconds) counter totals, one per monitor tick
+        self._samples = deque(maxlen=60)
+    
+    def record_sample(self):
+        """Snapshot the cumulative error and request counters."""
+        self._samples.append((
+            time.monotonic(),
+            _metric_total(ERROR_COUNT, 'agora_errors_total'),
+            _metric_total(REQUEST_DURATION, 'agora_request_duration_seconds_count'),
+            _metric_total(REQUEST_DURATION, 'agora_request_duration_seconds_sum')
+        ))
+    
+    def _window(self) -> Optional[Tuple[float, float, float, float]]:
+        """Counter deltas between the oldest and newest samples."""
+        if len(self._samples) < 2:
+            return None
+        first, last = self._samples[0], self._samples[-1]
+        return tuple(b - a for a, b in zip(first, last))
     
     def check_error_rate(self) -> Optional[Dict[str, Any]]:
         """Check if error rate exceeds threshold."""
-        # This would check actual error rate from metrics
-        # For now, return None (no alert)
-        return None
+        window = self._window()
+        if window is None or window[0] <= 0:
+            return None
+        
+        errors_per_minute = window[1] / window[0] * 60
+        if errors_per_minute <= self.alert_thresholds['error_rate']:
+            return None
+        return {
+            'alert_type': 'error_rate',
+            'severity': 'warning',
+            'message': f"Error rate {errors_per_minute:.1f}/min exceeds {self.alert_thresholds['error_rate']}/min",
+            'details': {'errors_per_minute': errors_per_minute, 'window_seconds': window[0]}
+        }
     
     def check_response_time(self) -> Optional[Dict[str, Any]]:
         """Check if response time exceeds threshold."""
-        # This would check actual response times from metrics
-        # For now, return None (no alert)
-        return None
+        window = self._window()
+        if window is None or window[2] <= 0:
+            return None
+        
+        average = window[3] / window[2]
+        if average <= self.alert_thresholds['response_time']:
+            return None
+        return {
+            'alert_type': 'response_time',
+            'severity': 'warning',
+            'message': f"Average response time {average:.2f}s exceeds {self.alert_thresholds['response_time']}s",
+            'details': {'average_seconds': average, 'requests': window[2], 'window_seconds': window[0]}
+        }
     
     def send_alert(self, alert_type: str, severity: str, message: str, details: Dict[str, Any] = None):
         """Send alert notification."""
-        alert = {
-            'type': alert_type,
-            'severity': severity,
-            'message': message,
-            'details': details or {},
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        
-        self.alert_history.append(alert)
+        self.alert_history.append(alert_type, severity, message, details or {}, time.time())
         
         # Log the alert
         self.logger.error(
@@ -491,27 +874,33 @@ health_checker = HealthChecker()
 alert_manager = AlertManager()
 
 # Decorators for monitoring
+def _request_parameter(func) -> Tuple[Optional[str], Optional[int]]:
+    """Name and position of the endpoint's Request parameter, if it takes one."""
+    for index, param in enumerate(inspect.signature(func).parameters.values()):
+        if param.name == 'request' or getattr(param.annotation, '__name__', None) == 'Request':
+            return param.name, index
+    return None, None
+
 def monitor_requests(func):
     """Decorator to monitor HTTP requests."""
+    # Resolved once: FastAPI passes the request by keyword, direct callers by position
+    request_name, request_index = _request_parameter(func)
+    
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         method = "unknown"
         endpoint = "unknown"
         status_code = 200
         
         try:
-            # Extract request info if available
-            if args and hasattr(args[0], 'method'):
-                method = args[0].method
-                endpoint = args[0].url.path
+            if request_name is not None:
+                request = kwargs[request_name] if request_name in kwargs else args[request_index]
+                method = request.method
+                endpoint = request.url.path
             
             result = await func(*args, **kwargs)
-            
-            # Extract status code if available
-            if hasattr(result, 'status_code'):
-                status_code = result.status_code
-            
+            status_code = getattr(result, 'status_code', 200)
             return result
             
         except Exception as e:
@@ -520,88 +909,124 @@ def monitor_requests(func):
             raise
         
         finally:
-            duration = time.time() - start_time
+            duration = (time.perf_counter_ns() - start_time) * 1e-9
             metrics_collector.record_request(method, endpoint, status_code, duration)
     
     return wrapper
 
 def monitor_database_operations(operation: str, table: str):
     """Decorator to monitor database operations."""
+    # Label tuples are fixed per decorated function; build them once
+    success_labels = (operation, table)
+    error_labels = (f"database_{operation}", "error")
+    
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             try:
                 result = func(*args, **kwargs)
-                metrics_collector.record_database_operation(operation, table)
-                return result
-            except Exception as e:
-                metrics_collector.record_error(f"database_{operation}")
+            except Exception:
+                metrics_buffer.inc(ERROR_COUNT, error_labels)
                 raise
+            metrics_buffer.inc(DATABASE_OPERATIONS, success_labels)
+            return result
         return wrapper
     return decorator
 
 def monitor_slack_operations(operation: str):
     """Decorator to monitor Slack operations."""
+    success_labels = (operation, "success")
+    failure_labels = (operation, "error")
+    error_labels = (f"slack_{operation}", "error")
+    
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             try:
                 result = await func(*args, **kwargs)
-                metrics_collector.record_slack_api_call(operation, "success")
-                return result
-            except Exception as e:
-                metrics_collector.record_slack_api_call(operation, "error")
-                metrics_collector.record_error(f"slack_{operation}")
+            except Exception:
+                metrics_buffer.inc(SLACK_API_CALLS, failure_labels)
+                metrics_buffer.inc(ERROR_COUNT, error_labels)
                 raise
+            metrics_buffer.inc(SLACK_API_CALLS, success_labels)
+            return result
         return wrapper
     return decorator
 
 @contextmanager
 def log_context(**kwargs):
     """Context manager for adding context to logs."""
-    old_factory = logging.getLogRecordFactory()
-    
-    def record_factory(*args, **factory_kwargs):
-        record = old_factory(*args, **factory_kwargs)
-        for key, value in kwargs.items():
-            setattr(record, key, value)
-        return record
-    
-    logging.setLogRecordFactory(record_factory)
+    token = _log_ctx.set({**_log_ctx.get(), **kwargs})
     try:
         yield
     finally:
-        logging.setLogRecordFactory(old_factory)
+        _log_ctx.reset(token)
 
 # System monitoring thread
-class SystemMonitor(threading.Thread):
-    """Background thread for system monitoring."""
+class SystemMonitor:
+    """Periodic system monitoring task on the application's event loop."""
     
     def __init__(self, interval: int = 60):
-        super().__init__(daemon=True)
         self.interval = interval
-        self.running = True
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
         self.logger = logging.getLogger(__name__)
     
-    def run(self):
+    def start(self) -> asyncio.Task:
+        """Schedule the monitoring loop; must be called from a running loop."""
+        self.running = True
+        self.task = asyncio.get_running_loop().create_task(self._loop())
+        return self.task
+    
+    async def _loop(self):
         """Run monitoring loop."""
+        loop = asyncio.get_running_loop()
         while self.running:
             try:
-                # Update system metrics
-                metrics_collector.update_system_metrics()
+                # psutil reads /proc; keep it off the loop. Health checks read the same snapshot
+                snapshot = await loop.run_in_executor(None, take_system_snapshot)
+                metrics_collector.update_system_metrics(snapshot)
                 
-                # Check for alerts
-                # This would implement actual alerting logic
-                
-                time.sleep(self.interval)
+                # Check for alerts over the sampled window
+                alert_manager.record_sample()
+                for check in (alert_manager.check_error_rate, alert_manager.check_response_time):
+                    alert = check()
+                    if alert:
+                        alert_manager.send_alert(**alert)
                 
             except Exception as e:
                 self.logger.error(f"System monitor error: {e}")
-                time.sleep(self.interval)
+            
+            await asyncio.sleep(self.interval)
     
     def stop(self):
         """Stop monitoring."""
         self.running = False
+        if self.task is not None:
+            self.task.cancel()
+
+class MetricsFlusher(threading.Thread):
+    """Background thread applying buffered metric updates."""
+    
+    def __init__(self, interval: float = METRICS_FLUSH_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.running = True
+        self.logger = logging.getLogger(__name__)
+    
+    def run(self):
+        """Run flush loop."""
+        while self.running:
+            try:
+                metrics_buffer.flush()
+            except Exception as e:
+                self.logger.error(f"Metrics flush error: {e}")
+            time.sleep(self.interval)
+    
+    def stop(self):
+        """Stop flushing, applying anything still buffered."""
+        self.running = False
+        metrics_buffer.flush()
 
 # Initialize monitoring
 def initialize_monitoring():
@@ -612,9 +1037,11 @@ def initialize_monitoring():
         log_file=getattr(Config, 'LOG_FILE', 'agora.log')
     )
     
-    # Start system monitor
+    # The system monitor runs on the app's event loop; call start() from a startup hook
     system_monitor = SystemMonitor(interval=60)
-    system_monitor.start()
+    
+    # Apply buffered request/vote metrics every 100 ms
+    MetricsFlusher().start()
     
     logger = logging.getLogger(__name__)
     logger.info("Monitoring system initialized")
@@ -622,13 +1049,13 @@ def initialize_monitoring():
     return system_monitor
 
 # Export functions for use in other modules
-def get_metrics() -> str:
+def get_metrics() -> bytes:
     """Get Prometheus metrics."""
     return metrics_collector.get_metrics()
 
-def get_health() -> Dict[str, Any]:
+async def get_health() -> Dict[str, Any]:
     """Get health status."""
-    health_status = health_checker.get_health_status()
+    health_status = await health_checker.get_health_status()
     return asdict(health_status)
 
 def log_with_context(**context):
@@ -5,10 +5,12 @@ Provides database query optimizations, caching, and performance monitoring.
 
 import time
 import functools
+import socket
+import threading
 import logging
 from typing import Any, Dict, List, Optional, Callable
-from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import and_, or_, func, text
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func, text, exists, select, lambda_stmt, cast, Float, event
 from contextlib import contextmanager
 import redis
 import json
@@ -16,17 +18,47 @@ from datetime import datetime, timedelta
 from models import Poll, PollOption, VotedUser, UserVote, PollAnalytics, UserRole, Notification
 from config import Config
 
+try:
+    import msgpack
+except ImportError:  # Optional; cached values are then stored as JSON text
+    msgpack = None
+
+try:
+    from cachetools import TTLCache
+except ImportError:  # Optional; without it every lookup goes to Redis
+    TTLCache = None
+
 logger = logging.getLogger(__name__)
 
-# Redis client for caching
+# Keepalive probes stop NAT/firewall idle timeouts from silently killing pooled
+# connections; the per-probe tuning constants are Linux-only
+_KEEPALIVE_OPTIONS = {
+    getattr(socket, name): value
+    for name, value in (('TCP_KEEPIDLE', 60), ('TCP_KEEPINTVL', 10), ('TCP_KEEPCNT', 3))
+    if hasattr(socket, name)
+}
+
+# Redis client for caching; msgpack payloads are binary, JSON ones are text.
+# The pool is module-level so shutdown can disconnect it
+redis_pool = None
 redis_client = None
 try:
+    pool_options = dict(
+        max_connections=getattr(Config, 'REDIS_POOL_SIZE', None) or 50,
+        timeout=2,  # seconds to wait for a free connection
+        socket_keepalive=True,
+        socket_keepalive_options=_KEEPALIVE_OPTIONS,
+        health_check_interval=30,
+        decode_responses=msgpack is None
+    )
     if hasattr(Config, 'REDIS_URL') and Config.REDIS_URL:
-        redis_client = redis.from_url(Config.REDIS_URL, decode_responses=True)
+        redis_pool = redis.BlockingConnectionPool.from_url(Config.REDIS_URL, **pool_options)
     else:
-        redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
+        redis_pool = redis.BlockingConnectionPool(host='localhost', port=6379, db=0, **pool_options)
+    redis_client = redis.Redis(connection_pool=redis_pool)
 except Exception as e:
     logger.warning(f"Redis connection failed: {e}. Caching disabled.")
+    redis_pool = None
     redis_client = None
 
 class PerformanceMonitor:
@@ -38,31 +70,97 @@ class PerformanceMonitor:
         self.end_time = None
     
     def __enter__(self):
-        self.start_time = time.time()
+        self.start_time = time.perf_counter_ns()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end_time = time.time()
-        duration = self.end_time - self.start_time
-        
-        if duration > 1.0:  # Log slow queries (> 1 second)
-            logger.warning(f"Slow operation: {self.operation_name} took {duration:.2f}s")
-        elif duration > 0.1:  # Log medium queries (> 100ms)
-            logger.info(f"Medium operation: {self.operation_name} took {duration:.2f}s")
-        else:
-            logger.debug(f"Fast operation: {self.operation_name} took {duration:.2f}s")
+        self.end_time = time.perf_counter_ns()
+        _log_duration(self.operation_name, self.end_time - self.start_time)
+
+SLOW_OPERATION_NS = 1_000_000_000  # 1 second
+MEDIUM_OPERATION_NS = 100_000_000  # 100 ms
+
+def _log_duration(name: str, elapsed_ns: int):
+    """Log an operation's duration at a level matching how slow it was."""
+    if elapsed_ns > SLOW_OPERATION_NS:  # Log slow queries (> 1 second)
+        logger.warning(f"Slow operation: {name} took {elapsed_ns / 1e9:.2f}s")
+    elif elapsed_ns > MEDIUM_OPERATION_NS:  # Log medium queries (> 100ms)
+        logger.info(f"Medium operation: {name} took {elapsed_ns / 1e9:.2f}s")
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Fast operation: {name} took {elapsed_ns / 1e9:.2f}s")
 
 def performance_monitor(operation_name: str = None):
     """Decorator for monitoring function performance."""
     def decorator(func: Callable) -> Callable:
+        name = operation_name or f"{func.__module__}.{func.__name__}"
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            name = operation_name or f"{func.__module__}.{func.__name__}"
-            with PerformanceMonitor(name):
+            # Nothing would be logged at all; skip the timing
+            if not logger.isEnabledFor(logging.WARNING):
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
                 return func(*args, **kwargs)
+            finally:
+                _log_duration(name, time.perf_counter_ns() - start)
         return wrapper
     return decorator
 
+# msgpack packs only tz-aware datetimes natively; naive ones (as stored by
+# the models) travel as an extension type so they come back naive
+_NAIVE_DATETIME_EXT = 1
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_NAIVE_DATETIME_EXT, value.isoformat().encode())
+    return str(value)
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == _NAIVE_DATETIME_EXT:
+        return datetime.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+# In-process first tier for the per-interaction lookups; kept short so other
+# workers' writes show up quickly
+LOCAL_CACHE_SIZE = 10_000
+LOCAL_CACHE_TTL = 10  # seconds
+
+def _local_cache():
+    return TTLCache(maxsize=LOCAL_CACHE_SIZE, ttl=LOCAL_CACHE_TTL) if TTLCache is not None else None
+
+# Keyed by (poll_id, user_id) and (user_id, team_id)
+_local_voted = _local_cache()
+_local_roles = _local_cache()
+# TTLCache isn't thread-safe; handlers run on Bolt's worker threads
+_local_lock = threading.Lock()
+
+def _local_get(cache, key):
+    if cache is None:
+        return None
+    with _local_lock:
+        return cache.get(key)
+
+def _local_set(cache, key, value):
+    if cache is not None:
+        with _local_lock:
+            cache[key] = value
+
+def _local_evict(cache, matches: Callable[[tuple], bool]):
+    """Drop the in-process entries whose key satisfies matches."""
+    if cache is not None:
+        with _local_lock:
+            for key in [key for key in cache if matches(key)]:
+                cache.pop(key, None)
+
+CLEAR_BATCH_SIZE = 500  # keys per UNLINK
+_GLOB_CHARS = frozenset('*?[')
+
 class CacheManager:
     """Manages Redis caching with automatic serialization."""
     
@@ -71,6 +169,20 @@ class CacheManager:
         """Generate cache key from prefix and arguments."""
         return f"agora:{prefix}:{':'.join(map(str, args))}"
     
+    @staticmethod
+    def serialize(value: Any):
+        """Encode a value for storage (msgpack bytes, or JSON text without msgpack)."""
+        if msgpack is not None:
+            return msgpack.packb(value, datetime=True, use_bin_type=True, default=_msgpack_default)
+        return json.dumps(value, default=_json_default)
+    
+    @staticmethod
+    def deserialize(data) -> Any:
+        """Decode a value stored by serialize()."""
+        if msgpack is not None:
+            return msgpack.unpackb(data, timestamp=3, raw=False, ext_hook=_msgpack_ext_hook)
+        return json.loads(data)
+    
     @staticmethod
     def get(key: str, default: Any = None) -> Any:
         """Get value from cache."""
@@ -81,11 +193,23 @@ class CacheManager:
             value = redis_client.get(key)
             if value is None:
                 return default
-            return json.loads(value)
+            return CacheManager.deserialize(value)
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
             return default
     
+    @staticmethod
+    def get_raw(key: str) -> Optional[str]:
+        """Get the serialized JSON text from cache without decoding it."""
+        if not redis_client or msgpack is not None:
+            return None
+        
+        try:
+            return redis_client.get(key)
+        except Exception as e:
+            logger.error(f"Cache get error for key {key}: {e}")
+            return None
+    
     @staticmethod
     def set(key: str, value: Any, ttl: int = 300) -> bool:
         """Set value in cache with TTL."""
@@ -93,12 +217,47 @@ class CacheManager:
             return False
         
         try:
-            serialized = json.dumps(value, default=str)
-            return redis_client.setex(key, ttl, serialized)
+            return redis_client.setex(key, ttl, CacheManager.serialize(value))
         except Exception as e:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
     
+    @staticmethod
+    def get_many(keys: List[str]) -> List[Any]:
+        """Get several values with one MGET; misses and undecodable entries are None."""
+        if not redis_client or not keys:
+            return [None] * len(keys)
+        
+        try:
+            values = redis_client.mget(keys)
+        except Exception as e:
+            logger.error(f"Cache mget error for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+        
+        results = []
+        for key, value in zip(keys, values):
+            try:
+                results.append(None if value is None else CacheManager.deserialize(value))
+            except Exception as e:
+                logger.error(f"Cache get error for key {key}: {e}")
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def set_many(items: Dict[str, Any], ttl: int = 300) -> bool:
+        """Set several values with one pipelined round-trip."""
+        if not redis_client or not items:
+            return False
+        
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, CacheManager.serialize(value))
+            return all(pipe.execute())
+        except Exception as e:
+            logger.error(f"Cache set error for {len(items)} keys: {e}")
+            return False
+    
     @staticmethod
     def delete(key: str) -> bool:
         """Delete key from cache."""
@@ -114,60 +273,176 @@ class CacheManager:
     @staticmethod
     def clear_pattern(pattern: str) -> int:
         """Clear all keys matching pattern."""
+        return CacheManager.clear_patterns([pattern])
+    
+    @staticmethod
+    def clear_patterns(patterns: List[str]) -> int:
+        """Clear all keys matching any of the patterns in one pipelined round-trip."""
         if not redis_client:
             return 0
         
         try:
-            keys = redis_client.keys(pattern)
-            if keys:
-                return redis_client.delete(*keys)
+            # SCAN instead of KEYS so large keyspaces don't block the server;
+            # exact keys need no scan at all, UNLINK ignores missing ones
+            keys = set()
+            for pattern in patterns:
+                if _GLOB_CHARS.isdisjoint(pattern):
+                    keys.add(pattern)
+                else:
+                    keys.update(redis_client.scan_iter(match=pattern, count=1000))
+            if not keys:
+                return 0
+            
+            # Bounded UNLINK batches keep each command small; memory is freed asynchronously
+            keys = list(keys)
+            pipe = redis_client.pipeline(transaction=False)
+            for start in range(0, len(keys), CLEAR_BATCH_SIZE):
+                pipe.unlink(*keys[start:start + CLEAR_BATCH_SIZE])
+            return sum(pipe.execute())
+        except Exception as e:
+            logger.error(f"Cache clear patterns error for {patterns}: {e}")
             return 0
+    
+    @staticmethod
+    def update_poll_vote_counts(poll_id: int, team_id: str, counts: Dict[int, int]) -> int:
+        """Write new option vote counts into the cached entries holding a poll.
+        
+        Patches the poll's detail entry and the team's active-poll lists in place,
+        keeping their TTLs; entries that aren't cached are left alone.
+        """
+        if not redis_client:
+            return 0
+        
+        try:
+            keys = [CacheManager.get_key("poll_details", poll_id)]
+            keys.extend(redis_client.scan_iter(match=f"agora:active_polls:{team_id}:*", count=1000))
+            
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            replies = pipe.execute()
+            
+            patched, unreadable = 0, []
+            pipe = redis_client.pipeline(transaction=False)
+            for key, value, ttl in zip(keys, replies[::2], replies[1::2]):
+                if value is None or ttl <= 0:
+                    continue
+                try:
+                    cached = CacheManager.deserialize(value)
+                except Exception:
+                    unreadable.append(key)
+                    continue
+                
+                found = False
+                for poll in cached if isinstance(cached, list) else [cached]:
+                    if poll.get('id') != poll_id:
+                        continue
+                    for option in poll.get('options', []):
+                        if option['id'] in counts:
+                            option['vote_count'] = counts[option['id']]
+                    found = True
+                if found:
+                    # XX: don't resurrect an entry invalidated since it was read
+                    pipe.set(key, CacheManager.serialize(cached), px=ttl, xx=True)
+                    patched += 1
+            if unreadable:
+                pipe.unlink(*unreadable)
+            pipe.execute()
+            return patched
         except Exception as e:
-            logger.error(f"Cache clear pattern error for {pattern}: {e}")
+            logger.error(f"Cache vote count update error for poll {poll_id}: {e}")
+            CacheManager.clear_patterns([
+                CacheManager.get_key("poll_details", poll_id),
+                f"agora:active_polls:{team_id}:*"
+            ])
             return 0
 
+def _voter_count_subquery():
+    """Correlated COUNT of a poll's voters, for selecting alongside Poll."""
+    return select(func.count()).where(VotedUser.poll_id == Poll.id).correlate(Poll).scalar_subquery()
+
+def _active_poll_dict(poll: Poll, voter_count: int) -> Dict[str, Any]:
+    """The cached shape of an active poll."""
+    return {
+        'id': poll.id,
+        'question': poll.question,
+        'team_id': poll.team_id,
+        'channel_id': poll.channel_id,
+        'creator_id': poll.creator_id,
+        'vote_type': poll.vote_type,
+        'status': poll.status,
+        'created_at': poll.created_at,
+        'message_ts': poll.message_ts,
+        'options': [{'id': opt.id, 'text': opt.text, 'vote_count': opt.vote_count} for opt in poll.options],
+        'voter_count': voter_count
+    }
+
 class OptimizedQueries:
     """Optimized database queries with caching and performance monitoring."""
     
     @staticmethod
     @performance_monitor("get_active_polls")
-    def get_active_polls(db: Session, team_id: str, limit: int = 50) -> List[Poll]:
-        """Get active polls for a team with optimized loading."""
+    def get_active_polls(db: Session, team_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get active polls for a team as plain dicts, the same shape cached or not."""
         cache_key = CacheManager.get_key("active_polls", team_id, limit)
         
         # Try cache first
         cached_result = CacheManager.get(cache_key)
-        if cached_result:
+        if cached_result is not None:
             return cached_result
         
-        # Query with eager loading
-        polls = db.query(Poll).filter(
-            and_(
-                Poll.team_id == team_id,
-                Poll.status == "active"
-            )
+        # Query with eager loading; the lambda caches the built statement across calls.
+        # Voters are counted in SQL rather than loading every VotedUser row
+        rows = db.execute(lambda_stmt(lambda: select(
+            Poll,
+            select(func.count()).where(VotedUser.poll_id == Poll.id).correlate(Poll).scalar_subquery()
+        ).where(
+            Poll.team_id == team_id,
+            Poll.status == "active"
         ).options(
-            joinedload(Poll.options),
-            selectinload(Poll.voted_users)
-        ).order_by(Poll.created_at.desc()).limit(limit).all()
+            joinedload(Poll.options)
+        ).order_by(Poll.created_at.desc()).limit(limit))).unique().all()
         
         # Cache result
-        poll_data = [{
-            'id': poll.id,
-            'question': poll.question,
-            'team_id': poll.team_id,
-            'channel_id': poll.channel_id,
-            'creator_id': poll.creator_id,
-            'vote_type': poll.vote_type,
-            'status': poll.status,
-            'created_at': poll.created_at.isoformat(),
-            'message_ts': poll.message_ts,
-            'options': [{'id': opt.id, 'text': opt.text, 'vote_count': opt.vote_count} for opt in poll.options],
-            'voter_count': len(poll.voted_users)
-        } for poll in polls]
+        poll_data = [_active_poll_dict(poll, voter_count) for poll, voter_count in rows]
         
         CacheManager.set(cache_key, poll_data, ttl=60)  # Cache for 1 minute
-        return polls
+        return poll_data
+    
+    @staticmethod
+    @performance_monitor("get_active_polls_bulk")
+    def get_active_polls_bulk(db: Session, team_ids: List[str], limit: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+        """Get active polls for many teams: one cache read, one query for the misses."""
+        keys = [CacheManager.get_key("active_polls", team_id, limit) for team_id in team_ids]
+        cached = CacheManager.get_many(keys)
+        
+        result = {team_id: value for team_id, value in zip(team_ids, cached) if value is not None}
+        missing = [team_id for team_id in team_ids if team_id not in result]
+        if not missing:
+            return result
+        
+        # Newest `limit` active polls per team, ranked in SQL so large teams aren't over-fetched
+        ranked = select(
+            Poll.id,
+            func.row_number().over(partition_by=Poll.team_id, order_by=Poll.created_at.desc()).label('rank')
+        ).where(Poll.team_id.in_(missing), Poll.status == "active").subquery()
+        rows = db.execute(
+            select(Poll, _voter_count_subquery()).join(ranked, Poll.id == ranked.c.id).where(ranked.c.rank <= limit).options(
+                joinedload(Poll.options)
+            ).order_by(Poll.created_at.desc())
+        ).unique().all()
+        
+        fetched = {team_id: [] for team_id in missing}
+        for poll, voter_count in rows:
+            fetched[poll.team_id].append(_active_poll_dict(poll, voter_count))
+        
+        CacheManager.set_many(
+            {CacheManager.get_key("active_polls", team_id, limit): polls for team_id, polls in fetched.items()},
+            ttl=60
+        )
+        result.update(fetched)
+        return result
     
     @staticmethod
     @performance_monitor("get_poll_with_details")
@@ -181,13 +456,13 @@ class OptimizedQueries:
             # Convert back to Poll object if needed
             pass
         
-        # Query with all related data
-        poll = db.query(Poll).filter(Poll.id == poll_id).options(
+        # Query with all related data; voters are only counted, not loaded
+        row = db.query(Poll, _voter_count_subquery()).filter(Poll.id == poll_id).options(
             joinedload(Poll.options),
-            joinedload(Poll.voted_users),
             joinedload(Poll.analytics),
             joinedload(Poll.shares)
         ).first()
+        poll, voter_count = row if row else (None, 0)
         
         if poll:
             # Cache the result
@@ -199,11 +474,11 @@ class OptimizedQueries:
                 'creator_id': poll.creator_id,
                 'vote_type': poll.vote_type,
                 'status': poll.status,
-                'created_at': poll.created_at.isoformat(),
-                'ended_at': poll.ended_at.isoformat() if poll.ended_at else None,
+                'created_at': poll.created_at,
+                'ended_at': poll.ended_at,
                 'message_ts': poll.message_ts,
                 'options': [{'id': opt.id, 'text': opt.text, 'vote_count': opt.vote_count} for opt in poll.options],
-                'voter_count': len(poll.voted_users)
+                'voter_count': voter_count
             }, ttl=300)  # Cache for 5 minutes
         
         return poll
@@ -212,72 +487,93 @@ class OptimizedQueries:
     @performance_monitor("check_user_voted")
     def check_user_voted(db: Session, poll_id: int, user_id: str) -> bool:
         """Check if user has voted on a poll (optimized)."""
+        local_result = _local_get(_local_voted, (poll_id, user_id))
+        if local_result is not None:
+            return local_result
+        
         cache_key = CacheManager.get_key("user_voted", poll_id, user_id)
         
         # Try cache first
         cached_result = CacheManager.get(cache_key)
         if cached_result is not None:
+            _local_set(_local_voted, (poll_id, user_id), cached_result)
             return cached_result
         
-        # Use exists() for better performance
-        voted = db.query(VotedUser).filter(
-            and_(
-                VotedUser.poll_id == poll_id,
-                VotedUser.user_id == user_id
-            )
-        ).first() is not None
+        # SELECT EXISTS probes the (poll_id, user_id) primary key without loading a row
+        voted = db.execute(lambda_stmt(lambda: select(exists().where(
+            VotedUser.poll_id == poll_id,
+            VotedUser.user_id == user_id
+        )))).scalar()
         
         # Cache result
         CacheManager.set(cache_key, voted, ttl=3600)  # Cache for 1 hour
+        _local_set(_local_voted, (poll_id, user_id), voted)
         return voted
     
     @staticmethod
     @performance_monitor("get_user_role")
     def get_user_role(db: Session, user_id: str, team_id: str) -> str:
         """Get user role with caching."""
+        local_result = _local_get(_local_roles, (user_id, team_id))
+        if local_result:
+            return local_result
+        
         cache_key = CacheManager.get_key("user_role", user_id, team_id)
         
         # Try cache first
         cached_result = CacheManager.get(cache_key)
         if cached_result:
+            _local_set(_local_roles, (user_id, team_id), cached_result)
             return cached_result
         
         # Query user role
-        user_role = db.query(UserRole).filter(
-            and_(
-                UserRole.user_id == user_id,
-                UserRole.team_id == team_id,
-                UserRole.is_active == True
-            )
-        ).first()
-        
-        role = user_role.role if user_role else "user"
+        role = db.execute(lambda_stmt(lambda: select(UserRole.role).where(
+            UserRole.user_id == user_id,
+            UserRole.team_id == team_id,
+            UserRole.is_active == True
+        ).limit(1))).scalar() or "user"
         
         # Cache result
         CacheManager.set(cache_key, role, ttl=1800)  # Cache for 30 minutes
+        _local_set(_local_roles, (user_id, team_id), role)
         return role
     
     @staticmethod
     @performance_monitor("get_poll_analytics")
-    def get_poll_analytics(db: Session, poll_id: int) -> Dict[str, Any]:
-        """Get comprehensive poll analytics."""
+    def get_poll_analytics(db: Session, poll_id: int, raw: bool = False) -> Dict[str, Any]:
+        """Get comprehensive poll analytics.
+        
+        With raw=True a cache hit is returned as the cached JSON text, undecoded,
+        for callers that embed it in JSON output as-is (JSON cache encoding only).
+        """
         cache_key = CacheManager.get_key("poll_analytics", poll_id)
         
         # Try cache first
-        cached_result = CacheManager.get(cache_key)
-        if cached_result:
-            return cached_result
-        
-        # Use subqueries for better performance
-        total_votes = db.query(func.count(UserVote.id)).filter(UserVote.poll_id == poll_id).scalar()
-        unique_voters = db.query(func.count(VotedUser.id)).filter(VotedUser.poll_id == poll_id).scalar()
+        if raw and msgpack is None:
+            cached_json = CacheManager.get_raw(cache_key)
+            if cached_json:
+                return cached_json
+        else:
+            cached_result = CacheManager.get(cache_key)
+            if cached_result:
+                return cached_result
         
-        # Get vote distribution
+        # Vote distribution with both poll-wide counts as uncorrelated scalar
+        # subqueries, so the totals ride along in the same round-trip
+        total_votes_subq = select(func.count(UserVote.id)).where(UserVote.poll_id == poll_id).scalar_subquery()
+        unique_voters_subq = select(func.count(VotedUser.user_id)).where(VotedUser.poll_id == poll_id).scalar_subquery()
         vote_distribution = db.query(
             PollOption.text,
             PollOption.vote_count,
-            func.round(PollOption.vote_count * 100.0 / func.nullif(total_votes, 0), 2).label('percentage')
-        ).join(Poll).filter(Poll.id == poll_id).all()
+            # Cast in SQL so the driver hands back floats rather than Decimals
+            cast(func.round(PollOption.vote_count * 100.0 / func.nullif(total_votes_subq, 0), 2), Float).label('percentage'),
+            total_votes_subq.label('total_votes'),
+            unique_voters_subq.label('unique_voters')
+        ).filter(PollOption.poll_id == poll_id).all()
+        
+        # Votes reference options, so a poll without option rows has no votes either
+        total_votes = vote_distribution[0].total_votes if vote_distribution else 0
+        unique_voters = vote_distribution[0].unique_voters if vote_distribution else 0
         
         # Get voting timeline (last 24 hours)
         yesterday = datetime.now() - timedelta(days=1)
@@ -295,8 +591,8 @@ class OptimizedQueries:
             'total_votes': total_votes,
             'unique_voters': unique_voters,
             'vote_distribution': [
-                {'option': dist.text, 'votes': dist.vote_count, 'percentage': float(dist.percentage or 0)}
-                for dist in vote_distribution
+                {'option': option_text, 'votes': votes, 'percentage': percentage or 0.0}
+                for option_text, votes, percentage, _, _ in vote_distribution
             ],
             'hourly_votes': [
                 {'hour': hour.isoformat(), 'votes': votes}
@@ -313,7 +609,7 @@ class OptimizedQueries:
     def bulk_update_vote_counts(db: Session, poll_id: int):
         """Bulk update vote counts for all options in a poll."""
         # Use raw SQL for better performance
-        db.execute(text("""
+        update = """
             UPDATE poll_options 
             SET vote_count = (
                 SELECT COUNT(*) 
@@ -321,11 +617,17 @@ class OptimizedQueries:
                 WHERE user_votes.option_id = poll_options.id
             )
             WHERE poll_id = :poll_id
-        """), {'poll_id': poll_id})
+        """
+        if db.get_bind().dialect.update_returning:
+            counts = dict(db.execute(text(update + " RETURNING id, vote_count"), {'poll_id': poll_id}).all())
+        else:
+            db.execute(text(update), {'poll_id': poll_id})
+            counts = dict(db.query(PollOption.id, PollOption.vote_count).filter(PollOption.poll_id == poll_id).all())
         
-        # Clear related caches
-        CacheManager.clear_pattern(f"agora:poll_*:{poll_id}:*")
-        CacheManager.clear_pattern(f"agora:active_polls:*")
+        # Write the new counts through to cached polls instead of dropping every list
+        team_id = db.query(Poll.team_id).filter(Poll.id == poll_id).scalar()
+        CacheManager.update_poll_vote_counts(poll_id, team_id, counts)
+        CacheManager.delete(CacheManager.get_key("poll_analytics", poll_id))
     
     @staticmethod
     @performance_monitor("get_user_notifications")
@@ -338,12 +640,10 @@ class OptimizedQueries:
         if cached_result:
             return cached_result
         
-        notifications = db.query(Notification).filter(
-            and_(
-                Notification.user_id == user_id,
-                Notification.team_id == team_id
-            )
-        ).order_by(Notification.sent_at.desc()).limit(limit).all()
+        notifications = db.execute(lambda_stmt(lambda: select(Notification).where(
+            Notification.user_id == user_id,
+            Notification.team_id == team_id
+        ).order_by(Notification.sent_at.desc()).limit(limit))).scalars().all()
         
         # Cache result
         notification_data = [{
@@ -352,8 +652,8 @@ class OptimizedQueries:
             'notification_type': notif.notification_type,
             'title': notif.title,
             'message': notif.message,
-            'sent_at': notif.sent_at.isoformat(),
-            'read_at': notif.read_at.isoformat() if notif.read_at else None
+            'sent_at': notif.sent_at,
+            'read_at': notif.read_at
         } for notif in notifications]
         
         CacheManager.set(cache_key, notification_data, ttl=300)  # Cache for 5 minutes
@@ -372,6 +672,14 @@ def db_transaction(db: Session):
     finally:
         db.close()
 
+# Callbacks for caches kept by higher-level modules (e.g. the exporter's
+# ended-poll exports), so this module never imports them
+_poll_invalidation_hooks: List[Callable[[int], None]] = []
+
+def register_poll_invalidation_hook(hook: Callable[[int], None]):
+    """Call hook(poll_id) whenever a poll's caches are invalidated."""
+    _poll_invalidation_hooks.append(hook)
+
 def invalidate_poll_cache(poll_id: int):
     """Invalidate all cache entries related to a poll."""
     patterns = [
@@ -381,8 +689,10 @@ def invalidate_poll_cache(poll_id: int):
         f"agora:user_voted:{poll_id}:*"
     ]
     
-    for pattern in patterns:
-        CacheManager.clear_pattern(pattern)
+    CacheManager.clear_patterns(patterns)
+    _local_evict(_local_voted, lambda key: key[0] == poll_id)
+    for hook in _poll_invalidation_hooks:
+        hook(poll_id)
 
 def invalidate_user_cache(user_id: str, team_id: str):
     """Invalidate all cache entries related to a user."""
@@ -392,8 +702,16 @@ def invalidate_user_cache(user_id: str, team_id: str):
         f"agora:user_voted:*:{user_id}"
     ]
     
-    for pattern in patterns:
-        CacheManager.clear_pattern(pattern)
+    CacheManager.clear_patterns(patterns)
+    _local_evict(_local_roles, lambda key: key == (user_id, team_id))
+    _local_evict(_local_voted, lambda key: key[1] == user_id)
+
+@event.listens_for(UserRole, "after_insert")
+@event.listens_for(UserRole, "after_update")
+@event.listens_for(UserRole, "after_delete")
+def _user_role_changed(mapper, connection, target):
+    # Any writer, not just set_user_role, drops this worker's cached role
+    _local_evict(_local_roles, lambda key: key == (target.user_id, target.team_id))
 
 # Performance monitoring decorator for external use
 def monitor_performance(operation_name: str = None):
@@ -13,8 +13,8 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
-from sqlalchemy.orm import Session
-from models import SessionLocal, Poll, ScheduledPoll
+from sqlalchemy.orm import Session, undefer_group
+from models import SessionLocal, Poll, ScheduledPoll, ensure_time_partitions
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +51,11 @@ class ScheduledPollData:
     last_run: Optional[datetime] = None
     next_run: Optional[datetime] = None
     run_count: int = 0
+    
+    def __post_init__(self):
+        # One-off schedules fire exactly at scheduled_time
+        if self.next_run is None and self.schedule_type == ScheduleType.ONCE:
+            self.next_run = self.scheduled_time
 
 class PollScheduler:
     """Manages scheduled polls and automatic actions."""
@@ -64,6 +69,14 @@ class PollScheduler:
     def start(self):
         """Start the scheduler."""
         if not self.is_running:
+            # Keep the next months' notification/activity partitions created ahead of time
+            self.scheduler.add_job(
+                self._ensure_partitions,
+                trigger=CronTrigger(hour=0, minute=5),
+                id="ensure_time_partitions",
+                replace_existing=True,
+                next_run_time=datetime.now()
+            )
             self.scheduler.start()
             self.is_running = True
             logger.info("Poll scheduler started")
@@ -339,6 +352,7 @@ class PollScheduler:
                 is_active=scheduled_poll.is_active,
                 created_at=scheduled_poll.created_at,
                 last_run=scheduled_poll.last_run,
+                next_run=scheduled_poll.next_run,
                 run_count=scheduled_poll.run_count
             )
             
@@ -350,6 +364,18 @@ class PollScheduler:
         finally:
             db.close()
     
+    def _ensure_partitions(self):
+        """Pre-create upcoming monthly partitions (PostgreSQL only)."""
+        try:
+            db = SessionLocal()
+            ensure_time_partitions(db.connection())
+            db.commit()
+            
+        except Exception as e:
+            logger.error(f"Error creating time partitions: {e}")
+        finally:
+            db.close()
+    
     def _update_scheduled_poll_status(self, schedule_id: str, is_active: bool):
         """Update scheduled poll status in database."""
         try:
@@ -394,7 +420,7 @@ class PollScheduler:
             
             db_scheduled_polls = db.query(ScheduledPoll).filter(
                 ScheduledPoll.is_active == True
-            ).all()
+            ).options(undefer_group('payload')).all()
             
             for db_poll in db_scheduled_polls:
                 scheduled_poll = ScheduledPollData(
@@ -411,6 +437,7 @@ class PollScheduler:
                     is_active=db_poll.is_active,
                     created_at=db_poll.created_at,
                     last_run=db_poll.last_run,
+                    next_run=db_poll.next_run,
                     run_count=db_poll.run_count
                 )
                 
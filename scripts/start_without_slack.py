@@ -18,7 +18,7 @@ exec(open('database.py').read())
 # Create a simple FastAPI app without Slack
 from config import Config
 from api_middleware import APIMiddleware, handle_api_errors
-from monitoring import initialize_monitoring, get_metrics, get_health
+from monitoring import initialize_monitoring, get_metrics, get_health, CONTENT_TYPE_LATEST
 from dashboard_api import router as dashboard_router
 
 # Initialize monitoring system
@@ -51,14 +51,24 @@ async def root():
 @handle_api_errors
 async def health_check():
     """Health check endpoint."""
-    health_status = get_health()
+    health_status = await get_health()
     return health_status
 
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint."""
-    from fastapi.responses import PlainTextResponse
-    return PlainTextResponse(get_metrics(), media_type="text/plain")
+    from fastapi.responses import Response
+    return Response(get_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+@app.on_event("startup")
+async def startup_event():
+    """Start background system monitoring."""
+    system_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background system monitoring."""
+    system_monitor.stop()
 
 @app.post("/slack/events")
 async def slack_events_placeholder():
@@ -8,7 +8,7 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_, desc, asc, func
 from models import Poll, PollOption, VotedUser, UserVote, SessionLocal
 from performance import OptimizedQueries
@@ -125,7 +125,7 @@ class PollSearchEngine:
             base_query = base_query.offset(offset).limit(min(limit, self.max_results))
             
             # Execute query
-            polls = base_query.all()
+            polls = base_query.options(selectinload(Poll.options)).all()
             
             # Convert to search results
             results = []
@@ -210,7 +210,7 @@ class PollSearchEngine:
             base_query = base_query.order_by(desc(Poll.created_at))
             
             # Execute query
-            polls = base_query.all()
+            polls = base_query.options(selectinload(Poll.options)).all()
             
             # Convert to search results
             results = []
@@ -267,7 +267,7 @@ class PollSearchEngine:
                 Poll.id
             ).order_by(
                 desc('total_votes')
-            ).limit(limit).all()
+            ).options(selectinload(Poll.options)).limit(limit).all()
             
             # Convert to search results
             results = []
@@ -312,7 +312,7 @@ class PollSearchEngine:
                 base_query = base_query.filter(Poll.channel_id == channel_id)
             
             # Order by creation date (newest first)
-            polls = base_query.order_by(desc(Poll.created_at)).limit(limit).all()
+            polls = base_query.options(selectinload(Poll.options)).order_by(desc(Poll.created_at)).limit(limit).all()
             
             # Convert to search results
             results = []
@@ -385,7 +385,7 @@ class PollSearchEngine:
             # Most active day of week
             vote_days = db.query(
                 func.strftime('%w', VotedUser.voted_at).label('day_of_week'),
-                func.count(VotedUser.id).label('vote_count')
+                func.count().label('vote_count')
             ).join(
                 Poll, VotedUser.poll_id == Poll.id
             ).filter(
@@ -161,7 +161,7 @@ class EncryptionManager:
     def _derive_key(self) -> bytes:
         """Derive encryption key from configuration."""
         # Use a combination of secret key and salt
-        password = getattr(Config, 'SECRET_KEY', 'default-secret-key').encode()
+        password = (getattr(Config, 'SECRET_KEY', None) or 'default-secret-key').encode()
         salt = b'agora-salt-2024'  # In production, use random salt stored securely
         
         kdf = PBKDF2HMAC(
@@ -316,7 +316,7 @@ class SecurityAuditor:
         if not hasattr(Config, 'SLACK_SIGNING_SECRET') or not Config.SLACK_SIGNING_SECRET:
             findings['critical'].append('Slack signing secret not configured')
         
-        if not hasattr(Config, 'SECRET_KEY') or Config.SECRET_KEY == 'default-secret-key':
+        if not getattr(Config, 'SECRET_KEY', None) or Config.SECRET_KEY == 'default-secret-key':
             findings['high'].append('Default secret key being used')
         
         if getattr(Config, 'DEBUG', False):
@@ -7,7 +7,7 @@ import logging
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text, insert, delete
 from sqlalchemy.orm import sessionmaker
 import redis
 from contextlib import contextmanager
@@ -19,6 +19,7 @@ from .abstractions import (
     ConfigurationService, MonitoringService
 )
 from config import Config
+from database.config import set_sqlite_pragmas
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +50,9 @@ class SQLAlchemyDatabaseService(DatabaseService):
             })
         
         self.engine = create_engine(self.database_url, **engine_kwargs)
+        if self.engine.dialect.name == 'sqlite':
+            # Same pragmas as the app engine; foreign_keys=ON makes poll deletes cascade
+            event.listen(self.engine, "connect", set_sqlite_pragmas)
         self.session_factory = sessionmaker(bind=self.engine)
     
     @contextmanager
@@ -185,8 +189,9 @@ class SQLAlchemyPollRepository(PollRepository):
     def get_poll(self, poll_id: int) -> Optional[Dict[str, Any]]:
         """Get poll by ID."""
         with self.db_service.get_session() as session:
+            from sqlalchemy.orm import selectinload
             from models import Poll
-            poll = session.query(Poll).filter(Poll.id == poll_id).first()
+            poll = session.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
             if not poll:
                 return None
             
@@ -214,20 +219,23 @@ class SQLAlchemyPollRepository(PollRepository):
     def get_polls(self, team_id: str, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get polls with filters."""
         with self.db_service.get_session() as session:
-            from models import Poll
-            query = session.query(Poll).filter(Poll.team_id == team_id)
+            from models import Poll, PollStatusCode, list_polls_with_counts, is_code_label
+            criteria = [Poll.team_id == team_id]
             
             if filters:
+                # No poll can have a status outside the stored codes
+                if 'status' in filters and not is_code_label(PollStatusCode, filters['status']):
+                    return []
                 if 'status' in filters:
-                    query = query.filter(Poll.status == filters['status'])
+                    criteria.append(Poll.status == filters['status'])
                 if 'creator_id' in filters:
-                    query = query.filter(Poll.creator_id == filters['creator_id'])
+                    criteria.append(Poll.creator_id == filters['creator_id'])
                 if 'date_from' in filters:
-                    query = query.filter(Poll.created_at >= filters['date_from'])
+                    criteria.append(Poll.created_at >= filters['date_from'])
                 if 'date_to' in filters:
-                    query = query.filter(Poll.created_at <= filters['date_to'])
+                    criteria.append(Poll.created_at <= filters['date_to'])
             
-            polls = query.order_by(Poll.created_at.desc()).all()
+            rows = list_polls_with_counts(session, *criteria)
             
             return [
                 {
@@ -240,15 +248,15 @@ class SQLAlchemyPollRepository(PollRepository):
                     'status': poll.status,
                     'created_at': poll.created_at,
                     'ended_at': poll.ended_at,
-                    'total_votes': sum(opt.vote_count for opt in poll.options)
+                    'total_votes': total_votes
                 }
-                for poll in polls
+                for poll, total_votes, _, _ in rows
             ]
     
     def create_poll(self, poll_data: Dict[str, Any]) -> int:
         """Create new poll."""
         with self.db_service.get_session() as session:
-            from models import Poll, PollOption
+            from models import Poll, PollOption, refresh_poll_summary
             
             poll = Poll(
                 question=poll_data['question'],
@@ -262,14 +270,12 @@ class SQLAlchemyPollRepository(PollRepository):
             session.add(poll)
             session.flush()  # Get the ID
             
-            # Add options
-            for i, option_text in enumerate(poll_data['options']):
-                option = PollOption(
-                    poll_id=poll.id,
-                    text=option_text,
-                    order_index=i
-                )
-                session.add(option)
+            # Add options in one batched INSERT
+            session.execute(insert(PollOption), [
+                {'poll_id': poll.id, 'text': option_text, 'order_index': i}
+                for i, option_text in enumerate(poll_data['options'])
+            ])
+            refresh_poll_summary(session.connection(), poll.id)
             
             return poll.id
     
@@ -285,23 +291,24 @@ class SQLAlchemyPollRepository(PollRepository):
             for key, value in updates.items():
                 if hasattr(poll, key):
                     setattr(poll, key, value)
-            
-            return True
+        
+        # After the session commits, so stale data can't be re-cached in between
+        from performance import invalidate_poll_cache
+        invalidate_poll_cache(poll_id)
+        return True
     
     def delete_poll(self, poll_id: int) -> bool:
         """Delete poll."""
         with self.db_service.get_session() as session:
-            from models import Poll, PollOption, UserVote, VotedUser
-            
-            # Delete related records
-            session.query(UserVote).filter(UserVote.poll_id == poll_id).delete()
-            session.query(VotedUser).filter(VotedUser.poll_id == poll_id).delete()
-            session.query(PollOption).filter(PollOption.poll_id == poll_id).delete()
-            
-            # Delete poll
-            deleted = session.query(Poll).filter(Poll.id == poll_id).delete()
+            from models import Poll
             
-            return deleted > 0
+            # Options, votes and other child rows go with it via ON DELETE CASCADE
+            deleted = session.execute(delete(Poll).where(Poll.id == poll_id)).rowcount
+        
+        if deleted:
+            from performance import invalidate_poll_cache
+            invalidate_poll_cache(poll_id)
+        return deleted > 0
 
 
 class SimpleEventPublisher(EventPublisher):
@@ -353,15 +360,17 @@ class SimpleNotificationService(NotificationService):
         with self.db_service.get_session() as session:
             from models import Notification
             
-            for notif_data in notifications:
-                notification = Notification(
-                    user_id=notif_data['user_id'],
-                    team_id=notif_data.get('team_id', ''),
-                    notification_type=notif_data['notification_type'],
-                    title=notif_data.get('title', ''),
-                    message=notif_data['message']
-                )
-                session.add(notification)
+            if notifications:
+                session.execute(insert(Notification), [
+                    {
+                        'user_id': notif_data['user_id'],
+                        'team_id': notif_data.get('team_id', ''),
+                        'notification_type': notif_data['notification_type'],
+                        'title': notif_data.get('title', ''),
+                        'message': notif_data['message']
+                    }
+                    for notif_data in notifications
+                ])
             
             return True
 
@@ -0,0 +1,60 @@
+"""
+In-process settings cache for Agora Slack app.
+Keeps team and notification settings lookups off the database on every write.
+"""
+
+import threading
+from sqlalchemy import event
+from models import TeamSettings, NotificationSettings
+
+try:
+    from cachetools import TTLCache, cached
+except ImportError:  # Optional; without it every lookup reads the database
+    TTLCache = cached = None
+
+SETTINGS_CACHE_SIZE = 10_000
+SETTINGS_CACHE_TTL = 60  # seconds
+
+def _new_cache():
+    return TTLCache(maxsize=SETTINGS_CACHE_SIZE, ttl=SETTINGS_CACHE_TTL) if TTLCache is not None else None
+
+# Keyed by (team_id,) and (user_id, team_id), the loaders' positional arguments
+team_settings_cache = _new_cache()
+notification_settings_cache = _new_cache()
+
+# TTLCache isn't thread-safe; handlers run on Bolt's worker threads
+_lock = threading.Lock()
+
+def cached_settings(cache):
+    """Cache a settings loader's results, keyed by its positional arguments."""
+    def decorator(load):
+        if cache is None:
+            return load
+        return cached(cache, key=lambda *args: args, lock=_lock)(load)
+    return decorator
+
+def invalidate(cache, key: tuple):
+    """Drop one cached settings row."""
+    if cache is None:
+        return
+    with _lock:
+        cache.pop(key, None)
+
+def clear_settings_cache():
+    """Drop every cached settings row."""
+    for cache in (team_settings_cache, notification_settings_cache):
+        if cache is not None:
+            with _lock:
+                cache.clear()
+
+@event.listens_for(TeamSettings, "after_insert")
+@event.listens_for(TeamSettings, "after_update")
+@event.listens_for(TeamSettings, "after_delete")
+def _team_settings_changed(mapper, connection, target):
+    invalidate(team_settings_cache, (target.team_id,))
+
+@event.listens_for(NotificationSettings, "after_insert")
+@event.listens_for(NotificationSettings, "after_update")
+@event.listens_for(NotificationSettings, "after_delete")
+def _notification_settings_changed(mapper, connection, target):
+    invalidate(notification_settings_cache, (target.user_id, target.team_id))
@@ -1,8 +1,12 @@
 from slack_bolt import App
 from slack_bolt.context.say import Say
 from slack_bolt.context.ack import Ack
-from sqlalchemy.orm import Session
-from models import Poll, PollOption, VotedUser, UserVote, PollAnalytics, VoteActivity, UserRole, TeamSettings, NotificationSettings, Notification, PollShare, CrossChannelView, get_db
+from sqlalchemy import insert, select, delete, literal, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from models import Poll, PollOption, VotedUser, UserVote, PollAnalytics, VoteActivity, UserRole, TeamSettings, NotificationSettings, Notification, PollShare, CrossChannelView, get_db, rebuild_poll_analytics, refresh_poll_summary, bump_option
+from settings_cache import cached_settings, team_settings_cache, notification_settings_cache
+from performance import invalidate_poll_cache, invalidate_user_cache
 from datetime import datetime
 import logging
 import re
@@ -109,7 +113,9 @@ def register_handlers(app: App):
                 # Send notifications
                 db = next(get_db())
                 try:
-                    total_votes = sum(option.vote_count for option in db.query(Poll).filter(Poll.id == poll_id).first().options)
+                    total_votes = db.query(func.coalesce(func.sum(PollOption.vote_count), 0)).filter(
+                        PollOption.poll_id == poll_id
+                    ).scalar()
                     notify_vote_milestone(app, poll_id, total_votes)
                     notify_close_race(app, poll_id)
                 finally:
@@ -299,13 +305,12 @@ def create_poll(question: str, options: list, team_id: str, channel_id: str, use
         db.commit()
         db.refresh(poll)
         
-        for i, option_text in enumerate(options):
-            option = PollOption(
-                poll_id=poll.id,
-                text=option_text,
-                order_index=i
-            )
-            db.add(option)
+        # One batched INSERT for all options instead of a unit-of-work row each
+        db.execute(insert(PollOption), [
+            {'poll_id': poll.id, 'text': option_text, 'order_index': i}
+            for i, option_text in enumerate(options)
+        ])
+        refresh_poll_summary(db.connection(), poll.id)
         
         db.commit()
         return poll.id
@@ -315,7 +320,7 @@ def create_poll(question: str, options: list, team_id: str, channel_id: str, use
 def send_poll_to_channel(app: App, poll_id: int, channel_id: str):
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll:
             return
         
@@ -446,16 +451,20 @@ def process_vote(poll_id: int, option_id: int, user_id: str) -> bool:
         
         user_vote = UserVote(poll_id=poll_id, user_id=user_id, option_id=option_id)
         db.add(user_vote)
+        # Queued, not executed: the flush writes it after the vote inserts, so a
+        # rejected vote (SQLite runs in autocommit mode) never bumps the count
+        bump_option(db, option_id, poll_id=poll_id)
         
-        option = db.query(PollOption).filter(PollOption.id == option_id).first()
-        if option:
-            option.vote_count += 1
+        # PollAnalytics/VoteActivity/PollSummary are updated once per flush by models' hooks
+        try:
+            db.flush()
+        except IntegrityError:
+            # A concurrent vote by the same user won the uq_poll_user/uq_poll_user_option race
+            db.rollback()
+            return False
         
         db.commit()
         
-        # Update analytics after successful vote
-        update_poll_analytics(poll_id)
-        
         return True
     finally:
         db.close()
@@ -477,7 +486,7 @@ def end_poll(poll_id: int, user_id: str) -> bool:
 def update_poll_message(app: App, poll_id: int, channel_id: str, message_ts: str):
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll:
             return
         
@@ -496,18 +505,18 @@ def generate_detailed_results(poll_id: int) -> str:
     """Generate detailed analytics text for poll results"""
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll:
             return "❌ Poll not found"
         
-        # Update analytics before generating results
-        update_poll_analytics(poll_id)
+        # Analytics are maintained per vote; only polls without a row need a rebuild
+        analytics = db.query(PollAnalytics).filter(PollAnalytics.poll_id == poll_id).first()
+        if not analytics:
+            update_poll_analytics(poll_id)
+            analytics = db.query(PollAnalytics).filter(PollAnalytics.poll_id == poll_id).first()
         
         total_votes = sum(option.vote_count for option in poll.options)
-        unique_voters = len(poll.voted_users)
-        
-        # Get analytics data
-        analytics = db.query(PollAnalytics).filter(PollAnalytics.poll_id == poll_id).first()
+        unique_voters = db.query(func.count()).select_from(VotedUser).filter(VotedUser.poll_id == poll_id).scalar()
         
         # Calculate time metrics
         poll_duration = None
@@ -591,96 +600,10 @@ def generate_detailed_results(poll_id: int) -> str:
         db.close()
 
 def update_poll_analytics(poll_id: int):
-    """Update or create analytics data for a poll"""
+    """Rebuild analytics data for a poll from its votes"""
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
-        if not poll:
-            return
-        
-        # Calculate metrics
-        total_votes = sum(option.vote_count for option in poll.options)
-        unique_voters = len(poll.voted_users)
-        
-        # Calculate participation rate (simplified - could be enhanced with channel member count)
-        participation_rate = min(100.0, (unique_voters / max(1, total_votes)) * 100)
-        
-        # Calculate average response time
-        avg_response_time = 0.0
-        if poll.user_votes:
-            response_times = []
-            for vote in poll.user_votes:
-                response_time = (vote.voted_at - poll.created_at).total_seconds() / 60  # minutes
-                response_times.append(response_time)
-            avg_response_time = sum(response_times) / len(response_times)
-        
-        # Find peak voting hour
-        peak_voting_hour = None
-        if poll.user_votes:
-            hour_counts = {}
-            for vote in poll.user_votes:
-                hour = vote.voted_at.hour
-                hour_counts[hour] = hour_counts.get(hour, 0) + 1
-            if hour_counts:
-                peak_voting_hour = max(hour_counts, key=hour_counts.get)
-        
-        # Update or create analytics
-        analytics = db.query(PollAnalytics).filter(PollAnalytics.poll_id == poll_id).first()
-        if analytics:
-            analytics.total_votes = total_votes
-            analytics.unique_voters = unique_voters
-            analytics.participation_rate = participation_rate
-            analytics.avg_response_time = avg_response_time
-            analytics.peak_voting_hour = peak_voting_hour
-            analytics.updated_at = datetime.now()
-        else:
-            analytics = PollAnalytics(
-                poll_id=poll_id,
-                total_votes=total_votes,
-                unique_voters=unique_voters,
-                participation_rate=participation_rate,
-                avg_response_time=avg_response_time,
-                peak_voting_hour=peak_voting_hour
-            )
-            db.add(analytics)
-        
-        # Update vote activity tracking
-        update_vote_activity(poll_id)
-        
-        db.commit()
-    
-    finally:
-        db.close()
-
-def update_vote_activity(poll_id: int):
-    """Update hourly vote activity tracking"""
-    db = next(get_db())
-    try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
-        if not poll:
-            return
-        
-        # Clear existing activity data
-        db.query(VoteActivity).filter(VoteActivity.poll_id == poll_id).delete()
-        
-        # Calculate hourly activity
-        hour_counts = {}
-        for vote in poll.user_votes:
-            hour = vote.voted_at.hour
-            date = vote.voted_at.date()
-            key = (hour, date)
-            hour_counts[key] = hour_counts.get(key, 0) + 1
-        
-        # Store activity data
-        for (hour, date), count in hour_counts.items():
-            activity = VoteActivity(
-                poll_id=poll_id,
-                hour=hour,
-                vote_count=count,
-                date=datetime.combine(date, datetime.min.time())
-            )
-            db.add(activity)
-        
+        rebuild_poll_analytics(db.connection(), poll_id)
         db.commit()
     
     finally:
@@ -762,6 +685,7 @@ def set_user_role(user_id: str, team_id: str, role: str, assigned_by: str) -> bo
             db.add(user_role)
         
         db.commit()
+        invalidate_user_cache(user_id, team_id)
         return True
     finally:
         db.close()
@@ -778,6 +702,7 @@ def check_permission(user_id: str, team_id: str, action: str) -> bool:
     
     return action in permissions.get(role, [])
 
+@cached_settings(team_settings_cache)
 def get_team_settings(team_id: str) -> TeamSettings:
     """Get team settings, creating default if not exists"""
     db = next(get_db())
@@ -909,7 +834,7 @@ def handle_admin_command(app: App, text: str, team_id: str, user_id: str, say):
             show_all = len(parts) > 2 and parts[2] == "all"
             
             # List polls for the team
-            query = db.query(Poll).filter(Poll.team_id == team_id)
+            query = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.team_id == team_id)
             
             if not show_all:
                 # Default: only show active polls
@@ -999,18 +924,10 @@ def handle_admin_command(app: App, text: str, team_id: str, user_id: str, say):
             # Get poll info before deletion
             poll_question = poll.question
             
-            # Delete related records first (due to foreign key constraints)
-            db.query(UserVote).filter(UserVote.poll_id == poll_id).delete()
-            db.query(VotedUser).filter(VotedUser.poll_id == poll_id).delete()
-            db.query(PollOption).filter(PollOption.poll_id == poll_id).delete()
-            db.query(PollAnalytics).filter(PollAnalytics.poll_id == poll_id).delete()
-            db.query(VoteActivity).filter(VoteActivity.poll_id == poll_id).delete()
-            db.query(Notification).filter(Notification.poll_id == poll_id).delete()
-            db.query(PollShare).filter(PollShare.poll_id == poll_id).delete()
-            
-            # Delete the poll itself
-            db.delete(poll)
+            # Related records are removed by the database via ON DELETE CASCADE
+            db.execute(delete(Poll).where(Poll.id == poll_id))
             db.commit()
+            invalidate_poll_cache(poll_id)
             
             safe_say(app, say, f"✅ Poll ID {poll_id} '*{poll_question}*' has been permanently removed.", user_id)
             
@@ -1026,6 +943,7 @@ def handle_admin_command(app: App, text: str, team_id: str, user_id: str, say):
 
 # Notification System Functions
 
+@cached_settings(notification_settings_cache)
 def get_notification_settings(user_id: str, team_id: str) -> NotificationSettings:
     """Get notification settings for a user, creating defaults if not exists"""
     db = next(get_db())
@@ -1071,22 +989,25 @@ def send_notification(app: App, user_id: str, team_id: str, notification_type: s
         finally:
             db.close()
         
-        # Send DM to user
-        try:
-            response = app.client.conversations_open(users=[user_id])
-            channel_id = response["channel"]["id"]
-            
-            app.client.chat_postMessage(
-                channel=channel_id,
-                text=f"🔔 *{title}*\n{message}",
-                parse="full"
-            )
-        except Exception as e:
-            logger.error(f"Failed to send DM notification: {e}")
+        send_notification_dm(app, user_id, title, message)
     
     except Exception as e:
         logger.error(f"Error sending notification: {e}")
 
+def send_notification_dm(app: App, user_id: str, title: str, message: str):
+    """Send a stored notification to the user as a DM"""
+    try:
+        response = app.client.conversations_open(users=[user_id])
+        channel_id = response["channel"]["id"]
+        
+        app.client.chat_postMessage(
+            channel=channel_id,
+            text=f"🔔 *{title}*\n{message}",
+            parse="full"
+        )
+    except Exception as e:
+        logger.error(f"Failed to send DM notification: {e}")
+
 def notify_poll_created(app: App, poll_id: int, creator_id: str, team_id: str):
     """Notify team members about a new poll"""
     db = next(get_db())
@@ -1095,24 +1016,38 @@ def notify_poll_created(app: App, poll_id: int, creator_id: str, team_id: str):
         if not poll:
             return
         
-        # Get all team members who want poll creation notifications
-        settings = db.query(NotificationSettings).filter(
+        title = "New Poll Created"
+        message = f"📊 <@{creator_id}> created a new poll: *{poll.question}*\nGo vote in <#{poll.channel_id}>!"
+        
+        # All team members who want poll creation notifications
+        subscribers = select(
+            NotificationSettings.user_id,
+            NotificationSettings.team_id,
+            literal(poll_id),
+            literal("poll_created"),
+            literal(title),
+            literal(message)
+        ).where(
             NotificationSettings.team_id == team_id,
             NotificationSettings.poll_created == True,
             NotificationSettings.user_id != creator_id  # Don't notify creator
-        ).all()
+        )
+        user_ids = db.scalars(subscribers).all()
+        if not user_ids:
+            return
         
-        for setting in settings:
-            send_notification(
-                app=app,
-                user_id=setting.user_id,
-                team_id=team_id,
-                notification_type="poll_created",
-                title="New Poll Created",
-                message=f"📊 <@{creator_id}> created a new poll: *{poll.question}*\nGo vote in <#{poll.channel_id}>!",
-                poll_id=poll_id
-            )
+        # Store every subscriber's notification in one server-side INSERT ... SELECT
+        db.execute(insert(Notification).from_select(
+            ['user_id', 'team_id', 'poll_id', 'notification_type', 'title', 'message'],
+            subscribers
+        ))
+        db.commit()
+        
+        for user_id in user_ids:
+            send_notification_dm(app, user_id, title, message)
     
+    except Exception as e:
+        logger.error(f"Error notifying poll creation: {e}")
     finally:
         db.close()
 
@@ -1144,7 +1079,7 @@ def notify_close_race(app: App, poll_id: int):
     """Notify when there's a close race between top options"""
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll or len(poll.options) < 2:
             return
         
@@ -1170,7 +1105,7 @@ def notify_poll_ended(app: App, poll_id: int):
     """Notify about poll ending and results"""
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll:
             return
         
@@ -1361,7 +1296,7 @@ def share_poll_to_channel(app: App, poll_id: int, channel_id: str, shared_by: st
     try:
         db = next(get_db())
         try:
-            poll = db.query(Poll).filter(Poll.id == poll_id).first()
+            poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
             if not poll:
                 return False
             
@@ -1420,7 +1355,8 @@ def get_cross_channel_polls(team_id: str, user_id: str) -> list:
             view = CrossChannelView(
                 user_id=user_id,
                 team_id=team_id,
-                poll_id=poll.id
+                poll_id=poll.id,
+                viewed_at=datetime.now()
             )
             db.merge(view)  # Update if exists
         
@@ -1434,7 +1370,7 @@ def update_shared_poll_messages(app: App, poll_id: int):
     """Update poll message in all shared channels"""
     db = next(get_db())
     try:
-        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        poll = db.query(Poll).options(selectinload(Poll.options)).filter(Poll.id == poll_id).first()
         if not poll:
             return
         
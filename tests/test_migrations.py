@@ -0,0 +1,315 @@
+import sqlite3
+import pytest
+from sqlalchemy import inspect, text
+from config import Config
+from database.migrations import get_migration_manager
+
+# Schema of a database created by the original release (migrations 001-005),
+# as SQLite recorded it
+BASELINE_SCHEMA = """
+CREATE TABLE polls (
+    id INTEGER NOT NULL, 
+    question TEXT NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    channel_id VARCHAR(255) NOT NULL, 
+    creator_id VARCHAR(255) NOT NULL, 
+    vote_type VARCHAR(50) NOT NULL, 
+    status VARCHAR(50), 
+    created_at DATETIME, 
+    ended_at DATETIME, 
+    message_ts VARCHAR(255), 
+    PRIMARY KEY (id)
+);
+CREATE INDEX idx_creator_created ON polls (creator_id, created_at);
+CREATE INDEX idx_channel_status ON polls (channel_id, status);
+CREATE INDEX ix_polls_id ON polls (id);
+CREATE INDEX ix_polls_creator_id ON polls (creator_id);
+CREATE INDEX idx_team_created ON polls (team_id, created_at);
+CREATE INDEX ix_polls_message_ts ON polls (message_ts);
+CREATE INDEX ix_polls_channel_id ON polls (channel_id);
+CREATE INDEX ix_polls_status ON polls (status);
+CREATE INDEX idx_team_status ON polls (team_id, status);
+CREATE INDEX ix_polls_created_at ON polls (created_at);
+CREATE INDEX ix_polls_team_id ON polls (team_id);
+CREATE TABLE user_roles (
+    id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    role VARCHAR(50), 
+    permissions TEXT, 
+    assigned_by VARCHAR(255), 
+    assigned_at DATETIME, 
+    is_active BOOLEAN, 
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_user_roles_is_active ON user_roles (is_active);
+CREATE INDEX ix_user_roles_team_id ON user_roles (team_id);
+CREATE INDEX ix_user_roles_role ON user_roles (role);
+CREATE INDEX idx_user_team ON user_roles (user_id, team_id);
+CREATE INDEX ix_user_roles_id ON user_roles (id);
+CREATE INDEX idx_team_role ON user_roles (team_id, role);
+CREATE UNIQUE INDEX ix_user_roles_user_id ON user_roles (user_id);
+CREATE TABLE team_settings (
+    id INTEGER NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    allow_public_polls BOOLEAN, 
+    require_approval BOOLEAN, 
+    max_options_per_poll INTEGER, 
+    max_polls_per_user_per_day INTEGER, 
+    default_poll_duration_hours INTEGER, 
+    created_at DATETIME, 
+    updated_at DATETIME, 
+    PRIMARY KEY (id), 
+    UNIQUE (team_id)
+);
+CREATE INDEX ix_team_settings_id ON team_settings (id);
+CREATE TABLE notification_settings (
+    id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    poll_created BOOLEAN, 
+    poll_ended BOOLEAN, 
+    vote_milestone BOOLEAN, 
+    close_race BOOLEAN, 
+    role_changed BOOLEAN, 
+    daily_summary BOOLEAN, 
+    created_at DATETIME, 
+    updated_at DATETIME, 
+    PRIMARY KEY (id)
+);
+CREATE INDEX ix_notification_settings_id ON notification_settings (id);
+CREATE INDEX idx_user_team_settings ON notification_settings (user_id, team_id);
+CREATE INDEX ix_notification_settings_team_id ON notification_settings (team_id);
+CREATE INDEX ix_notification_settings_user_id ON notification_settings (user_id);
+CREATE TABLE poll_options (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    text TEXT NOT NULL, 
+    vote_count INTEGER, 
+    order_index INTEGER NOT NULL, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX idx_poll_order ON poll_options (poll_id, order_index);
+CREATE INDEX ix_poll_options_vote_count ON poll_options (vote_count);
+CREATE INDEX ix_poll_options_id ON poll_options (id);
+CREATE INDEX ix_poll_options_poll_id ON poll_options (poll_id);
+CREATE TABLE voted_users (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    voted_at DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_voted_users_poll_id ON voted_users (poll_id);
+CREATE INDEX idx_poll_user ON voted_users (poll_id, user_id);
+CREATE INDEX ix_voted_users_user_id ON voted_users (user_id);
+CREATE INDEX ix_voted_users_id ON voted_users (id);
+CREATE INDEX idx_user_voted ON voted_users (user_id, voted_at);
+CREATE INDEX ix_voted_users_voted_at ON voted_users (voted_at);
+CREATE TABLE poll_analytics (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    total_votes INTEGER, 
+    unique_voters INTEGER, 
+    participation_rate FLOAT, 
+    avg_response_time FLOAT, 
+    peak_voting_hour INTEGER, 
+    created_at DATETIME, 
+    updated_at DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_poll_analytics_id ON poll_analytics (id);
+CREATE TABLE vote_activity (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    hour INTEGER NOT NULL, 
+    vote_count INTEGER, 
+    date DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_vote_activity_id ON vote_activity (id);
+CREATE TABLE notifications (
+    id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    poll_id INTEGER, 
+    notification_type VARCHAR(50) NOT NULL, 
+    title VARCHAR(255) NOT NULL, 
+    message TEXT NOT NULL, 
+    sent_at DATETIME, 
+    read_at DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX idx_user_unread ON notifications (user_id, read_at);
+CREATE INDEX ix_notifications_poll_id ON notifications (poll_id);
+CREATE INDEX ix_notifications_sent_at ON notifications (sent_at);
+CREATE INDEX idx_poll_type ON notifications (poll_id, notification_type);
+CREATE INDEX ix_notifications_team_id ON notifications (team_id);
+CREATE INDEX ix_notifications_notification_type ON notifications (notification_type);
+CREATE INDEX idx_user_sent ON notifications (user_id, sent_at);
+CREATE INDEX ix_notifications_id ON notifications (id);
+CREATE INDEX ix_notifications_user_id ON notifications (user_id);
+CREATE TABLE poll_shares (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    channel_id VARCHAR(255) NOT NULL, 
+    message_ts VARCHAR(255), 
+    shared_by VARCHAR(255) NOT NULL, 
+    shared_at DATETIME, 
+    is_active BOOLEAN, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_poll_shares_shared_by ON poll_shares (shared_by);
+CREATE INDEX ix_poll_shares_id ON poll_shares (id);
+CREATE INDEX ix_poll_shares_message_ts ON poll_shares (message_ts);
+CREATE INDEX ix_poll_shares_is_active ON poll_shares (is_active);
+CREATE INDEX idx_channel_active ON poll_shares (channel_id, is_active);
+CREATE INDEX ix_poll_shares_poll_id ON poll_shares (poll_id);
+CREATE INDEX idx_poll_channel ON poll_shares (poll_id, channel_id);
+CREATE INDEX ix_poll_shares_shared_at ON poll_shares (shared_at);
+CREATE INDEX ix_poll_shares_channel_id ON poll_shares (channel_id);
+CREATE TABLE cross_channel_views (
+    id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    team_id VARCHAR(255) NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    viewed_at DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_cross_channel_views_id ON cross_channel_views (id);
+CREATE TABLE scheduled_polls (
+    id VARCHAR(255) NOT NULL, 
+    poll_id INTEGER, 
+    team_id VARCHAR(255) NOT NULL, 
+    channel_id VARCHAR(255) NOT NULL, 
+    creator_id VARCHAR(255) NOT NULL, 
+    action VARCHAR(50) NOT NULL, 
+    schedule_type VARCHAR(50) NOT NULL, 
+    scheduled_time DATETIME NOT NULL, 
+    cron_expression VARCHAR(255), 
+    poll_data JSON, 
+    is_active BOOLEAN, 
+    created_at DATETIME, 
+    last_run DATETIME, 
+    next_run DATETIME, 
+    run_count INTEGER, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id)
+);
+CREATE INDEX ix_scheduled_polls_is_active ON scheduled_polls (is_active);
+CREATE INDEX idx_team_active ON scheduled_polls (team_id, is_active);
+CREATE INDEX ix_scheduled_polls_scheduled_time ON scheduled_polls (scheduled_time);
+CREATE INDEX idx_action_active ON scheduled_polls (action, is_active);
+CREATE INDEX ix_scheduled_polls_team_id ON scheduled_polls (team_id);
+CREATE INDEX ix_scheduled_polls_next_run ON scheduled_polls (next_run);
+CREATE INDEX idx_scheduled_active_time ON scheduled_polls (is_active, scheduled_time);
+CREATE TABLE user_votes (
+    id INTEGER NOT NULL, 
+    poll_id INTEGER NOT NULL, 
+    user_id VARCHAR(255) NOT NULL, 
+    option_id INTEGER NOT NULL, 
+    voted_at DATETIME, 
+    PRIMARY KEY (id), 
+    FOREIGN KEY(poll_id) REFERENCES polls (id), 
+    FOREIGN KEY(option_id) REFERENCES poll_options (id)
+);
+CREATE INDEX idx_poll_option ON user_votes (poll_id, option_id);
+CREATE INDEX ix_user_votes_voted_at ON user_votes (voted_at);
+CREATE INDEX ix_user_votes_user_id ON user_votes (user_id);
+CREATE INDEX ix_user_votes_id ON user_votes (id);
+CREATE INDEX idx_option_voted ON user_votes (option_id, voted_at);
+CREATE INDEX ix_user_votes_option_id ON user_votes (option_id);
+CREATE INDEX idx_user_poll ON user_votes (user_id, poll_id);
+CREATE INDEX ix_user_votes_poll_id ON user_votes (poll_id);
+CREATE INDEX idx_polls_team_status ON polls(team_id, status);
+CREATE INDEX idx_polls_channel_status ON polls(channel_id, status);
+CREATE INDEX idx_polls_creator_created ON polls(creator_id, created_at);
+CREATE INDEX idx_poll_options_poll_order ON poll_options(poll_id, order_index);
+CREATE INDEX idx_voted_users_poll_user ON voted_users(poll_id, user_id);
+CREATE INDEX idx_user_votes_poll_option ON user_votes(poll_id, option_id);
+CREATE INDEX idx_user_roles_user_team ON user_roles(user_id, team_id);
+CREATE INDEX idx_notifications_user_sent ON notifications(user_id, sent_at);
+CREATE INDEX idx_poll_shares_poll_channel ON poll_shares(poll_id, channel_id);
+"""
+
+BASELINE_ROWS = """
+INSERT INTO polls (id, team_id, channel_id, creator_id, question, vote_type, status, created_at)
+    VALUES (1, 'T1', 'C1', 'U0', 'Q?', 'single', 'active', '2026-10-01 10:00:00');
+INSERT INTO poll_options (id, poll_id, text, order_index, vote_count) VALUES (1, 1, 'A', 0, 2), (2, 1, 'B', 1, 0);
+INSERT INTO user_votes (poll_id, user_id, option_id, voted_at)
+    VALUES (1, 'U1', 1, '2026-10-01 10:05:00'), (1, 'U2', 1, '2026-10-01 10:15:00');
+INSERT INTO voted_users (poll_id, user_id, voted_at)
+    VALUES (1, 'U1', '2026-10-01 10:05:00'), (1, 'U2', '2026-10-01 10:15:00');
+INSERT INTO vote_activity (poll_id, hour, vote_count, date)
+    VALUES (1, 10, 1, '2026-10-01 00:00:00.000000'), (1, 10, 1, '2026-10-01 00:00:00.000000');
+INSERT INTO scheduled_polls (id, poll_id, team_id, channel_id, creator_id, action, schedule_type, scheduled_time, is_active, created_at, next_run, run_count)
+    VALUES ('s1', 1, 'T1', 'C1', 'U0', 'end', 'once', '2030-01-01 09:00:00', 1, '2026-10-01 10:00:00', '2030-01-01 09:00:00.000000', 0);
+"""
+
+@pytest.fixture
+def baseline_db(tmp_path, monkeypatch):
+    path = tmp_path / "baseline.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.executescript(BASELINE_ROWS)
+    connection.commit()
+    connection.close()
+    
+    monkeypatch.setenv("AGORA_SKIP_MIGRATION_CACHE", "1")
+    monkeypatch.setattr(Config, "DATABASE_URL", f"sqlite:///{path}")
+    
+    manager = get_migration_manager()
+    with manager._conn.begin():
+        for migration in manager.migrations[:5]:
+            manager._conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:version, :description, '2026-10-01')"),
+                {'version': migration.version, 'description': migration.description}
+            )
+    return get_migration_manager()
+
+def index_names(engine, table):
+    return {index['name'] for index in inspect(engine).get_indexes(table)}
+
+class TestBaselineUpgrade:
+    def test_migrates_up_to_latest(self, baseline_db):
+        assert baseline_db.get_migration_status()['pending_migrations'][0] == "006"
+        
+        assert baseline_db.migrate_up() is True
+        
+        status = baseline_db.get_migration_status()
+        assert status['last_applied'] == "018"
+        assert status['pending_count'] == 0
+        assert 'idx_vote_activity_poll_hour' in index_names(baseline_db.engine, 'vote_activity')
+        with baseline_db.engine.connect() as connection:
+            # 013 merges the duplicate hourly buckets before adding the unique index
+            assert connection.execute(text("SELECT poll_id, hour, vote_count FROM vote_activity")).all() == [(1, 10, 2)]
+            assert connection.execute(text("SELECT next_run_epoch FROM scheduled_polls")).scalar() is not None
+            assert connection.execute(text("SELECT total_votes, unique_voters FROM poll_summary")).all() == [(2, 2)]
+            assert connection.execute(text("SELECT count(*) FROM user_votes")).scalar() == 2
+    
+    def test_migrates_back_down_to_baseline(self, baseline_db):
+        assert baseline_db.migrate_up() is True
+        
+        assert baseline_db.migrate_down("005") is True
+        
+        status = baseline_db.get_migration_status()
+        assert status['last_applied'] == "005"
+        assert status['pending_migrations'][-1] == "018"
+        inspector = inspect(baseline_db.engine)
+        assert 'poll_summary' not in inspector.get_table_names()
+        assert 'idx_vote_activity_poll_hour' not in index_names(baseline_db.engine, 'vote_activity')
+        assert 'next_run_epoch' not in {column['name'] for column in inspector.get_columns('scheduled_polls')}
+        with baseline_db.engine.connect() as connection:
+            # 007's SMALLINT codes are turned back into labels
+            assert connection.execute(text("SELECT status, vote_type FROM polls")).all() == [('active', 'single')]
+            assert connection.execute(text("SELECT count(*) FROM user_votes")).scalar() == 2
+        
+        # And the downgraded database upgrades cleanly again
+        assert baseline_db.migrate_up() is True
@@ -0,0 +1,47 @@
+import pytest
+from prometheus_client import CollectorRegistry, Histogram
+from monitoring import MetricsBuffer, _observe_batch
+
+# Includes exact bucket bounds (first bound >= value wins) and values past the last bound
+DURATIONS = [0.0, 0.004, 0.005, 0.0051, 0.1, 0.25, 0.999999, 1.0, 2.5, 7.5, 10.0, 12.345678, 0.005, 0.1]
+
+def histogram(registry):
+    return Histogram('test_duration_seconds', 'Test durations', ['endpoint'], registry=registry)
+
+def samples(registry):
+    return {
+        (sample.name, sample.labels.get('le')): sample.value
+        for family in registry.collect()
+        for sample in family.samples
+        if sample.name.endswith(('_bucket', '_count', '_sum'))
+    }
+
+def assert_same_samples(batched, direct):
+    assert batched.keys() == direct.keys()
+    for key, value in direct.items():
+        assert batched[key] == pytest.approx(value), key
+
+class TestHistogramBatching:
+    def test_observe_batch_matches_observe(self):
+        direct_registry, batched_registry = CollectorRegistry(), CollectorRegistry()
+        direct = histogram(direct_registry).labels('/api')
+        for value in DURATIONS:
+            direct.observe(value)
+        
+        _observe_batch(histogram(batched_registry).labels('/api'), [round(value * 1_000_000) for value in DURATIONS])
+        
+        assert_same_samples(samples(batched_registry), samples(direct_registry))
+    
+    def test_metrics_buffer_matches_observe(self):
+        direct_registry, batched_registry = CollectorRegistry(), CollectorRegistry()
+        direct_metric, batched_metric = histogram(direct_registry), histogram(batched_registry)
+        buffer = MetricsBuffer()
+        for value in DURATIONS:
+            direct_metric.labels('/api').observe(value)
+            buffer.observe(batched_metric, ('/api',), value)
+        
+        # Nothing reaches the collector until the buffer is flushed
+        assert samples(batched_registry) == {}
+        buffer.flush()
+        
+        assert_same_samples(samples(batched_registry), samples(direct_registry))